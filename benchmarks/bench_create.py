@@ -0,0 +1,38 @@
+#!/usr/bin/python3
+"""Bulk create benchmark: one create command per instance against a
+    single create <class> count=<n> command.
+
+Usage: ./benchmarks/bench_create.py [number of instances]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+
+def timed(commands):
+    """
+    Runs the console commands and returns the seconds they took.
+    """
+    from console import HBNBCommand
+    console = HBNBCommand()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for command in commands:
+            console.onecmd(command)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        print("create Place x {}:      {:.3f}s".format(
+            count, timed(["create Place"] * count)))
+        print("create Place count={}: {:.3f}s".format(
+            count, timed(["create Place count={}".format(count)])))
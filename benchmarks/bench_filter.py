@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+"""Place filter benchmark: storage.filter_places() against a loop over
+    storage.all() reading the attributes of every instance.
+
+Usage: ./benchmarks/bench_filter.py [number of places]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+
+QUERIES = (
+    {"price_min": 50, "price_max": 100, "min_guests": 4},
+    {"price_max": 200, "bbox": (37.70, -122.50, 37.72, -122.48)},
+)
+
+
+def scan(storage, price_min=None, price_max=None, min_guests=None,
+         bbox=None):
+    """
+    Filters the way callers had to before filter_places().
+    """
+    price_min = float("-inf") if price_min is None else price_min
+    price_max = float("inf") if price_max is None else price_max
+    min_guests = float("-inf") if min_guests is None else min_guests
+    south, west, north, east = bbox or (-90, -180, 90, 180)
+    return [obj for obj in storage.all().values()
+            if type(obj).__name__ == "Place" and
+            price_min <= obj.price_by_night <= price_max and
+            obj.max_guest >= min_guests and
+            south <= obj.latitude <= north and
+            west <= obj.longitude <= east]
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    os.chdir(tempfile.mkdtemp())
+    import models
+    from models.place import Place
+    random.seed(0)
+    places = []
+    for i in range(count):
+        pl = Place.__new__(Place)
+        pl._load({"id": str(i), "price_by_night": random.randint(10, 500),
+                  "max_guest": random.randint(1, 8),
+                  "latitude": random.uniform(37.6, 37.9),
+                  "longitude": random.uniform(-122.6, -122.3)})
+        places.append(pl)
+    models.storage.new_many(places)
+    models.storage.filter_places(price_min=0)
+
+    for query in QUERIES:
+        start = time.perf_counter()
+        slow = scan(models.storage, **query)
+        scanned = time.perf_counter() - start
+        start = time.perf_counter()
+        fast = models.storage.filter_places(**query)
+        filtered = time.perf_counter() - start
+        assert len(slow) == len(fast)
+        print(query)
+        print("  scan of storage.all()  {} places, {} found: {:.1f}ms".format(
+            count, len(fast), scanned * 1000))
+        print("  filter_places()        {} places, {} found: {:.1f}ms "
+              "({:.1f}x)".format(count, len(fast), filtered * 1000,
+                                 scanned / filtered))
@@ -0,0 +1,56 @@
+#!/usr/bin/python3
+"""Snapshot format benchmark: size, save and reload time of the JSON
+    and binary serializers of FileStorage.
+
+Usage: ./benchmarks/bench_formats.py [number of records]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+
+def timed(func, *args):
+    """
+    Returns the seconds func(*args) took.
+    """
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def make_places(count):
+    """
+    Stores count Place instances.
+    """
+    from models.place import Place
+    for i in range(count):
+        pl = Place()
+        pl.name = "Place {}".format(i)
+        pl.number_rooms = i % 5
+        pl.price_by_night = 50 + i % 200
+        pl.latitude = 37.7 + (i % 1000) / 10000
+        pl.longitude = -122.4 - (i % 1000) / 10000
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        import models
+        from models.engine.file_storage import FileStorage
+        make_places(count)
+        objects = FileStorage._FileStorage__objects
+        for path in ("file.json", "file.hbnb"):
+            models.storage.set_path(path)
+            FileStorage._FileStorage__objects = objects
+            save = timed(models.storage.compact)
+            FileStorage._FileStorage__objects = {}
+            reload = timed(models.storage.reload)
+            print("{:9} {} records: {:6.1f} MB  save {:.3f}s  "
+                  "reload {:.3f}s".format(
+                      path, models.storage.count(),
+                      os.path.getsize(path) / 1e6, save, reload))
@@ -0,0 +1,55 @@
+#!/usr/bin/python3
+"""Spatial query benchmark: storage.nearest(), within_radius() and
+    within_bbox() against a scan of storage.all().
+
+Usage: ./benchmarks/bench_geo.py [number of places]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+
+def timed(func, *args):
+    """
+    Returns (result, milliseconds) of func(*args).
+    """
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    os.chdir(tempfile.mkdtemp())
+    import models
+    from models.engine.geo_index import distance_km
+    from models.place import Place
+    random.seed(0)
+    places = []
+    for i in range(count):
+        pl = Place.__new__(Place)
+        pl._load({"id": str(i), "latitude": random.uniform(25, 49),
+                  "longitude": random.uniform(-124, -67)})
+        places.append(pl)
+    models.storage.new_many(places)
+    models.storage.nearest(37.77, -122.41)
+
+    found, ms = timed(models.storage.nearest, 37.77, -122.41, 10)
+    print("nearest(10)            {} places: {:.3f}ms".format(count, ms))
+    found, ms = timed(models.storage.within_radius, 37.77, -122.41, 5)
+    print("within_radius(5 km)    {} places, {} found: {:.3f}ms".format(
+        count, len(found), ms))
+    found, ms = timed(models.storage.within_bbox, 37.7, -122.5, 37.8,
+                      -122.4)
+    print("within_bbox            {} places, {} found: {:.3f}ms".format(
+        count, len(found), ms))
+    found, ms = timed(lambda: [
+        pl for pl in models.storage.all().values()
+        if distance_km(37.77, -122.41, pl.latitude, pl.longitude) <= 5])
+    print("scan of storage.all()  {} places, {} found: {:.3f}ms".format(
+        count, len(found), ms))
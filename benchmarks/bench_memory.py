@@ -0,0 +1,82 @@
+#!/usr/bin/python3
+"""Memory benchmark: bytes per Place held after FileStorage.reload(),
+    with the class layout used by BaseModel._load() against setting
+    the attributes in file order.
+
+Usage: ./benchmarks/bench_memory.py [number of records]
+"""
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+import uuid
+from datetime import datetime
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+
+def make_file(path, count):
+    """
+    Writes count Place records to path, with their keys in varying
+    orders as they would be after updates.
+    """
+    now = datetime.now().isoformat()
+    city_ids = [str(uuid.uuid4()) for i in range(100)]
+    user_ids = [str(uuid.uuid4()) for i in range(1000)]
+    records = {}
+    for i in range(count):
+        record = {
+            "id": str(uuid.uuid4()), "created_at": now, "updated_at": now,
+            "__class__": "Place", "name": "Place {}".format(i),
+            "city_id": city_ids[i % 100], "user_id": user_ids[i % 1000],
+            "number_rooms": i % 5, "latitude": 37.77, "longitude": -122.41}
+        if i % 2:
+            record = dict(reversed(list(record.items())))
+        records["Place." + record["id"]] = record
+    with open(path, "w") as file:
+        json.dump(records, file)
+
+
+def file_order(self, attrs):
+    """
+    Builds an instance by setting the attributes in file order.
+    """
+    for key, value in attrs.items():
+        if key == "created_at" or key == "updated_at":
+            value = datetime.fromisoformat(value)
+        if key != "__class__":
+            object.__setattr__(self, key, value)
+
+
+def measure(storage, count):
+    """
+    Returns the bytes per instance a reload of the file keeps alive.
+    """
+    from models.engine.file_storage import FileStorage
+    FileStorage._FileStorage__objects = {}
+    gc.collect()
+    tracemalloc.start()
+    storage.reload()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert storage.count() == count
+    return size / count
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        make_file("file.json", count)
+        import models
+        from models.place import Place
+        with patch.object(Place, "_load", file_order):
+            before = measure(models.storage, count)
+        after = measure(models.storage, count)
+    print("file order {:.0f} bytes per Place".format(before))
+    print("layout     {:.0f} bytes per Place ({:.0f}% less)".format(
+        after, 100 * (1 - after / before)))
@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+"""Record engine benchmark: time to open the storage and show one
+    instance with FileStorage against RecordStorage.
+
+Usage: ./benchmarks/bench_record.py [number of records]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+
+def timed(func, *args):
+    """
+    Returns the seconds func(*args) took.
+    """
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def open_and_show(storage, id):
+    """
+    Opens storage and reads the Place with id.
+    """
+    storage.reload()
+    assert storage.get("Place", id) is not None
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        import models
+        from models.engine.file_storage import FileStorage
+        from models.engine.record_storage import RecordStorage
+        from models.place import Place
+        for i in range(count):
+            pl = Place()
+            pl.name = "Place {}".format(i)
+        id = pl.id
+        objects = FileStorage._FileStorage__objects
+        models.storage.save()
+        records = RecordStorage()
+        records.reload()
+        records.new_many(objects.values())
+        records.save()
+        for name, storage in (("file", models.storage), ("record", records)):
+            print("{:6} open + show of 1/{} records: {:.3f}s".format(
+                name, count, timed(open_and_show, storage, id)))
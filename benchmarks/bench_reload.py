@@ -0,0 +1,77 @@
+#!/usr/bin/python3
+"""Reload micro-benchmark: datetime decoding with strptime against
+    datetime.fromisoformat, and a full FileStorage.reload().
+
+Usage: ./benchmarks/bench_reload.py [number of records]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+
+def timed(func, *args):
+    """
+    Returns the seconds func(*args) took.
+    """
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def decode_strptime(values):
+    """
+    Decodes values the way BaseModel used to.
+    """
+    for value in values:
+        datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f")
+
+
+def decode_fromisoformat(values):
+    """
+    Decodes values the way BaseModel does.
+    """
+    for value in values:
+        datetime.fromisoformat(value)
+
+
+def make_file(path, count):
+    """
+    Writes count Place records to path.
+    """
+    records = {}
+    now = datetime.now().isoformat()
+    for i in range(count):
+        id = str(uuid.uuid4())
+        records["Place." + id] = {
+            "id": id, "__class__": "Place", "created_at": now,
+            "updated_at": now, "name": "Place {}".format(i),
+            "number_rooms": i % 5, "latitude": 37.77, "longitude": -122.41}
+    with open(path, "w") as file:
+        json.dump(records, file)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    values = [datetime.now().isoformat() for i in range(count)]
+    slow = timed(decode_strptime, values)
+    fast = timed(decode_fromisoformat, values)
+    print("strptime      {} values: {:.3f}s".format(count, slow))
+    print("fromisoformat {} values: {:.3f}s ({:.1f}x)".format(
+        count, fast, slow / fast))
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        make_file("file.json", count)
+        import models
+        from models.engine.file_storage import FileStorage
+        FileStorage._FileStorage__objects = {}
+        elapsed = timed(models.storage.reload)
+        print("reload        {} records: {:.3f}s".format(
+            models.storage.count(), elapsed))
@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+"""Startup benchmark: time `import models` against a generated file.json
+    and count how many times the file is opened while importing.
+
+Usage: ./benchmarks/bench_startup.py [number of records]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import builtins
+import time
+opened = []
+real_open = builtins.open
+
+
+def counting_open(file, *args, **kwargs):
+    if file == "file.json":
+        opened.append(file)
+    return real_open(file, *args, **kwargs)
+
+
+builtins.open = counting_open
+start = time.perf_counter()
+import models
+elapsed = time.perf_counter() - start
+print(len(opened), elapsed)
+"""
+
+
+def make_file(path, count):
+    """
+    Writes count User records to path.
+    """
+    records = {}
+    for i in range(count):
+        id = str(uuid.uuid4())
+        records["User." + id] = {
+            "id": id, "__class__": "User",
+            "created_at": "2017-09-28T21:03:54.052298",
+            "updated_at": "2017-09-28T21:03:54.052302",
+            "email": "user{}@mail.com".format(i), "first_name": "Betty"}
+    with open(path, "w") as file:
+        json.dump(records, file)
+
+
+def run(workdir, policy):
+    """
+    Imports models in a fresh interpreter and returns (opens, seconds).
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT, HBNB_STORAGE_LOAD=policy)
+    out = subprocess.run([sys.executable, "-c", CHILD], cwd=workdir,
+                         env=env, check=True, capture_output=True,
+                         text=True).stdout.split()
+    return int(out[0]), float(out[1])
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    with tempfile.TemporaryDirectory() as workdir:
+        make_file(os.path.join(workdir, "file.json"), count)
+        for policy in ("eager", "lazy"):
+            opens, elapsed = run(workdir, policy)
+            print("{:5} {} records: file opened {} time(s), "
+                  "import took {:.3f}s".format(policy, count, opens,
+                                               elapsed))
@@ -0,0 +1,45 @@
+#!/usr/bin/python3
+"""Import/export benchmark: streams a JSON Lines file of places into a
+    snapshot then out to CSV, and reports the peak memory, which should
+    not grow with the number of places.
+
+Usage: ./benchmarks/bench_transfer.py [number of places]
+"""
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+
+def timed(function, *args, **kwargs):
+    """
+    Returns the seconds function(*args, **kwargs) took.
+    """
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        with open("places.jsonl", "w") as f:
+            for i in range(count):
+                f.write(json.dumps({"name": "Place {}".format(i),
+                                    "number_rooms": str(i % 7),
+                                    "latitude": "37.5"}) + "\n")
+        from models.engine.transfer import export_records, import_records
+        print("import {} places to file.json: {:.3f}s".format(
+            count, timed(import_records, "places.jsonl", "Place",
+                         dst="file.json")))
+        print("export {} places to CSV:       {:.3f}s".format(
+            count, timed(export_records, "places.csv", "Place",
+                         src="file.json")))
+        print("peak memory: {} MB".format(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024))
@@ -0,0 +1,39 @@
+#!/usr/bin/python3
+"""Write-behind benchmark: a script of update commands saving after
+    each one, with synchronous saves against write-behind mode.
+
+Usage: ./benchmarks/bench_write_behind.py [number of updates]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+
+def updates(count):
+    """
+    Updates and saves count instances one at a time, then flushes.
+    """
+    import models
+    from models.user import User
+    users = [User() for i in range(100)]
+    start = time.perf_counter()
+    for i in range(count):
+        users[i % 100].first_name = "Betty {}".format(i)
+        users[i % 100].save()
+    models.storage.flush()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        import models
+        print("synchronous  {} updates: {:.3f}s".format(count, updates(count)))
+        models.storage.set_write_behind(True, interval=0.5)
+        print("write-behind {} updates: {:.3f}s".format(count, updates(count)))
+        models.storage.set_write_behind(False)
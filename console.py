@@ -2,15 +2,15 @@
 
 """ Define HBnB Console """
 import cmd
-from models.base_model import BaseModel
-from models.state import State
-from models.city import City
-from models.amenity import Amenity
-from models.place import Place
-from models.review import Review
-from models.user import User
+import sys
+from contextlib import redirect_stdout
+from io import StringIO
+from models.base_model import classes
+from models.engine.transfer import export_records, import_records
 import models
 import json
+import uuid
+from datetime import datetime
 from shlex import split
 import re
 
@@ -39,15 +39,6 @@ class HBNBCommand(cmd.Cmd):
     """
 
     prompt = "(hbnb) "
-    __classes = {
-        "BaseModel",
-        "User",
-        "State",
-        "City",
-        "Place",
-        "Amenity",
-        "Review"
-    }
 
     def do_quit(self, arg):
         """
@@ -70,31 +61,97 @@ class HBNBCommand(cmd.Cmd):
 
     def do_create(self, arg):
         """
-        Creates a new instance of BaseModel, State,
-        City, Amenity, Place, Review, or User,
-        saves it (to the JSON file) and prints the id.
-        Usage: create <class name>
+        Creates a new instance of a model class (BaseModel, State,
+        City, Amenity, Place, Review, User or any other subclass of
+        BaseModel), saves it (to the JSON file) and prints the id.
+        With count=<n>, creates n instances; with file=<path>, creates
+        an instance per line of a JSON Lines file of attribute values.
+        Both save once and print an id per line.
+        Usage: create <class name> [count=<n> | file=<path>]
         """
-        if not arg:
+        name, _, option = arg.strip().partition(" ")
+        option = option.strip()
+        if not name:
             print("** class name missing **")
-        elif arg not in BaseModel.__subclasses__():
+        elif name not in classes:
             print("** class doesn't exist **")
-        else:
-            new_instance = BaseModel()
-            if arg == "State":
-                new_instance = State()
-            elif arg == "City":
-                new_instance = City()
-            elif arg == "Amenity":
-                new_instance = Amenity()
-            elif arg == "Place":
-                new_instance = Place()
-            elif arg == "Review":
-                new_instance = Review()
-            elif arg == "User":
-                new_instance = User()
+        elif not option:
+            new_instance = classes[name]()
             new_instance.save()
             print(new_instance.id)
+        elif option.startswith("count="):
+            try:
+                count = int(option[len("count="):])
+            except ValueError:
+                count = -1
+            if count < 0:
+                print("** invalid count **")
+            else:
+                self.__create_many(classes[name],
+                                   ({} for i in range(count)))
+        elif option.startswith("file="):
+            path = option[len("file="):]
+            try:
+                f = open(path, "r")
+            except OSError:
+                print("** can't read {} **".format(path))
+            else:
+                with f:
+                    self.__create_many(classes[name], self.__records(f))
+        else:
+            print("** invalid option **")
+
+    def __records(self, lines):
+        """
+        Yields the attribute dictionaries of a JSON Lines file,
+        printing the lines that are not one, or whose id is not a
+        string or timestamps not in isoformat() form.
+        """
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                if type(record) is not dict:
+                    raise ValueError
+                if type(record.get("id", "")) is not str:
+                    raise ValueError
+                for name in ("created_at", "updated_at"):
+                    if name in record:
+                        datetime.fromisoformat(record[name])
+            except (TypeError, ValueError):
+                print("** line {}: invalid record **".format(number))
+            else:
+                yield record
+
+    def __create_many(self, cls, records):
+        """
+        Creates an instance of cls per attribute dictionary of records,
+        registers them in chunks, printing their ids as it goes,
+        and saves once at the end.
+        """
+        now = datetime.now().isoformat()
+        chunk = []
+        for record in records:
+            attrs = {"id": str(uuid.uuid4()),
+                     "created_at": now, "updated_at": now}
+            attrs.update(record)
+            obj = cls.__new__(cls)
+            obj._load(attrs)
+            chunk.append(obj)
+            if len(chunk) == 10000:
+                self.__register(chunk)
+                chunk = []
+        self.__register(chunk)
+        models.storage.save()
+
+    def __register(self, objs):
+        """
+        Registers the instances objs in the storage and prints their ids.
+        """
+        if objs:
+            models.storage.new_many(objs)
+            print("\n".join(obj.id for obj in objs))
 
     def do_show(self, arg):
         """
@@ -104,14 +161,14 @@ class HBNBCommand(cmd.Cmd):
         args = arg.split()
         if not args:
             print("** class name missing **")
-        elif args[0] not in BaseModel.__subclasses__():
+        elif args[0] not in classes:
             print("** class doesn't exist **")
         elif len(args) < 2:
             print("** instance id missing **")
         else:
-            obj_key = "{}.{}".format(args[0], args[1])
-            if obj_key in storage.all():
-                print(storage.all()[obj_key])
+            obj = models.storage.get(args[0], args[1])
+            if obj is not None:
+                print(obj)
             else:
                 print("** no instance found **")
 
@@ -124,15 +181,15 @@ class HBNBCommand(cmd.Cmd):
         args = arg.split()
         if not args:
             print("** class name missing **")
-        elif args[0] not in BaseModel.__subclasses__():
+        elif args[0] not in classes:
             print("** class doesn't exist **")
         elif len(args) < 2:
             print("** instance id missing **")
         else:
-            obj_key = "{}.{}".format(args[0], args[1])
-            if obj_key in storage.all():
-                storage.all().pop(obj_key)
-                storage.save()
+            obj = models.storage.get(args[0], args[1])
+            if obj is not None:
+                models.storage.delete(obj)
+                models.storage.save()
             else:
                 print("** no instance found **")
 
@@ -142,18 +199,208 @@ class HBNBCommand(cmd.Cmd):
         based or not on the class name.
         Usage: all or all <class name>
         """
-        args = line.split()
-        all_objs = models.storage.all()
+        args = arg.split()
+        if not args:
+            all_objs = models.storage.all()
+        elif args[0] in classes:
+            all_objs = models.storage.all(args[0])
+        else:
+            print("** class doesn't exist **")
+            return
+        print([str(value) for value in all_objs.values()])
+
+    def do_count(self, arg):
+        """
+        Retrieves the number of instances of a class.
+        Usage: count <class name> or <class name>.count()
+        """
+        args = arg.split()
+        if not args:
+            print(models.storage.count())
+        else:
+            print(models.storage.count(args[0]))
+
+    def default(self, arg):
+        """
+        Dispatches the <class name>.<command>(<args>) syntax
+        to the matching do_<command> method.
+        """
+        commands = {
+            "all": self.do_all,
+            "count": self.do_count,
+            "show": self.do_show,
+            "destroy": self.do_destroy,
+            "update": self.do_update
+        }
+        match = re.search(r"^(\w*)\.(\w+)\((.*)\)$", arg)
+        if match is not None and match.group(2) in commands:
+            args = [match.group(1)] + parse(match.group(3))
+            return commands[match.group(2)](" ".join(args))
+        print("*** Unknown syntax: {}".format(arg))
+        return False
+
+    def do_begin(self, arg):
+        """
+        Starts a transaction: the changes are only saved by commit,
+        and rollback undoes every change made since begin.
+        Usage: begin
+        """
+        try:
+            models.storage.begin()
+        except RuntimeError:
+            print("** transaction already open **")
+
+    def do_commit(self, arg):
+        """
+        Saves the changes of the transaction at once.
+        Usage: commit
+        """
+        try:
+            models.storage.commit()
+        except RuntimeError:
+            print("** no transaction open **")
+
+    def do_rollback(self, arg):
+        """
+        Undoes the changes of the transaction.
+        Usage: rollback
+        """
+        try:
+            models.storage.rollback()
+        except RuntimeError:
+            print("** no transaction open **")
+
+    def do_export(self, arg):
+        """
+        Writes every instance of a class to a JSON Lines (.jsonl) or
+        CSV (.csv) file and prints their number.
+        Usage: export <class name> <path>
+        """
+        args = arg.split()
         if not args:
-            print([str(value) for value in all_objs.values()])
-        elif args[0] in self.__classes:
-            print(
-                [str(value)
-                 for key, value in all_objs.items()
-                 if key.split(".")[0] == args[0]]
-            )
+            print("** class name missing **")
+        elif args[0] not in classes:
+            print("** class doesn't exist **")
+        elif len(args) < 2:
+            print("** file path missing **")
         else:
+            try:
+                print(export_records(args[1], args[0]))
+            except ValueError as error:
+                print("** {} **".format(error))
+            except OSError:
+                print("** can't write {} **".format(args[1]))
+
+    def do_import(self, arg):
+        """
+        Creates an instance of a class per record of a JSON Lines
+        (.jsonl) or CSV (.csv) file, saves once and prints their number.
+        Values are converted to the type of the class attribute of the
+        same name. If a record is invalid, the storage is left holding
+        the instances it held before and nothing is saved.
+        Usage: import <class name> <path>
+        """
+        args = arg.split()
+        if not args:
+            print("** class name missing **")
+        elif args[0] not in classes:
             print("** class doesn't exist **")
+        elif len(args) < 2:
+            print("** file path missing **")
+        else:
+            try:
+                print(import_records(args[1], args[0]))
+            except ValueError as error:
+                print("** {} **".format(error))
+            except OSError as error:
+                if error.filename != args[1]:
+                    # a failed save, not the file to import
+                    raise
+                print("** can't read {} **".format(args[1]))
+
+    def do_nearest(self, arg):
+        """
+        Prints the k places nearest to a point, nearest first.
+        Usage: nearest <latitude> <longitude> [<k>]
+        """
+        args = self.__numbers(arg, 2, 3)
+        if args is not None:
+            k = int(args[2]) if len(args) > 2 else 1
+            places = models.storage.nearest(args[0], args[1], k)
+            print([str(place) for place in places])
+
+    def do_within_radius(self, arg):
+        """
+        Prints the places at most <km> away from a point, nearest first.
+        Usage: within_radius <latitude> <longitude> <km>
+        """
+        args = self.__numbers(arg, 3, 3)
+        if args is not None:
+            places = models.storage.within_radius(*args)
+            print([str(place) for place in places])
+
+    def do_within_bbox(self, arg):
+        """
+        Prints the places inside a latitude/longitude box.
+        Usage: within_bbox <south> <west> <north> <east>
+        """
+        args = self.__numbers(arg, 4, 4)
+        if args is not None:
+            places = models.storage.within_bbox(*args)
+            print([str(place) for place in places])
+
+    def __numbers(self, arg, least, most):
+        """
+        Returns the arguments of a spatial command as floats,
+        or prints the error and returns None.
+        """
+        args = arg.split()
+        if len(args) < least:
+            print("** coordinates missing **")
+            return None
+        try:
+            return [float(value) for value in args[:most]]
+        except ValueError:
+            print("** invalid coordinates **")
+            return None
+
+    def batch(self, lines, name="<batch>"):
+        """
+        Runs the commands of lines (a file or any iterable of strings)
+        and saves once at the end instead of after every command.
+        Blank lines and lines starting with # are skipped. Error
+        messages are printed to stderr as <name>:<line>: <message>.
+        Returns the number of lines that failed.
+        """
+        failed = 0
+        with models.storage.deferred():
+            for number, line in enumerate(lines, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                output = StringIO()
+                try:
+                    with redirect_stdout(output):
+                        stop = self.onecmd(self.precmd(line))
+                except Exception as error:
+                    stop = False
+                    output.write("** {}: {} **\n".format(
+                        type(error).__name__, error))
+                errors = []
+                for message in output.getvalue().splitlines():
+                    if message.startswith("*"):
+                        errors.append(message)
+                    else:
+                        print(message)
+                if errors:
+                    failed += 1
+                    for message in errors:
+                        print("{}:{}: {}: {}".format(name, number, line,
+                                                     message),
+                              file=sys.stderr)
+                if stop:
+                    break
+        return failed
 
     def parse(self, line):
         """
@@ -170,19 +417,18 @@ class HBNBCommand(cmd.Cmd):
         args = arg.split()
         if not args:
             print("** class name missing **")
-        elif args[0] not in BaseModel.__subclasses__():
+        elif args[0] not in classes:
             print("** class doesn't exist **")
         elif len(args) < 2:
             print("** instance id missing **")
         else:
-            obj_key = "{}.{}".format(args[0], args[1])
-            if obj_key in storage.all():
+            obj = models.storage.get(args[0], args[1])
+            if obj is not None:
                 if len(args) < 3:
                     print("** attribute name missing **")
                 elif len(args) < 4:
                     print("** value missing **")
                 else:
-                    obj = storage.all()[obj_key]
                     attr_name = args[2]
                     attr_value = args[3]
                     setattr(obj, attr_name, attr_value)
@@ -192,4 +438,17 @@ class HBNBCommand(cmd.Cmd):
 
 
 if __name__ == '__main__':
+    if len(sys.argv) == 3 and sys.argv[1] == "--batch":
+        if sys.argv[2] == "-":
+            failed = HBNBCommand().batch(sys.stdin, "<stdin>")
+        else:
+            try:
+                f = open(sys.argv[2], "r")
+            except OSError:
+                print("** can't read {} **".format(sys.argv[2]),
+                      file=sys.stderr)
+                sys.exit(1)
+            with f:
+                failed = HBNBCommand().batch(f, sys.argv[2])
+        sys.exit(1 if failed else 0)
     HBNBCommand().cmdloop()
@@ -1,5 +1,58 @@
 #!/usr/bin/python3
-""" init class FileStorage """
+""" init class FileStorage
+
+The storage file is read exactly once per process, here. The open
+policy is taken from HBNB_STORAGE_LOAD: "eager" (default) builds every
+instance now, "lazy" only decodes the records and builds each instance
+on first access.
+
+HBNB_STORAGE_PATH and HBNB_STORAGE_FORMAT ("json" or "binary") select
+the snapshot file and its format, which otherwise follows the file
+extension (.hbnb and .bin are binary).
+
+HBNB_STORAGE_WRITE_BEHIND=<seconds> makes FileStorage save in a
+background thread every so many seconds, or once
+HBNB_STORAGE_FLUSH_THRESHOLD (default 1000) instances are dirty.
+
+HBNB_TYPE_STORAGE selects the engine: "file" (default) for FileStorage,
+"record" for RecordStorage, which reads one record at a time from a
+memory-mapped file.records, "sqlite" for SQLiteStorage, which keeps
+one table per class in file.db.
+
+The model modules are imported here so that every model class is in
+models.base_model.classes before the storage reads anything.
+"""
+from os import getenv
+from models import amenity, city, place, review, state, user
 from models.engine.file_storage import FileStorage
-storage = FileStorage()
-storage.reload()
+
+load_policy = getenv("HBNB_STORAGE_LOAD", "eager")
+if load_policy not in ("eager", "lazy"):
+    raise ValueError("HBNB_STORAGE_LOAD must be 'eager' or 'lazy'")
+storage_type = getenv("HBNB_TYPE_STORAGE", "file")
+if storage_type == "file":
+    storage = FileStorage()
+    if getenv("HBNB_STORAGE_PATH") or getenv("HBNB_STORAGE_FORMAT"):
+        storage.set_path(getenv("HBNB_STORAGE_PATH", "file.json"),
+                         getenv("HBNB_STORAGE_FORMAT"))
+    if getenv("HBNB_STORAGE_JOURNAL"):
+        storage.set_journal(True,
+                            int(getenv("HBNB_STORAGE_COMPACT", "1000")))
+    if getenv("HBNB_STORAGE_WRITE_BEHIND"):
+        storage.set_write_behind(
+            True, float(getenv("HBNB_STORAGE_WRITE_BEHIND")),
+            int(getenv("HBNB_STORAGE_FLUSH_THRESHOLD", "1000")))
+elif storage_type == "record":
+    from models.engine.record_storage import RecordStorage
+    storage = RecordStorage()
+    if getenv("HBNB_STORAGE_PATH"):
+        storage.set_path(getenv("HBNB_STORAGE_PATH"))
+elif storage_type == "sqlite":
+    from models.engine.sqlite_storage import SQLiteStorage
+    storage = SQLiteStorage()
+    if getenv("HBNB_STORAGE_PATH"):
+        storage.set_path(getenv("HBNB_STORAGE_PATH"))
+else:
+    raise ValueError(
+        "HBNB_TYPE_STORAGE must be 'file', 'record' or 'sqlite'")
+storage.reload(lazy=load_policy == "lazy")
@@ -1,22 +1,80 @@
 #!/usr/bin/python3
 """ class BaseModel """
+import sys
 import uuid
 from datetime import datetime
 import models
 
+_layouts = {}
+classes = {}
+# the value of an attribute an instance did not have, for touch()
+_missing = object()
+
+
+def _layout(cls):
+    """ attribute names of cls in the order instances are built with:
+        id, the timestamps, then the attributes declared on the class """
+    layout = _layouts.get(cls)
+    if layout is None:
+        names = ["id", "created_at", "updated_at"]
+        for klass in reversed(cls.__mro__):
+            for name, value in vars(klass).items():
+                if (not name.startswith("_") and not callable(value) and
+                        name not in names):
+                    names.append(name)
+        layout = _layouts[cls] = tuple(names)
+    return layout
+
 
 class BaseModel:
+    _indexes = ()
+
+    def __init_subclass__(cls, **kwargs):
+        # registers every model class under its name: storage engines,
+        # the console and imports look classes up in classes
+        super().__init_subclass__(**kwargs)
+        classes[cls.__name__] = cls
+
     def __init__(self, *args, **kwargs):
         if kwargs:
-            for key, value in kwargs.items():
-                if key == "created_at" or key == "updated_at":
-                    value = datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f")
-                if key != "__class__":
-                    setattr(self, key, value)
-                    storage.new(self)
+            self._load(kwargs)
+            if "id" in kwargs:
+                models.storage.new(self)
         else:
             self.id = str(uuid.uuid4())
             self.created_at = self.updated_at = datetime.now()
+            models.storage.new(self)
+
+    def _load(self, attrs):
+        # applies a to_dict() dictionary without registering self.
+        # Attributes are set in the class layout order so that instances
+        # share one table of attribute names, equal timestamps share one
+        # datetime and indexed foreign keys share one string.
+        layout = _layout(self.__class__)
+        for key in layout:
+            if key not in attrs:
+                continue
+            value = attrs[key]
+            if key == "created_at" or key == "updated_at":
+                if (key == "updated_at" and "created_at" in attrs and
+                        value == attrs["created_at"]):
+                    value = self.created_at
+                else:
+                    # isoformat() output, with or without microseconds
+                    value = datetime.fromisoformat(value)
+            elif key in self._indexes and type(value) is str:
+                value = sys.intern(value)
+            super().__setattr__(key, value)
+        for key, value in attrs.items():
+            if key not in layout and key != "__class__":
+                super().__setattr__(key, value)
+
+    def __setattr__(self, name, value):
+        old = self.__dict__.get(name, _missing)
+        super().__setattr__(name, value)
+        # lets storage re-encode only the instances that changed, and
+        # undo the change in a transaction
+        models.storage.touch(self, name, old)
 
     def __str__(self):
         return "[{}] ({}) {}".format(
@@ -24,7 +82,8 @@ class BaseModel:
 
     def save(self):
         self.updated_at = datetime.now()
-        storage.save()
+        models.storage.new(self)
+        models.storage.save()
 
     def to_dict(self):
         obj_dict = self.__dict__.copy()
@@ -32,3 +91,6 @@ class BaseModel:
         obj_dict["created_at"] = self.created_at.isoformat()
         obj_dict["updated_at"] = self.updated_at.isoformat()
         return obj_dict
+
+
+classes["BaseModel"] = BaseModel
@@ -5,5 +5,6 @@ from models.base_model import BaseModel
 
 class City(BaseModel):
     """ City class which inherit BaseModel """
+    _indexes = ("state_id",)
     state_id = ""
     name = ""
@@ -0,0 +1,69 @@
+#!/usr/bin/python3
+
+"""class AsyncStorageMixin
+    asyncio methods of a storage engine, run in the loop's executor"""
+import asyncio
+
+
+class AsyncStorageMixin:
+    """
+    Adds awaitable versions of the storage methods that read or write
+    the file, so an event loop does not stall on them: the work runs in
+    the default executor of the loop, and the engine must be safe to
+    use from another thread.
+
+    Concurrent asave() calls are coalesced: a call made while a write
+    is running waits for it and then shares the next write with every
+    other call made meanwhile, so n callers cause at most two writes.
+    """
+
+    __pending = None
+    __current = None
+
+    async def asave(self):
+        """
+        Writes every change made so far, like flush().
+        """
+        loop = asyncio.get_running_loop()
+        pending = self.__pending
+        if pending is None or pending.get_loop() is not loop:
+            pending = self.__pending = loop.create_task(
+                self.__save_round(self.__current))
+        await asyncio.shield(pending)
+
+    async def aget(self, cls, id):
+        """
+        Returns the instance of cls with id, like get().
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.get, cls, id)
+
+    async def aall(self, cls=None, batch=1000):
+        """
+        Yields the stored instances, of cls only if given, giving the
+        loop a turn every batch instances.
+        """
+        objs = await asyncio.get_running_loop().run_in_executor(
+            None, self.all, cls)
+        for i, obj in enumerate(objs.values(), 1):
+            yield obj
+            if i % batch == 0:
+                await asyncio.sleep(0)
+
+    async def areload(self, *, lazy=False):
+        """
+        Reads the file again, like reload().
+        """
+        await asyncio.get_running_loop().run_in_executor(
+            None, lambda: self.reload(lazy=lazy))
+
+    async def __save_round(self, previous):
+        """
+        Waits for the write previous to end, then writes once for all
+        the asave() calls made until this write starts.
+        """
+        if previous is not None and not previous.done():
+            await asyncio.wait([previous])
+        self.__pending = None
+        self.__current = asyncio.current_task()
+        await asyncio.get_running_loop().run_in_executor(None, self.flush)
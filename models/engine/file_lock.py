@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+
+"""class FileLock
+    advisory lock shared by the processes using the same storage file"""
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class FileLock:
+    """
+    An exclusive fcntl lock on a lock file, taken with "with". Threads
+    of the process take it one at a time too, and it is reentrant for
+    the thread holding it: only the outermost "with" locks and unlocks
+    the file. Where fcntl is missing (Windows) only threads are kept
+    apart.
+    """
+
+    def __init__(self, path):
+        """
+        Initializes the lock of the lock file path.
+        """
+        self.path = path
+        self.depth = 0
+        self.fd = None
+        self.thread_lock = threading.RLock()
+
+    def __enter__(self):
+        """
+        Waits for the lock and takes it.
+        """
+        self.thread_lock.acquire()
+        if self.depth == 0 and fcntl is not None:
+            try:
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                except BaseException:
+                    os.close(fd)
+                    raise
+            except BaseException:
+                self.thread_lock.release()
+                raise
+            self.fd = fd
+        self.depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        """
+        Releases the lock.
+        """
+        self.depth -= 1
+        if self.depth == 0 and self.fd is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+            os.close(self.fd)
+            self.fd = None
+        self.thread_lock.release()
@@ -3,65 +3,960 @@
 """class FileStorage
     serialize instance to JSON file
     and deserialize JSON file to instance"""
+import atexit
+import copy
 import json
 import uuid
 import os
+import threading
+import warnings
 from datetime import datetime
-from models.base_model import BaseModel
-from models.user import User
-from models.state import State
-from models.city import City
-from models.amenity import Amenity
-from models.place import Place
-from models.review import Review
+from models.base_model import _missing, classes
+from models.engine.place_columns import PlaceColumns
+from models.engine.geo_index import GeoGrid
+from models.engine.serializers import JSONSerializer, serializer_for
+from models.engine.file_lock import FileLock
+from models.engine.async_storage import AsyncStorageMixin
+from models.engine.transactional_storage import TransactionalStorageMixin
 
 
-class FileStorage:
+class FileStorage(TransactionalStorageMixin, AsyncStorageMixin):
     """
     This class handles JSON serialization and deserialization of instances.
+
+    Processes sharing the file take an fcntl lock around reload()
+    and save(), and each save first merges what the others saved
+    since, detected from the inode, mtime and size of the files.
+
+    In journal mode, save() appends only the records changed since the
+    last save to a journal file next to the JSON file, and rewrites the
+    full snapshot once the journal grows past the compaction threshold.
+
+    A snapshot is written to a temporary file, flushed to disk and
+    renamed over the previous one, so a crash leaves either the old or
+    the new snapshot. reload() removes the temporary file of an
+    interrupted save, and loads what it can of a damaged snapshot
+    (written by an older version or cut by the disk) before moving it
+    aside.
+
+    The snapshot format is given by a serializer, JSON by default or
+    the binary format of BinarySerializer (see set_path()). The journal
+    is always JSON lines.
+
+    Instances report attribute changes through touch(); the last
+    encoding of every clean instance is cached so a save only re-encodes
+    the instances that changed.
+
+    A class name -> {key: obj} index is kept next to __objects so that
+    all(cls) and count(cls) only touch the instances of that class.
+    The attributes a model lists in its _indexes are indexed the same
+    way, by (class name, attribute) -> {value: {key: obj}}, for find().
+
+    Views are extra structures kept in step with the instances of one
+    class, such as the PlaceColumns behind filter_places() and the
+    GeoGrid behind nearest(), within_radius() and within_bbox().
+
+    Threads share one storage: the methods changing the instances or
+    the indexes take __mutex, while get(), all() and count() read
+    without locking unless they have records to build or indexes to
+    rebuild. A save takes a snapshot of the instances under __mutex,
+    then encodes and writes it without holding __mutex, so other
+    threads keep creating and changing instances meanwhile.
+
+    In write-behind mode, save() only lets a background thread know
+    there are changes; the thread writes them every flush interval, or
+    as soon as flush threshold instances are dirty. flush() writes them
+    at once, and the process writes them when it exits.
+
+    Saves are deferred and transactions kept as TransactionalStorageMixin
+    describes. A transaction keeps the state of each instance before
+    the first change its thread makes to it (of every instance holding
+    lists or dicts at begin(), since those can change in place):
+    commit() saves all the changes in one write of the snapshot or one
+    journal line, and rollback() brings those instances back. Changes
+    from other threads are left alone.
+
+    Async code awaits asave(), aget(), aall() and areload() instead,
+    which run in the executor of the loop (see AsyncStorageMixin);
+    inside a transaction of the loop's thread, asave() only defers the
+    save like save().
+
+    A lazy reload keeps the decoded records of the file in __raw and
+    only builds an instance the first time all(), get() or find()
+    reaches it; records never reached are written back as they are.
     """
 
     __file_path = "file.json"
+    __serializer = JSONSerializer()
     __objects = {}
+    __raw = {}
+    __changes = {}
+    __cache = {}
+    __by_class = {}
+    __by_attr = {}
+    __indexed_values = {}
+    __indexed = None
+    __view_types = {"Place": {"columns": PlaceColumns, "geo": GeoGrid}}
+    __views = {}
+    __journal = False
+    __compact_every = 1000
+    __journal_size = 0
+    __journal_offset = 0
+    __journal_inode = None
+    __stamp = None
+    __lock = None
+    __mutex = threading.RLock()
+    __write_behind = False
+    __flush_interval = 1.0
+    __flush_threshold = 1000
+    __flusher = None
+    __wake = threading.Event()
+    __mutable = set()
+    __undo = None
 
     def __init__(self):
         """
         Initializes the FileStorage instance.
+        The file is not read here: models/__init__.py calls reload()
+        once per process according to its open policy.
+        """
+        pass
+
+    def all(self, cls=None):
+        """
+        Returns a copy of the dictionary __objects, or a dictionary of
+        the instances of cls (a class or a class name) only.
+        """
+        self.__hydrate(cls)
+        if cls is None:
+            return dict(FileStorage.__objects)
+        return dict(self.__class_bucket(cls))
+
+    def get(self, cls, id):
+        """
+        Returns the instance of cls (a class or a class name) with id,
+        or None if there is none.
+        """
+        name = cls if isinstance(cls, str) else cls.__name__
+        key = "{}.{}".format(name, id)
+        obj = FileStorage.__objects.get(key)
+        if obj is None and FileStorage.__raw:
+            with FileStorage.__mutex:
+                obj = FileStorage.__objects.get(key)
+                value = FileStorage.__raw.get(name, {}).pop(key, None)
+                if obj is None and value is not None:
+                    obj = self.__hydrate_one(key, value)
+        return obj
+
+    def count(self, cls=None):
+        """
+        Returns the number of stored instances, of cls only if given.
         """
-        self.reload()
+        if cls is None:
+            return len(FileStorage.__objects) + sum(
+                map(len, FileStorage.__raw.values()))
+        name = cls if isinstance(cls, str) else cls.__name__
+        return (len(self.__class_bucket(cls)) +
+                len(FileStorage.__raw.get(name, {})))
 
-    def all(self):
+    def new_many(self, objs):
         """
-        Returns the dictionary __objects.
+        Sets in __objects every obj of objs, like new() does for one.
         """
-        return FileStorage.__objects
+        with FileStorage.__mutex:
+            if FileStorage.__undo is not None:
+                objs = list(objs)
+                for obj in objs:
+                    self.__keep(obj.__class__.__name__ + "." + obj.id)
+            self.__register(objs)
 
-    def new(self, obj):
+    def delete(self, obj=None):
         """
-        Sets in __objects the obj with key <obj class name>.id.
+        Deletes obj from __objects if it's inside.
         """
+        if obj is None:
+            return
         key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        with FileStorage.__mutex:
+            if FileStorage.__undo is not None and key in FileStorage.__objects:
+                self.__keep(key)
+            if FileStorage.__objects.pop(key, None) is not None:
+                FileStorage.__changes[key] = None
+                FileStorage.__cache.pop(key, None)
+                self.__unindex(key, obj)
+
+    def touch(self, obj, name=None, old=_missing):
+        """
+        Marks a stored obj as changed since the last save,
+        and moves it in the index of attribute name if there is one.
+        old is the value name had before, kept in a transaction.
+        """
+        key = "{}.{}".format(obj.__class__.__name__,
+                             getattr(obj, "id", None))
+        if FileStorage.__objects.get(key) is not obj:
+            return
+        with FileStorage.__mutex:
+            if FileStorage.__objects.get(key) is not obj:
+                return
+            if FileStorage.__undo is not None:
+                self.__keep(key, name, old)
+            FileStorage.__changes[key] = obj
+            if type(obj.__dict__.get(name)) in (list, dict):
+                FileStorage.__mutable.add(key)
+            if name in obj._indexes:
+                self.__index(key, obj)
+            views = FileStorage.__views.get(obj.__class__.__name__)
+            if views:
+                for view in views.values():
+                    view.update(key, obj, name)
+
+    def find(self, cls, **equals):
+        """
+        Returns the list of instances of cls (a class or a class name)
+        whose attributes equal the given values, e.g.
+        find(Review, place_id=place.id). Indexed attributes are looked
+        up in their index, the others (and unhashable values) are
+        checked on each candidate.
+        """
+        self.__hydrate(cls)
+        candidates = self.__class_bucket(cls)
+        name = cls if isinstance(cls, str) else cls.__name__
+        for attr, value in equals.items():
+            index = FileStorage.__by_attr.get((name, attr))
+            if index is None:
+                continue
+            try:
+                bucket = index.get(value, {})
+            except TypeError:
+                continue
+            if len(bucket) < len(candidates):
+                candidates = bucket
+        return [obj for obj in list(candidates.values())
+                if all(getattr(obj, attr, None) == value
+                       for attr, value in equals.items())]
+
+    def set_path(self, path, format=None):
+        """
+        Sets the snapshot file to path, in format ("json" or "binary")
+        or else in the format matching the extension of path.
+        """
+        FileStorage.__file_path = path
+        FileStorage.__serializer = serializer_for(path, format)
+        FileStorage.__cache = {}
+        FileStorage.__lock = None
+
+    def set_journal(self, enabled, compact_every=1000):
+        """
+        Turns journal mode on or off.
+        compact_every is the number of journal entries after which
+        the next save rewrites the full snapshot.
+        """
+        FileStorage.__journal = enabled
+        FileStorage.__compact_every = compact_every
+
+    def set_write_behind(self, enabled, interval=1.0, threshold=1000):
+        """
+        Turns write-behind mode on or off. interval is the number of
+        seconds between two writes of the background thread, threshold
+        the number of dirty instances that triggers a write sooner.
+        Turning it off writes the pending changes.
+        """
+        FileStorage.__flush_interval = interval
+        FileStorage.__flush_threshold = threshold
+        FileStorage.__write_behind = enabled
+        if enabled:
+            if FileStorage.__flusher is None:
+                FileStorage.__flusher = threading.Thread(
+                    target=self.__flush_loop, name="FileStorage flusher",
+                    daemon=True)
+                FileStorage.__flusher.start()
+        else:
+            flusher = FileStorage.__flusher
+            if flusher is not None:
+                FileStorage.__wake.set()
+                flusher.join()
+                FileStorage.__flusher = None
+            self.flush()
+
+    def flush(self):
+        """
+        Serializes __objects to the JSON file (path: __file_path) now.
+        In journal mode only the changed records are appended.
+        The changes other processes saved since this one last read or
+        wrote the file are merged first, see refresh().
+        """
+        with self._saving(), self.__locked():
+            self.refresh()
+            if (FileStorage.__journal and
+                    FileStorage.__journal_size + len(FileStorage.__changes) <
+                    FileStorage.__compact_every):
+                with FileStorage.__mutex:
+                    changes = FileStorage.__changes
+                    FileStorage.__changes = {}
+                try:
+                    self.__append_journal(changes)
+                except BaseException:
+                    self.__restore(changes)
+                    raise
+            else:
+                self.compact()
+
+    async def asave(self):
+        """
+        Writes every change made so far, like flush(), unless the
+        calling thread has a transaction open: the executor thread
+        would wait for it to be closed.
+        """
+        if self._transaction_owner() == threading.get_ident():
+            self.save()
+            return
+        await super().asave()
+
+    def compact(self):
+        """
+        Rewrites the full snapshot and discards the journal.
+        """
+        serializer = FileStorage.__serializer
+        path = FileStorage.__file_path
+        with self._saving(), self.__locked():
+            self.refresh()
+            with FileStorage.__mutex:
+                changes = FileStorage.__changes
+                FileStorage.__changes = {}
+                objects = list(FileStorage.__objects.items())
+                raw = [item for records in FileStorage.__raw.values()
+                       for item in records.items()]
+            try:
+                with open(path + ".tmp",
+                          "wb" if serializer.binary else "w") as file:
+                    serializer.write(
+                        file, self.__fragments(objects, raw, changes))
+                    file.flush()
+                    os.fsync(file.fileno())
+                os.replace(path + ".tmp", path)
+            except BaseException:
+                self.__restore(changes)
+                raise
+            self.__sync_dir()
+            if os.path.exists(self.__journal_path()):
+                os.remove(self.__journal_path())
+            FileStorage.__stamp = self.__file_stamp(path)
+            FileStorage.__journal_size = 0
+            FileStorage.__journal_offset = 0
+            FileStorage.__journal_inode = None
+
+    def refresh(self):
+        """
+        Merges the changes other processes saved to the file since this
+        one last read or wrote it: only the new journal entries are
+        read if the snapshot is unchanged, the whole file otherwise.
+        The unsaved changes of this process win over theirs.
+        """
+        with self.__locked(), FileStorage.__mutex:
+            if (self.__file_stamp(FileStorage.__file_path) !=
+                    FileStorage.__stamp):
+                self.__merge_file()
+                return
+            journal = self.__file_stamp(self.__journal_path())
+            if journal is None:
+                if FileStorage.__journal_inode is not None:
+                    self.__merge_file()
+            elif (journal[0] != FileStorage.__journal_inode or
+                    journal[2] < FileStorage.__journal_offset):
+                self.__merge_file()
+            elif journal[2] > FileStorage.__journal_offset:
+                local = FileStorage.__changes
+                FileStorage.__changes = {}
+                self.__read_journal(
+                    lambda key, value: self.__merge(key, value, local),
+                    FileStorage.__journal_offset)
+                FileStorage.__changes = local
+
+    def reload(self, *, lazy=False):
+        """
+        Deserializes the JSON file to __objects (if the file exists),
+        then replays the journal on top of it. Records are decoded and
+        turned into instances one at a time, or kept as decoded records
+        until first accessed if lazy is True. A damaged file is moved
+        to <file>.damaged and rewritten from the records read before
+        the damage. A record that cannot be built into an instance is
+        skipped with a warning.
+        """
+        serializer = FileStorage.__serializer
+        path = FileStorage.__file_path
+        damaged = None
+        with self.__locked(), FileStorage.__mutex:
+            FileStorage.__raw = {}
+            if os.path.exists(path + ".tmp"):
+                # a save interrupted before the rename: path is whole
+                os.remove(path + ".tmp")
+            if os.path.exists(path):
+                with open(path, "rb" if serializer.binary else "r") as file:
+                    batch = []
+                    try:
+                        for key, value in serializer.iter_records(file):
+                            if lazy:
+                                self.__load(key, value, lazy)
+                                continue
+                            try:
+                                obj = self.__build(value)
+                            except (KeyError, TypeError, ValueError) as error:
+                                # a bad value, not a damaged file
+                                warnings.warn(
+                                    "{}: record {} skipped ({})".format(
+                                        path, key, error), RuntimeWarning)
+                                continue
+                            batch.append(obj)
+                            if len(batch) == 1000:
+                                self.__register(batch)
+                                batch = []
+                    except ValueError as error:
+                        damaged = error
+                    self.__register(batch)
+            if damaged is not None:
+                os.replace(path, path + ".damaged")
+                warnings.warn("{} is damaged ({}); the records before the "
+                              "damage were kept and the file was moved to "
+                              "{}.damaged".format(path, damaged, path),
+                              RuntimeWarning)
+            FileStorage.__stamp = self.__file_stamp(path)
+            FileStorage.__cache = {}
+            self.__read_journal(
+                lambda key, value: self.__load(key, value, lazy))
+            FileStorage.__changes = {}
+            if damaged is not None:
+                self.compact()
+
+    def __build(self, value):
+        """
+        Rebuilds a model instance from its dictionary representation,
+        without registering it.
+        """
+        cls = classes[value["__class__"]]
+        obj = cls.__new__(cls)
+        obj._load(value)
+        return obj
+
+    def filter_places(self, **criteria):
+        """
+        Returns the places matching criteria, scanning the columns of
+        their numeric attributes. See PlaceColumns.filter() for the
+        criteria: price_min, price_max, min_guests, min_rooms,
+        min_bathrooms and bbox.
+        """
+        return self.__query("Place", "columns", "filter", **criteria)
+
+    def nearest(self, latitude, longitude, k=1):
+        """
+        Returns the k places nearest to (latitude, longitude),
+        nearest first.
+        """
+        return self.__query("Place", "geo", "nearest", latitude, longitude, k)
+
+    def within_radius(self, latitude, longitude, km):
+        """
+        Returns the places at most km away from (latitude, longitude),
+        nearest first.
+        """
+        return self.__query("Place", "geo", "within_radius",
+                            latitude, longitude, km)
+
+    def within_bbox(self, south, west, north, east):
+        """
+        Returns the places inside the (south, west, north, east) box.
+        """
+        return self.__query("Place", "geo", "within_bbox",
+                            south, west, north, east)
+
+    def __view(self, cls_name, name):
+        """
+        Returns the view name of class cls_name, up to date.
+        """
+        self.__hydrate(cls_name)
+        self.__class_bucket(cls_name)
+        return FileStorage.__views[cls_name][name]
+
+    def __query(self, cls_name, name, method, *args, **kwargs):
+        """
+        Returns the result of the query method of the view name of
+        class cls_name. Views are not thread-safe, so queries hold
+        __mutex.
+        """
+        with FileStorage.__mutex:
+            return getattr(self.__view(cls_name, name), method)(
+                *args, **kwargs)
+
+    def __load(self, key, value, lazy):
+        """
+        Replaces the record stored under key by value, as an instance
+        or as a raw record if lazy. A value of None deletes the record.
+        """
+        name = key.partition(".")[0]
+        FileStorage.__raw.get(name, {}).pop(key, None)
+        if value is not None and not lazy:
+            self.__register((self.__build(value),))
+            return
+        obj = FileStorage.__objects.pop(key, None)
+        if obj is not None:
+            self.__unindex(key, obj)
+        if value is not None:
+            FileStorage.__raw.setdefault(name, {})[key] = value
+
+    def __hydrate(self, cls=None):
+        """
+        Builds the instances of the raw records of cls,
+        or of every class if cls is None.
+        """
+        if not FileStorage.__raw:
+            return
+        with FileStorage.__mutex:
+            if cls is None:
+                names = list(FileStorage.__raw)
+            else:
+                names = [cls if isinstance(cls, str) else cls.__name__]
+            for name in names:
+                for key, value in FileStorage.__raw.pop(name, {}).items():
+                    self.__hydrate_one(key, value)
+
+    def __register(self, objs):
+        """
+        Sets in __objects every obj of objs as changed, without keeping
+        anything for a transaction. The caller holds __mutex.
+        """
+        objects = FileStorage.__objects
+        changes = FileStorage.__changes
+        raw = FileStorage.__raw
+        for obj in objs:
+            name = obj.__class__.__name__
+            key = name + "." + obj.id
+            objects[key] = obj
+            changes[key] = obj
+            if raw:
+                raw.get(name, {}).pop(key, None)
+            self.__index(key, obj)
+
+    def __hydrate_one(self, key, value):
+        """
+        Builds and registers the instance of one raw record.
+        The instance is clean since it matches the file; inside a
+        transaction, its state is kept as begin() keeps it if it holds
+        lists or dicts.
+        """
+        obj = self.__build(value)
         FileStorage.__objects[key] = obj
+        self.__index(key, obj)
+        undo = FileStorage.__undo
+        if undo is not None and key in FileStorage.__mutable:
+            undo.setdefault(key, (obj, self.__state(obj)))
+        return obj
+
+    def __class_bucket(self, cls):
+        """
+        Returns the {key: obj} index entry of cls, rebuilding the index
+        first if __objects was replaced behind its back.
+        """
+        if FileStorage.__indexed is not FileStorage.__objects:
+            with FileStorage.__mutex:
+                if FileStorage.__indexed is not FileStorage.__objects:
+                    self.__reindex()
+        by_class = FileStorage.__by_class
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        return by_class.get(cls, {})
+
+    def __reindex(self):
+        """
+        Rebuilds the class name and attribute indexes from __objects.
+        """
+        FileStorage.__by_class = {}
+        FileStorage.__by_attr = {}
+        FileStorage.__indexed_values = {}
+        FileStorage.__mutable = set()
+        FileStorage.__indexed = FileStorage.__objects
+        FileStorage.__views = {
+            cls_name: {name: view() for name, view in views.items()}
+            for cls_name, views in FileStorage.__view_types.items()}
+        for key, obj in FileStorage.__objects.items():
+            self.__index(key, obj)
+
+    def __index(self, key, obj):
+        """
+        Adds obj to the class name index and to the index of each of
+        its _indexes attributes, dropping the values it had before.
+        """
+        name = obj.__class__.__name__
+        FileStorage.__by_class.setdefault(name, {})[key] = obj
+        for view in FileStorage.__views.get(name, {}).values():
+            view.add(key, obj)
+        for value in obj.__dict__.values():
+            if type(value) in (list, dict):
+                FileStorage.__mutable.add(key)
+                break
+        if not obj._indexes:
+            return
+        old = FileStorage.__indexed_values.get(key, {})
+        new = {}
+        for attr in obj._indexes:
+            value = getattr(obj, attr, None)
+            index = FileStorage.__by_attr.setdefault((name, attr), {})
+            if attr in old and old[attr] != value:
+                index.get(old[attr], {}).pop(key, None)
+            try:
+                index.setdefault(value, {})[key] = obj
+            except TypeError:
+                # unhashable value: left to the scan of find()
+                continue
+            new[attr] = value
+        FileStorage.__indexed_values[key] = new
+
+    def __unindex(self, key, obj):
+        """
+        Removes obj from the class name and attribute indexes.
+        """
+        name = obj.__class__.__name__
+        FileStorage.__by_class.get(name, {}).pop(key, None)
+        FileStorage.__mutable.discard(key)
+        for view in FileStorage.__views.get(name, {}).values():
+            view.remove(key)
+        old = FileStorage.__indexed_values.pop(key, {})
+        for attr, value in old.items():
+            FileStorage.__by_attr.get((name, attr), {}).get(
+                value, {}).pop(key, None)
+
+    def __flush_loop(self):
+        """
+        Body of the background thread of write-behind mode.
+        """
+        while FileStorage.__write_behind:
+            FileStorage.__wake.wait(FileStorage.__flush_interval)
+            FileStorage.__wake.clear()
+            if (not FileStorage.__write_behind or
+                    not FileStorage.__changes or
+                    self._transaction_owner() is not None):
+                continue
+            try:
+                self.flush()
+            except Exception as error:
+                # the changes stay dirty for the next attempt
+                warnings.warn("write-behind save failed: {}".format(error),
+                              RuntimeWarning)
+
+    def _begin(self):
+        """
+        Keeps the state of every instance holding lists or dicts.
+        """
+        with FileStorage.__mutex:
+            objects = FileStorage.__objects
+            undo = {}
+            for key in FileStorage.__mutable:
+                obj = objects.get(key)
+                if obj is not None:
+                    undo[key] = (obj, self.__state(obj))
+            FileStorage.__undo = undo
+
+    def _commit(self):
+        """
+        Drops the states kept for rollback().
+        """
+        with FileStorage.__mutex:
+            FileStorage.__undo = None
+
+    def _rollback(self, others):
+        """
+        Brings back the instances the thread created, changed or
+        deleted since begin() to their state before. The changes of
+        other threads dropped what was kept already.
+        """
+        with FileStorage.__mutex:
+            self.__undo_changes(FileStorage.__undo)
+            FileStorage.__undo = None
+
+    def _save_now(self):
+        """
+        Serializes __objects to the JSON file (path: __file_path), or
+        leaves that to the background thread in write-behind mode.
+        """
+        if not FileStorage.__write_behind:
+            self.flush()
+        elif len(FileStorage.__changes) >= FileStorage.__flush_threshold:
+            FileStorage.__wake.set()
+
+    @staticmethod
+    @atexit.register
+    def __flush_at_exit():
+        """
+        Writes the pending changes of write-behind mode on exit,
+        unless a transaction is open.
+        """
+        storage = FileStorage()
+        if (FileStorage.__write_behind and FileStorage.__changes and
+                storage._transaction_owner() is None):
+            storage.flush()
+
+    def __restore(self, changes):
+        """
+        Marks changes as unsaved again after a failed save, unless the
+        instances changed once more since.
+        """
+        with FileStorage.__mutex:
+            for key, obj in changes.items():
+                FileStorage.__changes.setdefault(key, obj)
+
+    @staticmethod
+    def __state(obj):
+        """
+        Returns a copy of the attributes of obj, deep for lists and
+        dicts since those can be changed in place.
+        """
+        state = obj.__dict__.copy()
+        for name, value in state.items():
+            if type(value) in (list, dict):
+                state[name] = copy.deepcopy(value)
+        return state
+
+    def __keep(self, key, name=None, old=_missing):
+        """
+        Keeps in __undo what key holds before the first change the
+        thread of the transaction makes to it: (obj, state) for an
+        instance, (None, record) for a raw record or (None, None). For
+        touch(), the change of attribute name from old is already made.
+        A change from another thread drops what was kept instead, so
+        rollback() leaves it.
+        """
+        undo = FileStorage.__undo
+        if threading.get_ident() != self._transaction_owner():
+            undo.pop(key, None)
+            return
+        if key in undo:
+            return
+        obj = FileStorage.__objects.get(key)
+        if obj is None:
+            undo[key] = (None, FileStorage.__raw.get(
+                key.partition(".")[0], {}).get(key))
+            return
+        state = self.__state(obj)
+        if name is not None:
+            if old is _missing:
+                state.pop(name, None)
+            elif type(old) in (list, dict):
+                state[name] = copy.deepcopy(old)
+            else:
+                state[name] = old
+        undo[key] = (obj, state)
+
+    def __undo_changes(self, undo):
+        """
+        Brings back every key of undo to what __keep() kept.
+        """
+        objects = FileStorage.__objects
+        for key, (obj, state) in undo.items():
+            current = objects.get(key)
+            if obj is not None and current is obj and obj.__dict__ == state:
+                continue
+            if current is not None and current is not obj:
+                del objects[key]
+                FileStorage.__cache.pop(key, None)
+                self.__unindex(key, current)
+            if obj is not None:
+                obj.__dict__.clear()
+                obj.__dict__.update(state)
+                objects[key] = obj
+                FileStorage.__changes[key] = obj
+                self.__index(key, obj)
+            elif state is not None:
+                # a raw record, still as in the file
+                name = key.partition(".")[0]
+                FileStorage.__raw.setdefault(name, {})[key] = state
+                FileStorage.__changes.pop(key, None)
+            elif current is not None:
+                FileStorage.__changes[key] = None
+
+    def __fragments(self, objects, raw, changes):
+        """
+        Yields the encoded records of the snapshot of the (key, obj)
+        objects and (key, value) raw records, reusing the cached
+        encoding of the instances that are not in changes.
+        """
+        cache = FileStorage.__cache
+        for key, obj in objects:
+            cached = cache.get(key)
+            if key in changes or cached is None or cached[0] is not obj:
+                yield self.__encode(key, obj)
+            else:
+                yield cached[1]
+        for key, value in raw:
+            yield FileStorage.__serializer.encode(key, value)
+
+    def __encode(self, key, obj):
+        """
+        Returns the encoded record of obj and caches it for the next
+        save. Instances holding lists or dicts are not cached since
+        those can be changed in place without going through touch().
+        """
+        obj_dict = obj.to_dict()
+        fragment = FileStorage.__serializer.encode(key, obj_dict)
+        if any(type(value) in (list, dict) for value in obj_dict.values()):
+            FileStorage.__cache.pop(key, None)
+        else:
+            FileStorage.__cache[key] = (obj, fragment)
+        return fragment
+
+    def __journal_path(self):
+        """
+        Returns the path of the journal kept next to __file_path.
+        """
+        return FileStorage.__file_path + ".journal"
+
+    def __read_journal(self, apply, offset=0):
+        """
+        Calls apply(key, value) for each entry of the journal from byte
+        offset on, and records where the last complete entry ends.
+        """
+        if offset == 0:
+            FileStorage.__journal_size = 0
+        try:
+            file = open(self.__journal_path(), "rb")
+        except FileNotFoundError:
+            FileStorage.__journal_offset = 0
+            FileStorage.__journal_inode = None
+            return
+        with file:
+            file.seek(offset)
+            for line in file:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("Unterminated entry")
+                    entry = json.loads(line)
+                except ValueError:
+                    # a torn last line from an interrupted append, cut
+                    # off by the next append
+                    break
+                offset += len(line)
+                if "changes" in entry:
+                    records = entry["changes"].items()
+                else:
+                    records = [(entry["key"], entry["value"])]
+                for key, value in records:
+                    FileStorage.__journal_size += 1
+                    apply(key, value)
+            FileStorage.__journal_inode = os.fstat(file.fileno()).st_ino
+        FileStorage.__journal_offset = offset
+
+    def __append_journal(self, changes):
+        """
+        Appends the changed and deleted records to the journal, in one
+        line so that a torn append loses the whole save: {"key": key,
+        "value": record} for one record, {"changes": {key: record}}
+        for more.
+        """
+        if not changes:
+            return
+        records = {key: obj.to_dict() if obj is not None else None
+                   for key, obj in changes.items()}
+        if len(records) == 1:
+            (key, value), = records.items()
+            entry = {"key": key, "value": value}
+        else:
+            entry = {"changes": records}
+        data = (json.dumps(entry) + "\n").encode("utf-8")
+        path = self.__journal_path()
+        with open(path, "r+b" if os.path.exists(path) else "wb") as file:
+            file.seek(FileStorage.__journal_offset)
+            file.truncate()
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+            FileStorage.__journal_inode = os.fstat(file.fileno()).st_ino
+        FileStorage.__journal_offset += len(data)
+        FileStorage.__journal_size += len(records)
+
+    def __merge_file(self):
+        """
+        Merges the whole snapshot and journal other processes saved,
+        dropping the instances they deleted.
+        """
+        local = FileStorage.__changes
+        FileStorage.__changes = {}
+        serializer = FileStorage.__serializer
+        path = FileStorage.__file_path
+        seen = set()
+        if os.path.exists(path):
+            with open(path, "rb" if serializer.binary else "r") as file:
+                for key, value in serializer.iter_records(file):
+                    seen.add(key)
+                    self.__merge(key, value, local)
+        FileStorage.__stamp = self.__file_stamp(path)
+
+        def merge(key, value):
+            if value is None:
+                seen.discard(key)
+            else:
+                seen.add(key)
+            self.__merge(key, value, local)
+        self.__read_journal(merge)
+        stored = list(FileStorage.__objects)
+        for records in FileStorage.__raw.values():
+            stored.extend(records)
+        for key in stored:
+            if key not in seen and key not in local:
+                self.__load(key, None, False)
+        FileStorage.__changes = local
+
+    def __merge(self, key, value, local):
+        """
+        Replaces the record stored under key by the value another
+        process saved, unless this process changed it since its last
+        save (it is in local). An instance already built is updated in
+        place, so the references to it stay attached.
+        """
+        if key in local:
+            return
+        obj = FileStorage.__objects.get(key)
+        if obj is None or value is None:
+            self.__load(key, value, obj is None)
+            return
+        if obj.to_dict() == value:
+            return
+        merged = self.__build(value)
+        self.__unindex(key, obj)
+        obj.__dict__.clear()
+        obj.__dict__.update(merged.__dict__)
+        FileStorage.__cache.pop(key, None)
+        self.__index(key, obj)
+
+    @staticmethod
+    def __file_stamp(path):
+        """
+        Returns the (inode, mtime, size) of path, or None if there is
+        no such file.
+        """
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
 
-    def save(self):
+    def __locked(self):
         """
-        Serializes __objects to the JSON file (path: __file_path).
+        Returns the lock other processes using __file_path take too.
         """
-        obj_dict = {
-                key: obj.to_dict()
-                for key, obj in FileStorage.__objects.items()}
-        with open(FileStorage.__file_path, "w") as file:
-            json.dump(obj_dict, file)
+        if FileStorage.__lock is None:
+            FileStorage.__lock = FileLock(FileStorage.__file_path + ".lock")
+        return FileStorage.__lock
 
-    def reload(self):
+    def __sync_dir(self):
         """
-        Deserializes the JSON file to __objects (if the file exists).
+        Flushes the directory of __file_path to disk so a rename into
+        it survives a crash. Not every platform can open a directory.
         """
-        if os.path.exists(FileStorage.__file_path):
-            with open(FileStorage.__file_path, "r") as file:
-                obj_dict = json.load(file)
-                for key, value in obj_dict.items():
-                    cls_name = value["__class__"]
-                    cls = eval(cls_name)
-                    obj = cls(**value)
-                    FileStorage.__objects[key] = obj
+        try:
+            fd = os.open(os.path.dirname(FileStorage.__file_path) or ".",
+                         os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
@@ -0,0 +1,175 @@
+#!/usr/bin/python3
+
+"""class GeoGrid
+    grid index over the latitude and longitude of Place instances"""
+import heapq
+from math import asin, cos, floor, isfinite, radians, sin, sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.195
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """
+    Returns the great-circle distance between two points in km.
+    """
+    lat1, lon1, lat2, lon2 = map(radians, (lat1, lon1, lat2, lon2))
+    h = (sin((lat2 - lat1) / 2) ** 2 +
+         cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * asin(min(1.0, sqrt(h)))
+
+
+class GeoGrid:
+    """
+    Buckets every Place by the cell of a fixed grid of cell_size degrees
+    its latitude and longitude fall in, so a spatial query only visits
+    the cells around the searched area. Places without numeric
+    coordinates are left out. Longitudes do not wrap around +-180.
+    """
+
+    def __init__(self, cell_size=0.01):
+        """
+        Initializes an empty grid of cell_size degrees per cell
+        (0.01 degree is about 1.1 km of latitude).
+        """
+        self.cell_size = cell_size
+        self.cells = {}
+        self.points = {}
+
+    def __len__(self):
+        """
+        Returns the number of places held.
+        """
+        return len(self.points)
+
+    def add(self, key, obj):
+        """
+        Adds obj under key, or moves it if key is already held.
+        """
+        self.remove(key)
+        try:
+            lat = float(getattr(obj, "latitude", None))
+            lon = float(getattr(obj, "longitude", None))
+        except (TypeError, ValueError):
+            return
+        if not (isfinite(lat) and isfinite(lon)):
+            return
+        cell = self.__cell(lat, lon)
+        self.points[key] = (cell, lat, lon, obj)
+        self.cells.setdefault(cell, {})[key] = (lat, lon, obj)
+
+    def update(self, key, obj, name):
+        """
+        Moves the place held under key if its coordinates changed.
+        """
+        if name in ("latitude", "longitude"):
+            self.add(key, obj)
+
+    def remove(self, key):
+        """
+        Drops the place held under key.
+        """
+        point = self.points.pop(key, None)
+        if point is not None:
+            cell = self.cells[point[0]]
+            del cell[key]
+            if not cell:
+                del self.cells[point[0]]
+
+    def within_bbox(self, south, west, north, east):
+        """
+        Returns the places inside the (south, west, north, east) box.
+        """
+        return [obj for lat, lon, obj in self.__box(south, west, north, east)
+                if south <= lat <= north and west <= lon <= east]
+
+    def within_radius(self, lat, lon, km):
+        """
+        Returns the places at most km away from (lat, lon),
+        nearest first.
+        """
+        dlat = km / KM_PER_DEGREE
+        dlon = km / (KM_PER_DEGREE * max(cos(radians(min(
+            89.9, abs(lat) + dlat))), 1e-6))
+        found = []
+        for plat, plon, obj in self.__box(lat - dlat, lon - dlon,
+                                          lat + dlat, lon + dlon):
+            distance = distance_km(lat, lon, plat, plon)
+            if distance <= km:
+                found.append((distance, obj))
+        found.sort(key=lambda item: item[0])
+        return [obj for distance, obj in found]
+
+    def nearest(self, lat, lon, k=1):
+        """
+        Returns the k places nearest to (lat, lon), nearest first.
+        Rings of cells are searched outwards from the cell of (lat, lon)
+        until no unvisited cell can hold a nearer place.
+        """
+        if k <= 0:
+            return []
+        row, col = self.__cell(lat, lon)
+        best = []
+        seen = 0
+        ring = 0
+        while seen < len(self.points):
+            if (2 * ring + 1) ** 2 > len(self.cells):
+                # the rings up to this one cover more cells than are
+                # used: a visit of every place costs less
+                found = heapq.nsmallest(k, (
+                    (distance_km(lat, lon, plat, plon), id(obj), obj)
+                    for cell, plat, plon, obj in self.points.values()))
+                return [obj for distance, i, obj in found]
+            for cell in self.__ring(row, col, ring):
+                for plat, plon, obj in self.cells.get(cell, {}).values():
+                    seen += 1
+                    item = (-distance_km(lat, lon, plat, plon), id(obj), obj)
+                    if len(best) < k:
+                        heapq.heappush(best, item)
+                    elif item > best[0]:
+                        heapq.heapreplace(best, item)
+            # any place outside the rings searched so far is at least
+            # ring cells away, measured where the cells are narrowest
+            narrowest = self.cell_size * KM_PER_DEGREE * cos(radians(min(
+                89.9, abs(lat) + (ring + 1) * self.cell_size)))
+            if len(best) == k and -best[0][0] <= ring * narrowest:
+                break
+            ring += 1
+        return [obj for distance, i, obj in sorted(best, reverse=True)]
+
+    def __cell(self, lat, lon):
+        """
+        Returns the (row, column) of the cell holding (lat, lon).
+        """
+        return (floor(lat / self.cell_size), floor(lon / self.cell_size))
+
+    def __box(self, south, west, north, east):
+        """
+        Yields the (lat, lon, obj) of the cells overlapping the box,
+        or of every place if the box spans more cells than are used.
+        """
+        row1, col1 = self.__cell(south, west)
+        row2, col2 = self.__cell(north, east)
+        if (row2 - row1 + 1) * (col2 - col1 + 1) > len(self.cells):
+            for cell in self.cells.values():
+                yield from cell.values()
+            return
+        for row in range(row1, row2 + 1):
+            for col in range(col1, col2 + 1):
+                cell = self.cells.get((row, col))
+                if cell:
+                    yield from cell.values()
+
+    def __ring(self, row, col, ring):
+        """
+        Yields the cells at Chebyshev distance ring from (row, col).
+        """
+        if ring == 0:
+            yield (row, col)
+            return
+        for c in range(col - ring, col + ring + 1):
+            yield (row - ring, c)
+            yield (row + ring, c)
+        for r in range(row - ring + 1, row + ring):
+            yield (r, col - ring)
+            yield (r, col + ring)
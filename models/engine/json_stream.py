@@ -0,0 +1,113 @@
+#!/usr/bin/python3
+
+"""Incremental reader for the JSON object written by FileStorage
+    yields one top-level (key, value) pair at a time"""
+import json
+
+CHUNK_SIZE = 1 << 16
+
+_decoder = json.JSONDecoder()
+_DELIMITERS = (",", "}", "]", " ", "\t", "\n", "\r")
+
+
+class _Buffer:
+    """
+    Holds the unread part of the file and refills it on demand.
+    """
+
+    def __init__(self, file, chunk_size):
+        """
+        Initializes the buffer over an opened text file.
+        """
+        self.file = file
+        self.chunk_size = chunk_size
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, size=None):
+        """
+        Drops the consumed text and reads one more chunk.
+        Returns False once the file is exhausted.
+        """
+        if self.eof:
+            return False
+        chunk = self.file.read(size or self.chunk_size)
+        self.text = self.text[self.pos:] + chunk
+        self.pos = 0
+        if not chunk:
+            self.eof = True
+        return bool(chunk)
+
+    def next_char(self):
+        """
+        Skips whitespace and returns the next character ("" at EOF)
+        without consuming it.
+        """
+        while True:
+            while (self.pos < len(self.text) and
+                   self.text[self.pos] in " \t\n\r"):
+                self.pos += 1
+            if self.pos < len(self.text) or not self.fill():
+                return self.text[self.pos:self.pos + 1]
+
+    def expect(self, char):
+        """
+        Consumes char or raises ValueError.
+        """
+        if self.next_char() != char:
+            raise ValueError("Expecting '{}' at offset {}".format(
+                char, self.pos))
+        self.pos += 1
+
+    def decode(self):
+        """
+        Decodes the next JSON value, reading more of the file while the
+        value is cut by the end of the buffer.
+        """
+        self.next_char()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                # read twice as much each time so a record spanning
+                # many chunks is not re-parsed once per chunk
+                if not self.fill(size):
+                    raise
+                size *= 2
+                continue
+            if (type(value) in (int, float) and not self.eof and
+                    self.text[end:end + 1] not in _DELIMITERS):
+                # a number cut by the chunk boundary, such as "1." of
+                # "1.25", only ends at the next delimiter
+                if self.fill(size):
+                    continue
+            self.pos = end
+            return value
+
+
+def iter_items(file, chunk_size=CHUNK_SIZE):
+    """
+    Yields the (key, value) pairs of the JSON object stored in file
+    one at a time, so only one record is decoded in memory at once.
+    Raises ValueError if the file is not a complete JSON object.
+    """
+    buf = _Buffer(file, chunk_size)
+    if buf.next_char() == "":
+        return
+    buf.expect("{")
+    if buf.next_char() == "}":
+        buf.pos += 1
+        return
+    while True:
+        key = buf.decode()
+        if not isinstance(key, str):
+            raise ValueError("Expecting property name at offset {}".format(
+                buf.pos))
+        buf.expect(":")
+        yield key, buf.decode()
+        char = buf.next_char()
+        buf.expect("," if char == "," else "}")
+        if char != ",":
+            return
@@ -0,0 +1,155 @@
+#!/usr/bin/python3
+
+"""class PlaceColumns
+    column store of the numeric attributes of Place instances"""
+from array import array
+from bisect import bisect_left, bisect_right
+
+
+class PlaceColumns:
+    """
+    Keeps number_rooms, number_bathrooms, max_guest, price_by_night,
+    latitude and longitude of every stored Place in one typed array
+    per attribute. Each Place owns one slot, the same index in every
+    column, and slots of removed places are reused. Values that are not
+    numbers (the console stores what it is given) are kept as NaN and
+    never match a filter.
+
+    Next to each column is a sorted copy of its values with the slot of
+    each value, so a range criterion is answered with two binary
+    searches. Slots changed since the last sort are kept in __pending
+    and checked one by one; the sorted copies are rebuilt once too many
+    slots are pending. A filter starts from the most selective range
+    and checks the other criteria on those candidates only.
+    """
+
+    fields = ("number_rooms", "number_bathrooms", "max_guest",
+              "price_by_night", "latitude", "longitude")
+
+    def __init__(self):
+        """
+        Initializes empty columns.
+        """
+        self.columns = {name: array("d") for name in self.fields}
+        self.objs = []
+        self.slots = {}
+        self.free = []
+        self.__sorted = {}
+        self.__pending = set()
+
+    def __len__(self):
+        """
+        Returns the number of places held.
+        """
+        return len(self.slots)
+
+    def add(self, key, obj):
+        """
+        Adds obj under key, or refreshes it if key is already held.
+        """
+        slot = self.slots.get(key)
+        if slot is None:
+            if self.free:
+                slot = self.free.pop()
+            else:
+                slot = len(self.objs)
+                self.objs.append(None)
+                for column in self.columns.values():
+                    column.append(0.0)
+            self.slots[key] = slot
+        self.objs[slot] = obj
+        for name, column in self.columns.items():
+            column[slot] = self.__number(getattr(obj, name, None))
+        self.__pending.add(slot)
+
+    def update(self, key, obj, name):
+        """
+        Refreshes attribute name of the place held under key.
+        """
+        slot = self.slots.get(key)
+        if slot is not None and name in self.columns:
+            self.columns[name][slot] = self.__number(getattr(obj, name, None))
+            self.__pending.add(slot)
+
+    def remove(self, key):
+        """
+        Drops the place held under key and frees its slot.
+        """
+        slot = self.slots.pop(key, None)
+        if slot is not None:
+            self.objs[slot] = None
+            for column in self.columns.values():
+                column[slot] = float("nan")
+            self.free.append(slot)
+
+    def filter(self, price_min=None, price_max=None, min_guests=None,
+               min_rooms=None, min_bathrooms=None, bbox=None):
+        """
+        Returns the places matching every given criterion:
+        price_by_night between price_min and price_max, at least
+        min_guests max_guest, min_rooms number_rooms and min_bathrooms
+        number_bathrooms, and inside bbox, a (south, west, north, east)
+        tuple of latitudes and longitudes.
+        """
+        ranges = []
+        if price_min is not None or price_max is not None:
+            ranges.append(("price_by_night", price_min, price_max))
+        if min_guests is not None:
+            ranges.append(("max_guest", min_guests, None))
+        if min_rooms is not None:
+            ranges.append(("number_rooms", min_rooms, None))
+        if min_bathrooms is not None:
+            ranges.append(("number_bathrooms", min_bathrooms, None))
+        if bbox is not None:
+            south, west, north, east = bbox
+            ranges.append(("latitude", south, north))
+            ranges.append(("longitude", west, east))
+        if not ranges:
+            return [obj for obj in self.objs if obj is not None]
+        ranges = [(self.columns[name], name,
+                   float("-inf") if low is None else low,
+                   float("inf") if high is None else high)
+                  for name, low, high in ranges]
+        self.__sort()
+        best = None
+        for column, name, low, high in ranges:
+            values, slots = self.__sorted[name]
+            start = bisect_left(values, low)
+            end = bisect_right(values, high)
+            if best is None or end - start < len(best):
+                best = slots[start:end]
+        candidates = best
+        if self.__pending:
+            candidates = set(best)
+            candidates.update(self.__pending)
+        for column, name, low, high in ranges:
+            candidates = [slot for slot in candidates
+                          if low <= column[slot] <= high]
+        objs = self.objs
+        return [objs[slot] for slot in candidates]
+
+    def __sort(self):
+        """
+        Rebuilds the sorted copies of the columns if too many slots
+        changed since they were last built.
+        """
+        if self.__sorted and len(self.__pending) <= 1024 + len(self) // 32:
+            return
+        for name, column in self.columns.items():
+            # NaN does not compare, so freed and non-numeric slots
+            # are left out of the sorted copy
+            order = sorted((slot for slot, value in enumerate(column)
+                            if value == value), key=column.__getitem__)
+            self.__sorted[name] = (array("d", map(column.__getitem__, order)),
+                                   array("q", order))
+        self.__pending = set()
+
+    @staticmethod
+    def __number(value):
+        """
+        Returns value as a float, or NaN if it is not a number.
+        """
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return float("nan")
@@ -0,0 +1,457 @@
+#!/usr/bin/python3
+
+"""class RecordStorage
+    storage engine reading one record at a time from a memory-mapped
+    data file through an offset index"""
+import json
+import mmap
+import os
+import struct
+import warnings
+from models.base_model import classes
+from models.engine.place_columns import PlaceColumns
+from models.engine.geo_index import GeoGrid
+from models.engine.transactional_storage import TransactionalStorageMixin
+
+HEADER = struct.Struct("<I")
+
+
+class RecordStorage(TransactionalStorageMixin):
+    """
+    This class stores every instance as one record of a data file and
+    keeps a "<class name>.<id>" -> (offset, length) index of the file,
+    so an instance is only read and built when it is asked for.
+
+    A record is a length then the JSON of [key, to_dict()], or of
+    [key, null] for a deleted instance. save() writes each changed
+    instance over its record when the new encoding fits in it (padded
+    with spaces) and appends it otherwise; the file is rewritten once
+    more than half of it is taken by replaced records.
+
+    The index is written next to the data file as JSON lines: the
+    first holds every offset, and each save appends one holding the
+    offsets it changed (null for a deleted record), along with the
+    size of the data file covered. compact() rewrites both files.
+    reload() applies the complete lines and scans whatever was appended
+    to the data file after the last size, or the whole data file if
+    there is no index, so an interrupted save loses at most its torn
+    last appended record. Records written over are not synced either:
+    one an interrupted save left torn is read as missing, with a
+    warning.
+
+    Only the instances read or created since reload() are held in
+    __objects; all() and the Place queries read every record they need.
+
+    Saves are deferred and transactions kept as TransactionalStorageMixin
+    describes: begin() first saves the earlier changes, and rollback()
+    drops the instances the thread changed since, so that they are read
+    again from the file.
+    """
+
+    __file_path = "file.records"
+    __objects = {}
+    __offsets = {}
+    __changes = {}
+    __mutable = set()
+    __map = None
+    __size = 0
+    __garbage = 0
+    __unindexed = set()
+    __index_end = None
+
+    def __init__(self):
+        """
+        Initializes the RecordStorage instance.
+        The index is not read here: models/__init__.py calls reload()
+        once per process.
+        """
+        pass
+
+    def all(self, cls=None):
+        """
+        Returns a dictionary of every stored instance, or of the
+        instances of cls (a class or a class name) only.
+        """
+        if cls is None:
+            prefix = ""
+        else:
+            prefix = (cls if isinstance(cls, str) else cls.__name__) + "."
+        objects = RecordStorage.__objects
+        for key in list(RecordStorage.__offsets):
+            # the instances held already may have been handed out
+            if (key.startswith(prefix) and key not in objects and
+                    key not in RecordStorage.__changes):
+                self.__read(key)
+        return {key: obj for key, obj in objects.items()
+                if key.startswith(prefix)}
+
+    def get(self, cls, id):
+        """
+        Returns the instance of cls (a class or a class name) with id,
+        or None if there is none.
+        """
+        name = cls if isinstance(cls, str) else cls.__name__
+        key = "{}.{}".format(name, id)
+        obj = RecordStorage.__objects.get(key)
+        if (obj is None and key in RecordStorage.__offsets and
+                key not in RecordStorage.__changes):
+            obj = self.__read(key)
+        return obj
+
+    def count(self, cls=None):
+        """
+        Returns the number of stored instances, of cls only if given,
+        without reading any record.
+        """
+        prefix = ""
+        if cls is not None:
+            prefix = (cls if isinstance(cls, str) else cls.__name__) + "."
+        offsets = RecordStorage.__offsets
+        total = sum(1 for key in offsets if key.startswith(prefix))
+        for key, obj in RecordStorage.__changes.items():
+            if key.startswith(prefix):
+                total += (obj is not None) - (key in offsets)
+        return total
+
+    def new_many(self, objs):
+        """
+        Sets in __objects every obj of objs, like new() does for one.
+        """
+        for obj in objs:
+            key = obj.__class__.__name__ + "." + obj.id
+            RecordStorage.__objects[key] = obj
+            RecordStorage.__changes[key] = obj
+            self._note(key)
+
+    def delete(self, obj=None):
+        """
+        Deletes obj from the storage if it's inside.
+        """
+        if obj is None:
+            return
+        key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        if RecordStorage.__objects.pop(key, None) is not None:
+            RecordStorage.__changes[key] = None
+            RecordStorage.__mutable.discard(key)
+            self._note(key)
+
+    def touch(self, obj, name=None, old=None):
+        """
+        Marks a stored obj as changed since the last save. The value
+        old attribute name had is not needed here.
+        """
+        key = "{}.{}".format(obj.__class__.__name__,
+                             getattr(obj, "id", None))
+        if RecordStorage.__objects.get(key) is obj:
+            RecordStorage.__changes[key] = obj
+            self._note(key)
+
+    def set_path(self, path):
+        """
+        Sets the data file to path; the index is kept in path + ".idx".
+        """
+        RecordStorage.__file_path = path
+
+    def compact(self):
+        """
+        Rewrites the data file with the live records only.
+        """
+        with self._saving():
+            self.__compact()
+
+    def reload(self, *, lazy=True):
+        """
+        Reads the index of the data file (if the file exists) and maps
+        the file. No record is read: the instances are built on first
+        access whatever lazy is.
+        """
+        RecordStorage.__objects = {}
+        RecordStorage.__changes = {}
+        RecordStorage.__mutable = set()
+        RecordStorage.__offsets = {}
+        RecordStorage.__size = 0
+        RecordStorage.__garbage = 0
+        RecordStorage.__unindexed = set()
+        RecordStorage.__index_end = None
+        self.__unmap()
+        path = RecordStorage.__file_path
+        if not os.path.exists(path):
+            return
+        try:
+            offsets, start, garbage, end = self.__read_index()
+        except (OSError, ValueError, KeyError, TypeError):
+            offsets, start, garbage, end = {}, 0, 0, None
+        if start > os.path.getsize(path):
+            # the index is newer than the data file: rebuild it
+            offsets, start, garbage, end = {}, 0, 0, None
+        RecordStorage.__offsets = offsets
+        RecordStorage.__garbage = garbage
+        RecordStorage.__index_end = end
+        RecordStorage.__size = self.__scan(start)
+        self.__remap()
+
+    def filter_places(self, **criteria):
+        """
+        Returns the places matching criteria, see
+        PlaceColumns.filter() for the criteria.
+        """
+        return self.__places(PlaceColumns).filter(**criteria)
+
+    def nearest(self, latitude, longitude, k=1):
+        """
+        Returns the k places nearest to (latitude, longitude),
+        nearest first.
+        """
+        return self.__places(GeoGrid).nearest(latitude, longitude, k)
+
+    def within_radius(self, latitude, longitude, km):
+        """
+        Returns the places at most km away from (latitude, longitude),
+        nearest first.
+        """
+        return self.__places(GeoGrid).within_radius(latitude, longitude, km)
+
+    def within_bbox(self, south, west, north, east):
+        """
+        Returns the places inside the (south, west, north, east) box.
+        """
+        return self.__places(GeoGrid).within_bbox(south, west, north, east)
+
+    def _begin(self):
+        """
+        Saves the changes made before the transaction.
+        """
+        self._save_now()
+
+    def _rollback(self, others):
+        """
+        Drops the instances changed since begin() but those of others:
+        they are read again from the file.
+        """
+        kept = {key: RecordStorage.__objects.get(key) for key in others}
+        RecordStorage.__objects = {
+            key: obj for key, obj in kept.items() if obj is not None}
+        RecordStorage.__changes = kept
+        RecordStorage.__mutable &= others
+
+    def _save_now(self):
+        """
+        Writes the changed records and the index, whatever the
+        deferred() blocks and transactions open.
+        """
+        if not self.__write_changes():
+            return
+        if RecordStorage.__garbage * 2 > RecordStorage.__size:
+            self.__compact()
+            return
+        self.__write_index()
+        self.__remap()
+
+    def __compact(self):
+        """
+        Rewrites the data file with the live records only, see
+        compact().
+        """
+        self.__write_changes()
+        self.__remap()
+        path = RecordStorage.__file_path
+        offsets = {}
+        end = 0
+        with open(path + ".tmp", "wb") as file:
+            for key, (offset, length) in RecordStorage.__offsets.items():
+                data = RecordStorage.__map[offset:offset + length]
+                file.write(HEADER.pack(len(data)) + data)
+                offsets[key] = (end + HEADER.size, len(data))
+                end += HEADER.size + len(data)
+        self.__unmap()
+        os.replace(path + ".tmp", path)
+        RecordStorage.__offsets = offsets
+        RecordStorage.__size = end
+        RecordStorage.__garbage = 0
+        RecordStorage.__index_end = None
+        self.__write_index()
+        self.__remap()
+
+    def __places(self, view):
+        """
+        Returns a new view of type view holding every stored Place.
+        """
+        places = view()
+        for key, obj in self.all("Place").items():
+            places.add(key, obj)
+        return places
+
+    def __read(self, key):
+        """
+        Builds and registers the instance stored in the record of key,
+        or returns None if the record is unreadable.
+        """
+        offset, length = RecordStorage.__offsets[key]
+        try:
+            stored, value = json.loads(
+                RecordStorage.__map[offset:offset + length])
+        except ValueError as error:
+            warnings.warn("{}: record {} is unreadable ({})".format(
+                RecordStorage.__file_path, key, error), RuntimeWarning)
+            return None
+        cls = classes[value["__class__"]]
+        obj = cls.__new__(cls)
+        obj._load(value)
+        RecordStorage.__objects[key] = obj
+        if any(type(item) in (list, dict) for item in value.values()):
+            RecordStorage.__mutable.add(key)
+        return obj
+
+    def __write_changes(self):
+        """
+        Writes the records of the changed instances over their old
+        records or after the last complete record of the data file.
+        Returns False if there was nothing to write.
+        """
+        changes = RecordStorage.__changes
+        for key in RecordStorage.__mutable:
+            # lists and dicts can be changed in place without touch()
+            changes.setdefault(key, RecordStorage.__objects[key])
+        if not changes:
+            return False
+        offsets = RecordStorage.__offsets
+        path = RecordStorage.__file_path
+        end = RecordStorage.__size
+        with open(path, "r+b" if os.path.exists(path) else "w+b") as file:
+            # drops a torn record left by an interrupted save
+            file.truncate(end)
+            for key, obj in changes.items():
+                old = offsets.get(key)
+                if obj is None and old is None:
+                    continue
+                value = None if obj is None else obj.to_dict()
+                data = json.dumps([key, value]).encode("utf-8")
+                if (value is not None and old is not None and
+                        len(data) <= old[1]):
+                    file.seek(old[0])
+                    file.write(data.ljust(old[1]))
+                    continue
+                file.seek(end)
+                file.write(HEADER.pack(len(data)) + data)
+                if old is not None:
+                    RecordStorage.__garbage += HEADER.size + old[1]
+                if value is None:
+                    RecordStorage.__garbage += HEADER.size + len(data)
+                    del offsets[key]
+                else:
+                    offsets[key] = (end + HEADER.size, len(data))
+                    if any(type(item) in (list, dict)
+                           for item in value.values()):
+                        RecordStorage.__mutable.add(key)
+                RecordStorage.__unindexed.add(key)
+                end += HEADER.size + len(data)
+        RecordStorage.__changes = {}
+        RecordStorage.__size = end
+        return True
+
+    def __scan(self, start):
+        """
+        Applies the records found from offset start to __offsets and
+        returns the offset where the last complete record ends.
+        """
+        offsets = RecordStorage.__offsets
+        with open(RecordStorage.__file_path, "rb") as file:
+            file.seek(start)
+            while True:
+                header = file.read(HEADER.size)
+                if len(header) < HEADER.size:
+                    break
+                length, = HEADER.unpack(header)
+                data = file.read(length)
+                try:
+                    key, value = json.loads(data)
+                except ValueError:
+                    # a torn last record from an interrupted save
+                    break
+                old = offsets.pop(key, None)
+                if old is not None:
+                    RecordStorage.__garbage += HEADER.size + old[1]
+                if value is None:
+                    RecordStorage.__garbage += HEADER.size + length
+                else:
+                    offsets[key] = (start + HEADER.size, length)
+                RecordStorage.__unindexed.add(key)
+                start += HEADER.size + length
+        return start
+
+    def __read_index(self):
+        """
+        Returns the offsets, data file size and garbage of the index
+        file, and where its last complete line ends.
+        """
+        offsets = {}
+        end = 0
+        with open(RecordStorage.__file_path + ".idx", "rb") as file:
+            for line in file:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("Unterminated entry")
+                    entry = json.loads(line)
+                except ValueError:
+                    if not end:
+                        raise
+                    # a torn last line from an interrupted save, cut
+                    # off by the next one
+                    break
+                for key, value in entry["offsets"].items():
+                    if value is None:
+                        offsets.pop(key, None)
+                    else:
+                        offsets[key] = tuple(value)
+                size = entry["size"]
+                garbage = entry["garbage"]
+                end += len(line)
+        if not end:
+            raise ValueError("Empty index")
+        return offsets, size, garbage, end
+
+    def __write_index(self):
+        """
+        Appends the offsets changed since the last write to the index
+        file, or replaces it by the whole of __offsets if it has no
+        usable one.
+        """
+        path = RecordStorage.__file_path + ".idx"
+        offsets = RecordStorage.__offsets
+        entry = {"size": RecordStorage.__size,
+                 "garbage": RecordStorage.__garbage}
+        if RecordStorage.__index_end is None or not os.path.exists(path):
+            entry["offsets"] = offsets
+            data = (json.dumps(entry) + "\n").encode("utf-8")
+            with open(path + ".tmp", "wb") as file:
+                file.write(data)
+            os.replace(path + ".tmp", path)
+            RecordStorage.__index_end = len(data)
+        elif RecordStorage.__unindexed:
+            entry["offsets"] = {key: offsets.get(key)
+                                for key in RecordStorage.__unindexed}
+            data = (json.dumps(entry) + "\n").encode("utf-8")
+            with open(path, "r+b") as file:
+                file.seek(RecordStorage.__index_end)
+                file.truncate()
+                file.write(data)
+            RecordStorage.__index_end += len(data)
+        RecordStorage.__unindexed = set()
+
+    def __remap(self):
+        """
+        Maps the data file in memory, read-only.
+        """
+        self.__unmap()
+        if RecordStorage.__size:
+            with open(RecordStorage.__file_path, "rb") as file:
+                RecordStorage.__map = mmap.mmap(file.fileno(), 0,
+                                                access=mmap.ACCESS_READ)
+
+    def __unmap(self):
+        """
+        Closes the mapping of the data file, if any.
+        """
+        if RecordStorage.__map is not None:
+            RecordStorage.__map.close()
+            RecordStorage.__map = None
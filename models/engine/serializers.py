@@ -0,0 +1,386 @@
+#!/usr/bin/python3
+
+"""Serializers of the FileStorage snapshot
+    JSONSerializer writes the historical file.json format,
+    BinarySerializer a compact struct-packed format"""
+import json
+import struct
+import sys
+from datetime import datetime, timedelta
+from models.engine.json_stream import iter_items
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+CHUNK_SIZE = 1 << 20
+
+
+def _write_chunked(file, pieces, empty):
+    """
+    Writes pieces to file joined into chunks of about CHUNK_SIZE,
+    empty being the empty str or bytes.
+    """
+    chunk = []
+    size = 0
+    for piece in pieces:
+        chunk.append(piece)
+        size += len(piece)
+        if size >= CHUNK_SIZE:
+            file.write(empty.join(chunk))
+            chunk = []
+            size = 0
+    file.write(empty.join(chunk))
+
+
+class JSONSerializer:
+    """
+    One JSON object mapping every "<class name>.<id>" key to the
+    to_dict() of its instance.
+    """
+
+    name = "json"
+    binary = False
+
+    def encode(self, key, record):
+        """
+        Returns the text of one key/record pair of the object.
+        """
+        return "{}: {}".format(json.dumps(key), json.dumps(record))
+
+    def write(self, file, fragments):
+        """
+        Writes the object made of the encoded fragments to file.
+        """
+        _write_chunked(file, self.__pieces(fragments), "")
+
+    @staticmethod
+    def __pieces(fragments):
+        """
+        Yields the text of the object piece by piece.
+        """
+        yield "{"
+        separator = ""
+        for fragment in fragments:
+            yield separator
+            yield fragment
+            separator = ", "
+        yield "}"
+
+    def iter_records(self, file):
+        """
+        Yields the (key, record) pairs stored in file one at a time.
+        """
+        return iter_items(file)
+
+
+class BinarySerializer:
+    """
+    Records of the same shape, the same attribute names holding values
+    of the same kinds, share one precompiled struct. The file is a
+    header then a sequence of length-prefixed entries:
+
+        header  b"HBNB" version:u8
+        entry   length:u32 kind:u8 shape:u32 body
+        shape   kind 0, body: count:u16 (tag:u8 length:u16 name)*count
+        record  kind 1, body: fixed strings
+                kind 2, body: length:u32 key fixed strings
+
+    fixed is the shape's struct: an int64 per int, a double per float,
+    int64 microseconds since the epoch per timestamp in isoformat()
+    form, 16 bytes per UUID string and a length per other string (or
+    JSON text for lists, dicts and big ints); None and booleans are in
+    the tag alone. strings is the utf-8 of those strings put end to
+    end, decoded in one go. Timestamps and UUIDs are only packed when
+    they decode back to the exact same string. Kind 1 records leave
+    out their key, "<__class__>.<id>" as it always is for instances.
+    A shape entry is written before the first record using it.
+    """
+
+    name = "binary"
+    binary = True
+    magic = b"HBNB"
+    version = 2
+
+    SHAPE, RECORD, KEYED = range(3)
+    NONE, TRUE, FALSE, INT, FLOAT, STR, DATETIME, UUID, JSON = range(9)
+    codes = ("", "", "", "q", "d", "I", "q", "16s", "I")
+
+    def __init__(self):
+        """
+        Initializes an empty table of shapes.
+        """
+        self.shape_ids = {}
+        self.shapes = []
+
+    def encode(self, key, record):
+        """
+        Returns the bytes of one length-prefixed record.
+        """
+        tags = []
+        fixed = []
+        strings = []
+        for value in record.values():
+            kind = type(value)
+            if kind is str:
+                packed = self.__pack_special(value)
+                if packed is None:
+                    tags.append(self.STR)
+                    fixed.append(len(value))
+                    strings.append(value)
+                else:
+                    tags.append(packed[0])
+                    fixed.append(packed[1])
+            elif kind is int and -(1 << 63) <= value < (1 << 63):
+                tags.append(self.INT)
+                fixed.append(value)
+            elif kind is float:
+                tags.append(self.FLOAT)
+                fixed.append(value)
+            elif value is None:
+                tags.append(self.NONE)
+            elif value is True:
+                tags.append(self.TRUE)
+            elif value is False:
+                tags.append(self.FALSE)
+            else:
+                text = json.dumps(value)
+                tags.append(self.JSON)
+                fixed.append(len(text))
+                strings.append(text)
+        shape = (tuple(record), tuple(tags))
+        shape_id = self.shape_ids.get(shape)
+        if shape_id is None:
+            shape_id = self.__add_shape(*shape)
+        out = bytearray(9)
+        if key == "{}.{}".format(record.get("__class__"), record.get("id")):
+            out[4] = self.RECORD
+        else:
+            out[4] = self.KEYED
+            data = key.encode("utf-8")
+            out += struct.pack("<I", len(data)) + data
+        struct.pack_into("<I", out, 5, shape_id)
+        out += self.shapes[shape_id][2].pack(*fixed)
+        out += "".join(strings).encode("utf-8")
+        struct.pack_into("<I", out, 0, len(out) - 4)
+        return bytes(out)
+
+    def write(self, file, fragments):
+        """
+        Writes the header and the encoded records to file, each shape
+        before the first record using it.
+        """
+        _write_chunked(file, self.__pieces(fragments), b"")
+
+    def __pieces(self, fragments):
+        """
+        Yields the bytes of the file piece by piece.
+        """
+        yield self.magic + bytes([self.version])
+        written = set()
+        for fragment in fragments:
+            shape_id, = struct.unpack_from("<I", fragment, 5)
+            if shape_id not in written:
+                written.add(shape_id)
+                yield self.__encode_shape(shape_id)
+            yield fragment
+
+    def iter_records(self, file):
+        """
+        Yields the (key, record) pairs stored in file one at a time.
+        Raises ValueError if the file is not in this format or ends
+        in the middle of a record.
+        """
+        head = file.read(5)
+        if not head:
+            return
+        if len(head) < 5 or head[:4] != self.magic:
+            raise ValueError("Not a binary snapshot")
+        if head[4] != self.version:
+            raise ValueError("Unknown snapshot version {}".format(head[4]))
+        shapes = {}
+        read = file.read
+        unpack_from = struct.unpack_from
+        while True:
+            size = read(4)
+            if not size:
+                return
+            if len(size) < 4:
+                raise ValueError("Truncated record")
+            length, = unpack_from("<I", size)
+            body = read(length)
+            if len(body) < length or length < 5:
+                raise ValueError("Truncated record")
+            kind = body[0]
+            shape_id, = unpack_from("<I", body, 1)
+            if kind == self.SHAPE:
+                shapes[shape_id] = self.__decode_shape(body)
+                continue
+            try:
+                fields, fixed = shapes[shape_id]
+            except KeyError:
+                raise ValueError("Unknown shape {}".format(shape_id))
+            pos = 5
+            key = None
+            if kind == self.KEYED:
+                size, = unpack_from("<I", body, pos)
+                key = str(body[pos + 4:pos + 4 + size], "utf-8")
+                pos += 4 + size
+            values = fixed.unpack_from(body, pos)
+            text = str(body[pos + fixed.size:], "utf-8")
+            yield self.__decode_record(key, fields, values, text)
+
+    def __add_shape(self, names, tags):
+        """
+        Registers the shape of names holding values of tags and
+        returns its id.
+        """
+        shape_id = len(self.shapes)
+        fixed = struct.Struct("<" + "".join(self.codes[tag] for tag in tags))
+        self.shapes.append((names, tags, fixed))
+        self.shape_ids[(names, tags)] = shape_id
+        return shape_id
+
+    def __encode_shape(self, shape_id):
+        """
+        Returns the bytes of the entry defining shape_id.
+        """
+        names, tags, fixed = self.shapes[shape_id]
+        out = bytearray(struct.pack("<BIH", self.SHAPE, shape_id, len(names)))
+        for name, tag in zip(names, tags):
+            data = name.encode("utf-8")
+            out += struct.pack("<BH", tag, len(data)) + data
+        return struct.pack("<I", len(out)) + bytes(out)
+
+    def __decode_shape(self, body):
+        """
+        Returns the (fields, struct) of the shape entry body, fields
+        being the (name, tag) of each value.
+        """
+        count, = struct.unpack_from("<H", body, 5)
+        pos = 7
+        fields = []
+        for i in range(count):
+            tag, size = struct.unpack_from("<BH", body, pos)
+            pos += 3
+            fields.append((str(body[pos:pos + size], "utf-8"), tag))
+            pos += size
+        fixed = struct.Struct("<" + "".join(self.codes[tag]
+                                            for name, tag in fields))
+        return fields, fixed
+
+    @staticmethod
+    def __decode_record(key, fields, values, text):
+        """
+        Returns the (key, record) pair of the unpacked values and the
+        decoded string area text of a record.
+        """
+        record = {}
+        i = 0
+        pos = 0
+        # tags as literals, this loop runs once per stored attribute:
+        # 5 STR, 7 UUID, 6 DATETIME, 0-2 NONE TRUE FALSE, 8 JSON
+        for name, tag in fields:
+            if tag == 5:
+                end = pos + values[i]
+                record[name] = text[pos:end]
+                pos = end
+            elif tag == 7:
+                h = values[i].hex()
+                record[name] = "-".join((h[:8], h[8:12], h[12:16],
+                                         h[16:20], h[20:]))
+            elif tag == 6:
+                record[name] = (EPOCH + timedelta(
+                    microseconds=values[i])).isoformat()
+            elif tag <= 2:
+                record[name] = (None, True, False)[tag]
+                continue
+            elif tag == 8:
+                end = pos + values[i]
+                record[name] = json.loads(text[pos:end])
+                pos = end
+            else:
+                record[name] = values[i]
+            i += 1
+        if key is None:
+            key = "{}.{}".format(record.get("__class__"), record.get("id"))
+        return key, record
+
+    @staticmethod
+    def __pack_special(value):
+        """
+        Returns the (DATETIME or UUID tag, packed value) of value if it
+        decodes back to the same string, else None.
+        """
+        if len(value) == 36:
+            if (value[8] == value[13] == value[18] == value[23] == "-" and
+                    value == value.lower()):
+                try:
+                    data = bytes.fromhex(value[:8] + value[9:13] +
+                                         value[14:18] + value[19:23] +
+                                         value[24:])
+                except ValueError:
+                    return None
+                if len(data) == 16:
+                    return BinarySerializer.UUID, data
+        elif 19 <= len(value) <= 26 and value[10] == "T":
+            try:
+                parsed = datetime.fromisoformat(value)
+            except ValueError:
+                return None
+            if parsed.tzinfo is None and parsed.isoformat() == value:
+                return (BinarySerializer.DATETIME,
+                        (parsed - EPOCH) // MICROSECOND)
+        return None
+
+
+serializers = {
+    "json": JSONSerializer,
+    "binary": BinarySerializer
+}
+
+extensions = {
+    ".json": "json",
+    ".hbnb": "binary",
+    ".bin": "binary"
+}
+
+
+def serializer_for(path, name=None):
+    """
+    Returns the serializer called name, or else the one matching the
+    extension of path (JSON if the extension is unknown).
+    """
+    if name is None:
+        dot = path.rfind(".")
+        name = extensions.get(path[dot:].lower() if dot >= 0 else "", "json")
+    if name not in serializers:
+        raise ValueError("Unknown storage format: {}".format(name))
+    return serializers[name]()
+
+
+def convert(src, dst, src_format=None, dst_format=None):
+    """
+    Streams the records of the snapshot src into a new snapshot dst,
+    each format taken from its name or from the file extension.
+    Returns the number of records written.
+    """
+    reader = serializer_for(src, src_format)
+    writer = serializer_for(dst, dst_format)
+    count = [0]
+
+    def fragments(records):
+        for key, record in records:
+            count[0] += 1
+            yield writer.encode(key, record)
+
+    with open(src, "rb" if reader.binary else "r") as src_file:
+        with open(dst, "wb" if writer.binary else "w") as dst_file:
+            writer.write(dst_file,
+                         fragments(reader.iter_records(src_file)))
+    return count[0]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: {} <source> <destination>".format(sys.argv[0]))
+        sys.exit(1)
+    print(convert(sys.argv[1], sys.argv[2]))
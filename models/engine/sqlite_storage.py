@@ -0,0 +1,435 @@
+#!/usr/bin/python3
+
+"""class SQLiteStorage
+    storage engine keeping every model class in a table of a SQLite
+    database"""
+import json
+import sqlite3
+import threading
+from models.base_model import _layout, classes
+from models.engine.geo_index import GeoGrid
+from models.engine.transactional_storage import TransactionalStorageMixin
+
+
+def _number(value):
+    """
+    Returns value as a float, or None if it is not a number.
+    """
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number == number else None
+
+
+class SQLiteStorage(TransactionalStorageMixin):
+    """
+    This class stores the instances of each model class in a table of
+    the same name, with a column per attribute of the class layout
+    (id, the timestamps, then the class attributes) and an "extra"
+    column holding the JSON of any other attribute and of the values a
+    column cannot hold as they are (None, booleans, lists, dicts). The
+    columns of the class _indexes are indexed. reload() sets up the
+    tables of the classes registered then, and the first write of a
+    class registered later sets up its own; a class without a table
+    has no instances.
+
+    Changed and deleted instances are written to the database in an
+    open transaction before every query, so queries see them, and
+    save() commits that transaction: a crash or reload() before save()
+    rolls everything back. The database is in WAL mode, and its one
+    connection is shared by every thread under __mutex.
+
+    Only the instances read or created since reload() are held in
+    __objects; rows are built into instances when a query returns them.
+
+    Saves are deferred and transactions kept as TransactionalStorageMixin
+    describes. A transaction is a savepoint of the open transaction:
+    rollback() goes back to the savepoint, writing the changes of other
+    threads again.
+    """
+
+    __file_path = "file.db"
+    __db = None
+    __objects = {}
+    __changes = {}
+    __mutable = set()
+    __tables = set()
+    __mutex = threading.RLock()
+
+    def __init__(self):
+        """
+        Initializes the SQLiteStorage instance.
+        The database is not opened here: models/__init__.py calls
+        reload() once per process.
+        """
+        pass
+
+    def all(self, cls=None):
+        """
+        Returns a dictionary of every stored instance, or of the
+        instances of cls (a class or a class name) only.
+        """
+        names = list(classes) if cls is None else [self.__name(cls)]
+        objs = {}
+        for name in names:
+            if name not in classes:
+                continue
+            for obj in self.__select(name, ""):
+                objs[name + "." + obj.id] = obj
+        return objs
+
+    def get(self, cls, id):
+        """
+        Returns the instance of cls (a class or a class name) with id,
+        or None if there is none.
+        """
+        name = self.__name(cls)
+        if name not in classes:
+            return None
+        obj = SQLiteStorage.__objects.get(name + "." + str(id))
+        if obj is not None:
+            return obj
+        found = self.__select(name, "WHERE id = ?", (id,))
+        return found[0] if found else None
+
+    def count(self, cls=None):
+        """
+        Returns the number of stored instances, of cls only if given.
+        """
+        names = list(classes) if cls is None else [self.__name(cls)]
+        with SQLiteStorage.__mutex:
+            self.__flush()
+            return sum(SQLiteStorage.__db.execute(
+                'SELECT COUNT(*) FROM "{}"'.format(name)).fetchone()[0]
+                for name in names
+                if name in classes and name in SQLiteStorage.__tables)
+
+    def new_many(self, objs):
+        """
+        Sets in __objects every obj of objs, like new() does for one.
+        """
+        with SQLiteStorage.__mutex:
+            for obj in objs:
+                key = obj.__class__.__name__ + "." + obj.id
+                SQLiteStorage.__objects[key] = obj
+                SQLiteStorage.__changes[key] = obj
+                self._note(key)
+
+    def delete(self, obj=None):
+        """
+        Deletes obj from the storage if it's inside.
+        """
+        if obj is None:
+            return
+        key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        with SQLiteStorage.__mutex:
+            SQLiteStorage.__objects.pop(key, None)
+            SQLiteStorage.__changes[key] = None
+            SQLiteStorage.__mutable.discard(key)
+            self._note(key)
+
+    def touch(self, obj, name=None, old=None):
+        """
+        Marks a stored obj as changed since the last save. The value
+        old attribute name had is not needed here.
+        """
+        key = "{}.{}".format(obj.__class__.__name__,
+                             getattr(obj, "id", None))
+        with SQLiteStorage.__mutex:
+            if SQLiteStorage.__objects.get(key) is obj:
+                SQLiteStorage.__changes[key] = obj
+                self._note(key)
+
+    def find(self, cls, **equals):
+        """
+        Returns the list of instances of cls (a class or a class name)
+        whose attributes equal the given values, e.g.
+        find(Review, place_id=place.id). Attributes stored in a column
+        are matched by the query, the others on each row it returns.
+        """
+        name = self.__name(cls)
+        if name not in classes:
+            return []
+        columns = _layout(classes[name])
+        where = []
+        params = []
+        for attr, value in equals.items():
+            if attr in columns and self.__fits(value):
+                where.append('"{}" = ?'.format(attr))
+                params.append(value)
+        found = self.__select(
+            name, "WHERE " + " AND ".join(where) if where else "", params)
+        return [obj for obj in found
+                if all(getattr(obj, attr, None) == value
+                       for attr, value in equals.items())]
+
+    def set_path(self, path):
+        """
+        Sets the database file to path.
+        """
+        SQLiteStorage.__file_path = path
+
+    def reload(self, *, lazy=True):
+        """
+        Opens the database, creating the tables and indexes it lacks,
+        and drops what was not saved. No row is read: the instances
+        are built when a query returns them whatever lazy is.
+        """
+        with SQLiteStorage.__mutex:
+            self.close()
+            # the savepoint goes with the connection
+            self._forget_transaction()
+            SQLiteStorage.__objects = {}
+            SQLiteStorage.__changes = {}
+            SQLiteStorage.__mutable = set()
+            db = sqlite3.connect(SQLiteStorage.__file_path,
+                                 check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.create_function("hbnb_number", 1, _number,
+                               deterministic=True)
+            SQLiteStorage.__db = db
+            SQLiteStorage.__tables = set()
+            for name in list(classes):
+                self.__create_table(name)
+            db.commit()
+
+    def close(self):
+        """
+        Closes the database, dropping what was not saved.
+        """
+        with SQLiteStorage.__mutex:
+            if SQLiteStorage.__db is not None:
+                SQLiteStorage.__db.close()
+                SQLiteStorage.__db = None
+
+    def filter_places(self, price_min=None, price_max=None, min_guests=None,
+                      min_rooms=None, min_bathrooms=None, bbox=None):
+        """
+        Returns the places matching every given criterion, see
+        PlaceColumns.filter(). Values that are not numbers never match.
+        """
+        ranges = [("price_by_night", price_min, price_max),
+                  ("max_guest", min_guests, None),
+                  ("number_rooms", min_rooms, None),
+                  ("number_bathrooms", min_bathrooms, None)]
+        if bbox is not None:
+            south, west, north, east = bbox
+            ranges.append(("latitude", south, north))
+            ranges.append(("longitude", west, east))
+        where = []
+        params = []
+        for column, low, high in ranges:
+            if low is not None:
+                where.append('hbnb_number("{}") >= ?'.format(column))
+                params.append(low)
+            if high is not None:
+                where.append('hbnb_number("{}") <= ?'.format(column))
+                params.append(high)
+        return self.__select(
+            "Place", "WHERE " + " AND ".join(where) if where else "", params)
+
+    def nearest(self, latitude, longitude, k=1):
+        """
+        Returns the k places nearest to (latitude, longitude),
+        nearest first.
+        """
+        return self.__places().nearest(latitude, longitude, k)
+
+    def within_radius(self, latitude, longitude, km):
+        """
+        Returns the places at most km away from (latitude, longitude),
+        nearest first.
+        """
+        return self.__places().within_radius(latitude, longitude, km)
+
+    def within_bbox(self, south, west, north, east):
+        """
+        Returns the places inside the (south, west, north, east) box.
+        """
+        return self.filter_places(bbox=(south, west, north, east))
+
+    def _begin(self):
+        """
+        Writes the changes made before the transaction and opens its
+        savepoint.
+        """
+        with SQLiteStorage.__mutex:
+            self.__touch_mutable()
+            self.__flush()
+            SQLiteStorage.__db.execute("SAVEPOINT hbnb_transaction")
+
+    def _commit(self):
+        """
+        Writes the changes of the transaction and releases its
+        savepoint.
+        """
+        with SQLiteStorage.__mutex:
+            self.__flush()
+            SQLiteStorage.__db.execute("RELEASE hbnb_transaction")
+
+    def _rollback(self, others):
+        """
+        Goes back to the savepoint and drops the instances changed
+        since but those of others, which are written again.
+        """
+        with SQLiteStorage.__mutex:
+            SQLiteStorage.__db.execute("ROLLBACK TO hbnb_transaction")
+            SQLiteStorage.__db.execute("RELEASE hbnb_transaction")
+            kept = {key: SQLiteStorage.__objects.get(key) for key in others}
+            SQLiteStorage.__objects = {
+                key: obj for key, obj in kept.items() if obj is not None}
+            SQLiteStorage.__changes = kept
+            SQLiteStorage.__mutable &= others
+
+    def _save_now(self):
+        """
+        Writes the changed instances and commits them.
+        """
+        with SQLiteStorage.__mutex:
+            self.__touch_mutable()
+            self.__flush()
+            SQLiteStorage.__db.commit()
+
+    def __touch_mutable(self):
+        """
+        Marks the instances holding lists or dicts as changed, since
+        those can be changed in place without touch().
+        """
+        for key in SQLiteStorage.__mutable:
+            SQLiteStorage.__changes.setdefault(
+                key, SQLiteStorage.__objects[key])
+
+    def __create_table(self, name):
+        """
+        Creates the table of class name and its indexes, or adds the
+        columns it lacks. The caller holds __mutex.
+        """
+        db = SQLiteStorage.__db
+        cls = classes[name]
+        columns = _layout(cls)
+        db.execute('CREATE TABLE IF NOT EXISTS "{}" '
+                   '(id TEXT PRIMARY KEY, {}, extra)'.format(
+                       name, ", ".join('"{}"'.format(column)
+                                       for column in columns[1:])))
+        known = {row[1] for row in db.execute(
+            'PRAGMA table_info("{}")'.format(name))}
+        for column in columns:
+            if column not in known:
+                db.execute('ALTER TABLE "{}" ADD COLUMN "{}"'.format(
+                    name, column))
+        for column in cls._indexes:
+            db.execute('CREATE INDEX IF NOT EXISTS "{0}_{1}" '
+                       'ON "{0}" ("{1}")'.format(name, column))
+        SQLiteStorage.__tables.add(name)
+
+    def __places(self):
+        """
+        Returns a GeoGrid holding every stored Place.
+        """
+        places = GeoGrid()
+        for key, obj in self.all("Place").items():
+            places.add(key, obj)
+        return places
+
+    @staticmethod
+    def __name(cls):
+        """
+        Returns the class name of cls, a class or a class name.
+        """
+        return cls if isinstance(cls, str) else cls.__name__
+
+    @staticmethod
+    def __fits(value):
+        """
+        Returns True if value is stored as it is in a column.
+        """
+        return (type(value) in (str, float) or
+                type(value) is int and -(1 << 63) <= value < (1 << 63))
+
+    def __flush(self):
+        """
+        Writes the changes since the last flush to the open transaction.
+        """
+        changes = SQLiteStorage.__changes
+        if not changes:
+            return
+        rows = {}
+        deleted = {}
+        for key, obj in changes.items():
+            name, dot, id = key.partition(".")
+            if obj is None:
+                deleted.setdefault(name, []).append((id,))
+            else:
+                rows.setdefault(name, []).append(self.__row(key, obj))
+        db = SQLiteStorage.__db
+        for name in rows:
+            if name not in SQLiteStorage.__tables:
+                self.__create_table(name)
+        for name, ids in deleted.items():
+            if name not in SQLiteStorage.__tables:
+                continue
+            db.executemany('DELETE FROM "{}" WHERE id = ?'.format(name), ids)
+        for name, values in rows.items():
+            columns = _layout(classes[name]) + ("extra",)
+            db.executemany(
+                'INSERT OR REPLACE INTO "{}" ({}) VALUES ({})'.format(
+                    name, ", ".join('"{}"'.format(column)
+                                    for column in columns),
+                    ", ".join("?" * len(columns))), values)
+        SQLiteStorage.__changes = {}
+
+    def __row(self, key, obj):
+        """
+        Returns the column values of obj.
+        """
+        obj_dict = obj.to_dict()
+        del obj_dict["__class__"]
+        row = []
+        for column in _layout(obj.__class__):
+            value = obj_dict.get(column)
+            if self.__fits(value):
+                del obj_dict[column]
+            else:
+                value = None
+            row.append(value)
+        if any(type(value) in (list, dict) for value in obj_dict.values()):
+            SQLiteStorage.__mutable.add(key)
+        row.append(json.dumps(obj_dict) if obj_dict else None)
+        return row
+
+    def __select(self, name, where, params=()):
+        """
+        Returns the instances of the rows of table name matching the
+        where clause, reusing the instances already built.
+        """
+        cls = classes[name]
+        columns = _layout(cls)
+        with SQLiteStorage.__mutex:
+            self.__flush()
+            if name not in SQLiteStorage.__tables:
+                return []
+            rows = SQLiteStorage.__db.execute(
+                'SELECT {}, extra FROM "{}" {}'.format(
+                    ", ".join('"{}"'.format(column) for column in columns),
+                    name, where), params).fetchall()
+            objects = SQLiteStorage.__objects
+            found = []
+            for row in rows:
+                key = name + "." + row[0]
+                obj = objects.get(key)
+                if obj is None:
+                    value = {column: item
+                             for column, item in zip(columns, row)
+                             if item is not None}
+                    if row[-1] is not None:
+                        value.update(json.loads(row[-1]))
+                    obj = cls.__new__(cls)
+                    obj._load(value)
+                    objects[key] = obj
+                    if any(type(item) in (list, dict)
+                           for item in value.values()):
+                        SQLiteStorage.__mutable.add(key)
+                found.append(obj)
+        return found
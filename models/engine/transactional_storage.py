@@ -0,0 +1,222 @@
+#!/usr/bin/python3
+
+"""class TransactionalStorageMixin
+    deferred saves and per-thread transactions of a storage engine"""
+import threading
+from contextlib import contextmanager
+
+
+class TransactionalStorageMixin:
+    """
+    Adds deferred() blocks and transactions to a storage engine.
+
+    Inside a deferred() block, save() writes nothing and the end of
+    the outermost block saves once instead. A transaction (begin() to
+    commit() or rollback(), or a transaction() block) belongs to the
+    thread that opened it and defers the saves of that thread the same
+    way. Other threads keep changing instances meanwhile, but their
+    save() and begin() wait until the transaction is closed, and
+    rollback() keeps the changes they made last (see _note()).
+
+    The engine writes in _save_now() and does its own part of begin(),
+    commit() and rollback() in _begin(), _commit() and _rollback().
+    The state is set on the class of the engine, so that every
+    instance of the engine shares it, as the engine's own state.
+    """
+
+    __state = threading.Condition(threading.RLock())
+    __owner = None
+    __others = set()
+    __deferred = 0
+    __save_due = False
+
+    def new(self, obj):
+        """
+        Sets in __objects the obj with key <obj class name>.id.
+        """
+        self.new_many((obj,))
+
+    @contextmanager
+    def deferred(self):
+        """
+        Makes save() write nothing inside the "with" block, and saves
+        at the end of the outermost block if save() was called in it.
+        """
+        with self.__state:
+            type(self).__deferred += 1
+        try:
+            yield self
+        finally:
+            self.__resume_saves()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Runs the "with" block in a transaction, committed at the end
+        of the block or rolled back if the block raises.
+        """
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+
+    def begin(self):
+        """
+        Opens a transaction of the calling thread: save() writes nothing
+        until commit() or rollback(). Waits for the transaction of
+        another thread to be closed first, and raises RuntimeError if
+        the calling thread has one open already.
+        """
+        engine = type(self)
+        with self.__state:
+            self.__wait()
+            if engine.__owner is not None:
+                raise RuntimeError("a transaction is already open")
+            self._begin()
+            engine.__owner = threading.get_ident()
+            engine.__others = set()
+            engine.__deferred += 1
+
+    def commit(self):
+        """
+        Closes the transaction and saves its changes.
+        """
+        engine = type(self)
+        with self.__state:
+            self.__check_owner()
+            self._commit()
+            self.__close()
+            engine.__save_due = True
+        self.__resume_saves()
+
+    def rollback(self):
+        """
+        Closes the transaction and drops the changes the thread made
+        since begin().
+        """
+        engine = type(self)
+        with self.__state:
+            self.__check_owner()
+            self._rollback(engine.__others)
+            self.__close()
+            if engine.__deferred == 1:
+                engine.__save_due = False
+        self.__resume_saves()
+
+    def save(self):
+        """
+        Writes the changes made since the last save, or only notes
+        that a save is due inside a deferred() block or a transaction.
+        """
+        with self._saving():
+            if type(self).__deferred:
+                type(self).__save_due = True
+                return
+            self._save_now()
+
+    def _begin(self):
+        """
+        Does the engine's part of begin(). Nothing by default.
+        """
+        pass
+
+    def _commit(self):
+        """
+        Does the engine's part of commit(). Nothing by default.
+        """
+        pass
+
+    def _rollback(self, others):
+        """
+        Drops the changes made since begin() to every key but those of
+        others, which another thread changed last.
+        """
+        raise NotImplementedError
+
+    def _save_now(self):
+        """
+        Writes the changes made since the last save.
+        """
+        raise NotImplementedError
+
+    @contextmanager
+    def _saving(self):
+        """
+        Runs the "with" block of a save once the transaction of another
+        thread, if any, is closed. No transaction opens meanwhile.
+        """
+        with self.__state:
+            self.__wait()
+            yield
+
+    def _transaction_owner(self):
+        """
+        Returns the id of the thread of the open transaction, or None.
+        """
+        return type(self).__owner
+
+    def _forget_transaction(self):
+        """
+        Closes the open transaction, if any, without committing or
+        rolling back anything: for an engine that lost it.
+        """
+        engine = type(self)
+        with self.__state:
+            if engine.__owner is not None:
+                self.__close()
+                engine.__deferred -= 1
+
+    def _note(self, key):
+        """
+        Notes whether the thread of the open transaction, if any, or
+        another one changed key last: rollback() keeps the changes of
+        the others.
+        """
+        owner = type(self).__owner
+        if owner is None:
+            return
+        if threading.get_ident() == owner:
+            type(self).__others.discard(key)
+        else:
+            type(self).__others.add(key)
+
+    def __check_owner(self):
+        """
+        Raises RuntimeError unless the calling thread has the open
+        transaction.
+        """
+        if type(self).__owner != threading.get_ident():
+            raise RuntimeError("no transaction is open")
+
+    def __wait(self):
+        """
+        Waits until no other thread has a transaction open. The caller
+        holds __state.
+        """
+        while type(self).__owner not in (None, threading.get_ident()):
+            self.__state.wait()
+
+    def __close(self):
+        """
+        Closes the open transaction and wakes the threads waiting for
+        it. The caller holds __state.
+        """
+        type(self).__owner = None
+        self.__state.notify_all()
+
+    def __resume_saves(self):
+        """
+        Ends a deferred() block or a transaction, saving if it is the
+        outermost one and a save is due.
+        """
+        engine = type(self)
+        with self.__state:
+            engine.__deferred -= 1
+            due = engine.__deferred == 0 and engine.__save_due
+            if due:
+                engine.__save_due = False
+        if due:
+            self.save()
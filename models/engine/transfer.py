@@ -0,0 +1,329 @@
+#!/usr/bin/python3
+
+"""Streaming import and export of the instances of one class
+    as JSON Lines or CSV files, to and from the storage or a snapshot"""
+import contextlib
+import csv
+import json
+import os
+import sys
+import uuid
+from datetime import datetime
+import models
+from models.base_model import _layout, classes
+from models.engine.file_lock import FileLock
+from models.engine.serializers import serializer_for
+
+formats = {".jsonl": "jsonl", ".ndjson": "jsonl", ".csv": "csv"}
+BATCH_SIZE = 10000
+
+
+def format_for(path, name=None):
+    """
+    Returns name, or else the format matching the extension of path.
+    """
+    if name is None:
+        dot = path.rfind(".")
+        name = formats.get(path[dot:].lower() if dot >= 0 else "")
+    if name not in ("jsonl", "csv"):
+        raise ValueError("Unknown record format: {}".format(name or path))
+    return name
+
+
+def coerce(cls, name, value):
+    """
+    Returns value converted to the type of the class attribute name of
+    cls: numbers from strings, lists and dicts from JSON text. The
+    timestamps must be in isoformat() form. Other values are returned
+    as they are.
+    """
+    if name in ("created_at", "updated_at"):
+        if type(value) is not str:
+            raise ValueError("{} is not a timestamp".format(name))
+        return datetime.fromisoformat(value).isoformat()
+    default = getattr(cls, name, None)
+    kind = type(default)
+    if kind in (int, float):
+        if type(value) is str or kind is float and type(value) is int:
+            return kind(value)
+    elif kind in (list, dict) and type(value) is str:
+        value = json.loads(value)
+        if type(value) is not kind:
+            raise ValueError("{} is not a {}".format(name, kind.__name__))
+    return value
+
+
+def export_records(path, cls=None, format=None, src=None):
+    """
+    Writes the instances of cls (a class or a class name, every class
+    if None; JSON Lines only) to the file path, one record per line,
+    and returns their number. The instances are those of the storage,
+    or the records of the snapshot file src and its journal, read one
+    at a time while holding the lock file of the storage.
+
+    A JSON Lines record is the to_dict() of the instance. A CSV file
+    has a column per attribute of the class layout, lists and dicts as
+    JSON, then an "extra" column holding the JSON of the attributes
+    outside the layout.
+    """
+    format = format_for(path, format)
+    name = cls if cls is None or isinstance(cls, str) else cls.__name__
+    if name is not None and name not in classes:
+        raise ValueError("Unknown class: {}".format(name))
+    if format == "csv" and name is None:
+        raise ValueError("A CSV file holds the instances of one class")
+    if src is None:
+        lock = contextlib.nullcontext()
+        records = (obj.to_dict()
+                   for obj in models.storage.all(name).values())
+    else:
+        lock = FileLock(src + ".lock")
+        records = (record for key, record in _snapshot_items(src, name))
+    count = 0
+    with lock, open(path, "w", newline="") as file:
+        if format == "csv":
+            columns = _layout(classes[name])
+            writer = csv.writer(file)
+            writer.writerow(columns + ("extra",))
+            for record in records:
+                writer.writerow(_csv_row(columns, record))
+                count += 1
+        else:
+            for record in records:
+                file.write(json.dumps(record) + "\n")
+                count += 1
+    return count
+
+
+def import_records(path, cls=None, format=None, dst=None,
+                   batch=BATCH_SIZE):
+    """
+    Creates an instance per record of the file path and returns their
+    number. The class is cls (a class or a class name) or else the
+    __class__ of each JSON Lines record. Values are converted by
+    coerce(); missing ids and timestamps are generated.
+
+    The instances are registered in the storage batch at a time and
+    saved once; a bad record raises ValueError giving its line, after
+    unregistering the instances of the file and registering back those
+    they replaced, so the storage holds what it held before (unsaved
+    until the next save). With dst, the records
+    are instead streamed into the snapshot file dst, after the records
+    it holds already, without building any instance.
+    """
+    format = format_for(path, format)
+    name = cls if cls is None or isinstance(cls, str) else cls.__name__
+    if name is not None and name not in classes:
+        raise ValueError("Unknown class: {}".format(name))
+    if format == "csv" and name is None:
+        raise ValueError("A CSV file holds the instances of one class")
+    with open(path, "r", newline="") as file:
+        records = _records(file, format, name)
+        if dst is not None:
+            return _import_snapshot(records, dst)
+        registered = []
+        replaced = {}
+        try:
+            chunk = []
+            for record in records:
+                cls = classes[record["__class__"]]
+                obj = cls.__new__(cls)
+                obj._load(record)
+                chunk.append(obj)
+                if len(chunk) == batch:
+                    _register(chunk, registered, replaced)
+                    chunk = []
+            _register(chunk, registered, replaced)
+        except BaseException:
+            for obj in registered:
+                models.storage.delete(obj)
+            models.storage.new_many(
+                [obj for obj in replaced.values() if obj is not None])
+            raise
+    models.storage.save()
+    return len(registered)
+
+
+def _register(objs, registered, replaced):
+    """
+    Registers the instances objs in the storage and appends them to
+    registered, after keeping in replaced the instance each key held
+    before the import (None if there was none).
+    """
+    for obj in objs:
+        key = obj.__class__.__name__ + "." + obj.id
+        if key not in replaced:
+            replaced[key] = models.storage.get(obj.__class__, obj.id)
+    models.storage.new_many(objs)
+    registered.extend(objs)
+
+
+def _records(file, format, name):
+    """
+    Yields the records of an opened JSON Lines or CSV file as to_dict()
+    dictionaries of instances of class name (or of their __class__).
+    """
+    now = datetime.now().isoformat()
+    if format == "csv":
+        reader = csv.DictReader(file)
+        rows = ((reader.line_num, row) for row in reader)
+    else:
+        rows = enumerate(file, 1)
+    for number, row in rows:
+        try:
+            if format == "csv":
+                attrs = _csv_attrs(row)
+            elif row.strip():
+                attrs = json.loads(row)
+            else:
+                continue
+            record = _record(attrs, name, now)
+        except ValueError as error:
+            raise ValueError("line {}: {}".format(number, error))
+        yield record
+
+
+def _record(attrs, name, now):
+    """
+    Returns the to_dict() dictionary of the attributes attrs of an
+    instance of class name (or of their __class__).
+    """
+    if type(attrs) is not dict:
+        raise ValueError("not an object")
+    cls_name = name or attrs.get("__class__")
+    if cls_name not in classes:
+        raise ValueError("Unknown class: {}".format(cls_name))
+    cls = classes[cls_name]
+    record = {"id": str(uuid.uuid4()), "created_at": now, "updated_at": now}
+    for attr, value in attrs.items():
+        if attr != "__class__":
+            record[attr] = coerce(cls, attr, value)
+    if type(record["id"]) is not str:
+        raise ValueError("id is not a string")
+    record["__class__"] = cls_name
+    return record
+
+
+def _csv_attrs(row):
+    """
+    Returns the attributes of a CSV row: its non-empty cells and those
+    of its "extra" JSON cell.
+    """
+    extra = row.pop("extra", None)
+    attrs = {attr: value for attr, value in row.items()
+             if attr is not None and value != ""}
+    if extra:
+        attrs.update(json.loads(extra))
+    return attrs
+
+
+def _csv_row(columns, record):
+    """
+    Returns the CSV cells of a to_dict() record.
+    """
+    record = dict(record)
+    record.pop("__class__", None)
+    row = []
+    for column in columns:
+        value = record.pop(column, None)
+        if value is None:
+            value = ""
+        elif type(value) in (list, dict):
+            value = json.dumps(value)
+        row.append(value)
+    row.append(json.dumps(record) if record else "")
+    return row
+
+
+def _snapshot_items(src, name=None):
+    """
+    Yields the (key, record) pairs of class name (every class if None)
+    of the snapshot file src, one at a time, with the changes of its
+    journal applied. A missing snapshot is empty if it has a journal.
+    """
+    prefix = "" if name is None else name + "."
+    journal = _journal(src)
+    if journal is None or os.path.exists(src):
+        reader = serializer_for(src)
+        with open(src, "rb" if reader.binary else "r") as file:
+            for key, record in reader.iter_records(file):
+                if journal and key in journal:
+                    record = journal.pop(key)
+                if record is not None and key.startswith(prefix):
+                    yield key, record
+    for key, record in (journal or {}).items():
+        if record is not None and key.startswith(prefix):
+            yield key, record
+
+
+def _journal(src):
+    """
+    Returns the {key: record} changes of the journal of the snapshot
+    file src (None for a deleted record) up to its first torn entry,
+    or None if it has no journal.
+    """
+    try:
+        file = open(src + ".journal", "rb")
+    except FileNotFoundError:
+        return None
+    changes = {}
+    with file:
+        for line in file:
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("Unterminated entry")
+                entry = json.loads(line)
+            except ValueError:
+                break
+            if "changes" in entry:
+                changes.update(entry["changes"])
+            else:
+                changes[entry["key"]] = entry["value"]
+    return changes
+
+
+def _import_snapshot(records, dst):
+    """
+    Writes the records of the snapshot file dst and of its journal,
+    then records, to a new snapshot replacing dst and its journal, and
+    returns the number of records added. The lock file of the storage
+    is held meanwhile.
+    """
+    writer = serializer_for(dst)
+    count = [0]
+
+    def fragments():
+        if os.path.exists(dst) or os.path.exists(dst + ".journal"):
+            for key, record in _snapshot_items(dst):
+                yield writer.encode(key, record)
+        for record in records:
+            count[0] += 1
+            yield writer.encode(
+                record["__class__"] + "." + record["id"], record)
+
+    with FileLock(dst + ".lock"):
+        try:
+            with open(dst + ".tmp", "wb" if writer.binary else "w") as file:
+                writer.write(file, fragments())
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(dst + ".tmp", dst)
+        except BaseException:
+            if os.path.exists(dst + ".tmp"):
+                os.remove(dst + ".tmp")
+            raise
+        if os.path.exists(dst + ".journal"):
+            os.remove(dst + ".journal")
+    return count[0]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 5 or sys.argv[1] not in ("import", "export"):
+        print("Usage: {0} export <class> <snapshot> <records file>\n"
+              "       {0} import <class> <records file> <snapshot>".format(
+                  sys.argv[0]))
+        sys.exit(1)
+    if sys.argv[1] == "export":
+        print(export_records(sys.argv[4], sys.argv[2], src=sys.argv[3]))
+    else:
+        print(import_records(sys.argv[3], sys.argv[2], dst=sys.argv[4]))
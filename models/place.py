@@ -5,6 +5,7 @@ from models.base_model import BaseModel
 
 class Place(BaseModel):
     """ Place class which inherit BaseModel """
+    _indexes = ("city_id", "user_id")
     city_id = ""
     user_id = ""
     name = ""
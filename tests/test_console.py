@@ -11,17 +11,82 @@ Unittest classes:
     TestHBNBCommand_all
     TestHBNBCommand_destroy
     TestHBNBCommand_update
+    TestHBNBCommand_count
+    TestHBNBCommand_geo
+    TestHBNBCommand_batch
+    TestHBNBCommand_transaction
+    TestHBNBCommand_transfer
 """
 
 import os
 import sys
+import subprocess
 import unittest
 from models import storage
+from models.base_model import BaseModel, classes
+from models.place import Place
 from models.engine.file_storage import FileStorage
 from console import HBNBCommand
 from io import StringIO
 from unittest.mock import patch
 
+# the files of every storage engine, see models/__init__.py
+STORAGE_FILES = ("file.json", "file.json.journal", "file.records",
+                 "file.records.idx", "file.db", "file.db-wal", "file.db-shm")
+
+
+def tearDownModule():
+    """
+    Removes the files of the storage if it holds nothing, as when
+    loading models created them for these tests.
+    """
+    if storage.count():
+        return
+    if hasattr(storage, "close"):
+        storage.close()
+    for name in STORAGE_FILES:
+        try:
+            os.remove(name)
+        except IOError:
+            pass
+
+
+def empty_storage():
+    """
+    Moves the files of every storage engine aside and reloads the
+    storage HBNB_TYPE_STORAGE selected, so it holds nothing.
+    """
+    for name in STORAGE_FILES:
+        try:
+            os.rename(name, "tmp_" + name)
+        except IOError:
+            pass
+    reopen_storage()
+
+
+def restore_storage():
+    """
+    Puts back the files empty_storage() moved aside.
+    """
+    for name in STORAGE_FILES:
+        try:
+            os.remove(name)
+        except IOError:
+            pass
+        try:
+            os.rename("tmp_" + name, name)
+        except IOError:
+            pass
+    reopen_storage()
+
+
+def reopen_storage():
+    """
+    Drops the instances in memory and reads the saved ones again.
+    """
+    FileStorage._FileStorage__objects = {}
+    storage.reload()
+
 
 class TestHBNBCommand_prompting(unittest.TestCase):
     """Unittests for testing prompting of the HBNB command interpreter."""
@@ -101,7 +166,9 @@ class TestHBNBCommand_help(unittest.TestCase):
     def test_help(self):
         h = ("Documented commands (type help <topic>):\n"
              "========================================\n"
-             "EOF  all  count  create  destroy  help  quit  show  update")
+             "EOF    commit  destroy  import   rollback  within_bbox  \n"
+             "all    count   export   nearest  show      within_radius\n"
+             "begin  create  help     quit     update")
         with patch("sys.stdout", new=StringIO()) as output:
             self.assertFalse(HBNBCommand().onecmd("help"))
             self.assertEqual(h, output.getvalue().strip())
@@ -124,22 +191,11 @@ class TestHBNBCommand_create(unittest.TestCase):
 
     @classmethod
     def setUp(self):
-        try:
-            os.rename("file.json", "tmp")
-        except IOError:
-            pass
-        FileStorage.__objects = {}
+        empty_storage()
 
     @classmethod
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
-        try:
-            os.rename("tmp", "file.json")
-        except IOError:
-            pass
+        restore_storage()
 
     def test_create_missing_class(self):
         correct = "** class name missing **"
@@ -200,28 +256,110 @@ class TestHBNBCommand_create(unittest.TestCase):
             testKey = "Review.{}".format(output.getvalue().strip())
             self.assertIn(testKey, storage.all().keys())
 
+    def test_create_does_not_add_BaseModel(self):
+        before = set(storage.all("BaseModel"))
+        with patch("sys.stdout", new=StringIO()):
+            self.assertFalse(HBNBCommand().onecmd("create User"))
+        self.assertLessEqual(set(storage.all("BaseModel")), before)
+
+    def test_create_registered_class(self):
+        class Listing(BaseModel):
+            pass
+
+        try:
+            with patch("sys.stdout", new=StringIO()) as output:
+                self.assertFalse(HBNBCommand().onecmd("create Listing"))
+            self.assertIs(Listing, type(
+                storage.get("Listing", output.getvalue().strip())))
+        finally:
+            del classes["Listing"]
+
+    def test_create_count(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            with patch.object(type(storage), "save") as save:
+                self.assertFalse(HBNBCommand().onecmd("create Place count=3"))
+                save.assert_called_once_with()
+        ids = output.getvalue().split()
+        self.assertEqual(3, len(set(ids)))
+        for id in ids:
+            place = storage.get("Place", id)
+            self.assertEqual(place.created_at, place.updated_at)
+            self.assertEqual(0, place.number_rooms)
+
+    def test_create_file(self):
+        with open("tmp_create.jsonl", "w") as f:
+            f.write('{"name": "Loft", "number_rooms": 2}\n'
+                    '\n'
+                    '[1, 2]\n'
+                    '{"name": "Cabin"}\n')
+        try:
+            with patch("sys.stdout", new=StringIO()) as output:
+                self.assertFalse(HBNBCommand().onecmd(
+                    "create Place file=tmp_create.jsonl"))
+        finally:
+            os.remove("tmp_create.jsonl")
+        lines = output.getvalue().splitlines()
+        self.assertEqual("** line 3: invalid record **", lines[0])
+        self.assertEqual(3, len(lines))
+        loft = storage.get("Place", lines[1])
+        self.assertEqual(("Loft", 2), (loft.name, loft.number_rooms))
+        self.assertEqual("Cabin", storage.get("Place", lines[2]).name)
+        reopen_storage()
+        self.assertIsNotNone(storage.get("Place", lines[2]))
+
+    def test_create_file_invalid_fields(self):
+        with open("tmp_create.jsonl", "w") as f:
+            f.write('{"id": 5}\n'
+                    '{"created_at": "bogus"}\n'
+                    '{"updated_at": 3}\n'
+                    '{"id": "1", "created_at": "2017-06-14T22:31:03"}\n')
+        try:
+            with patch("sys.stdout", new=StringIO()) as output:
+                self.assertFalse(HBNBCommand().onecmd(
+                    "create Place file=tmp_create.jsonl"))
+        finally:
+            os.remove("tmp_create.jsonl")
+        self.assertEqual(["** line 1: invalid record **",
+                          "** line 2: invalid record **",
+                          "** line 3: invalid record **", "1"],
+                         output.getvalue().splitlines())
+
+    def test_create_file_save_error(self):
+        with open("tmp_create.jsonl", "w") as f:
+            f.write('{"name": "Loft"}\n')
+        try:
+            with patch.object(type(storage), "save",
+                              side_effect=OSError("disk full")):
+                with patch("sys.stdout", new=StringIO()) as output:
+                    with self.assertRaises(OSError):
+                        HBNBCommand().onecmd(
+                            "create Place file=tmp_create.jsonl")
+        finally:
+            os.remove("tmp_create.jsonl")
+        self.assertNotIn("can't read", output.getvalue())
+
+    def test_create_invalid_option(self):
+        cases = [("create Place count=x", "** invalid count **"),
+                 ("create Place count=-1", "** invalid count **"),
+                 ("create Place size=3", "** invalid option **"),
+                 ("create Place file=tmp_missing.jsonl",
+                  "** can't read tmp_missing.jsonl **")]
+        for command, correct in cases:
+            with patch("sys.stdout", new=StringIO()) as output:
+                self.assertFalse(HBNBCommand().onecmd(command))
+                self.assertEqual(correct, output.getvalue().strip())
+
 
 class TestHBNBCommand_show(unittest.TestCase):
     """Unittests for testing show from the HBNB command interpreter"""
 
     @classmethod
     def setUp(self):
-        try:
-            os.rename("file.json", "tmp")
-        except IOError:
-            pass
-        FileStorage.__objects = {}
+        empty_storage()
 
     @classmethod
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
-        try:
-            os.rename("tmp", "file.json")
-        except IOError:
-            pass
+        restore_storage()
 
     def test_show_missing_class(self):
         correct = "** class name missing **"
@@ -459,22 +597,11 @@ class TestHBNBCommand_destroy(unittest.TestCase):
 
     @classmethod
     def setUp(self):
-        try:
-            os.rename("file.json", "tmp")
-        except IOError:
-            pass
-        FileStorage.__objects = {}
+        empty_storage()
 
     @classmethod
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
-        try:
-            os.rename("tmp", "file.json")
-        except IOError:
-            pass
+        restore_storage()
         storage.reload()
 
     def test_destroy_missing_class(self):
@@ -713,22 +840,11 @@ class TestHBNBCommand_all(unittest.TestCase):
 
     @classmethod
     def setUp(self):
-        try:
-            os.rename("file.json", "tmp")
-        except IOError:
-            pass
-        FileStorage.__objects = {}
+        empty_storage()
 
     @classmethod
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
-        try:
-            os.rename("tmp", "file.json")
-        except IOError:
-            pass
+        restore_storage()
 
     def test_all_invalid_class(self):
         correct = "** class doesn't exist **"
@@ -859,22 +975,11 @@ class TestHBNBCommand_update(unittest.TestCase):
 
     @classmethod
     def setUp(self):
-        try:
-            os.rename("file.json", "tmp")
-        except IOError:
-            pass
-        FileStorage.__objects = {}
+        empty_storage()
 
     @classmethod
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
-        try:
-            os.rename("tmp", "file.json")
-        except IOError:
-            pass
+        restore_storage()
 
     def test_update_missing_class(self):
         correct = "** class name missing **"
@@ -1508,22 +1613,11 @@ class TestHBNBCommand_count(unittest.TestCase):
 
     @classmethod
     def setUp(self):
-        try:
-            os.rename("file.json", "tmp")
-        except IOError:
-            pass
-        FileStorage._FileStorage__objects = {}
+        empty_storage()
 
     @classmethod
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
-        try:
-            os.rename("tmp", "file.json")
-        except IOError:
-            pass
+        restore_storage()
 
     def test_count_invalid_class(self):
         with patch("sys.stdout", new=StringIO()) as output:
@@ -1568,5 +1662,240 @@ class TestHBNBCommand_count(unittest.TestCase):
             self.assertEqual("1", output.getvalue().strip())
 
 
+class TestHBNBCommand_geo(unittest.TestCase):
+    """Unittests for testing the spatial commands of the HBNB console."""
+
+    def setUp(self):
+        empty_storage()
+        self.near = Place()
+        self.near.latitude = 37.77
+        self.near.longitude = -122.41
+        self.far = Place()
+        self.far.latitude = 40.71
+        self.far.longitude = -74.0
+
+    def tearDown(self):
+        restore_storage()
+
+    def test_nearest(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("nearest 37.7 -122.4"))
+            self.assertIn(self.near.id, output.getvalue())
+            self.assertNotIn(self.far.id, output.getvalue())
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("nearest 37.7 -122.4 2"))
+            self.assertIn(self.far.id, output.getvalue())
+
+    def test_within_radius(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(
+                HBNBCommand().onecmd("within_radius 37.78 -122.42 5"))
+            self.assertIn(self.near.id, output.getvalue())
+            self.assertNotIn(self.far.id, output.getvalue())
+
+    def test_within_bbox(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(
+                HBNBCommand().onecmd("within_bbox 40 -75 41 -73"))
+            self.assertIn(self.far.id, output.getvalue())
+            self.assertNotIn(self.near.id, output.getvalue())
+
+    def test_missing_coordinates(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("nearest 37.7"))
+            self.assertEqual("** coordinates missing **",
+                             output.getvalue().strip())
+
+    def test_invalid_coordinates(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("within_radius a b 5"))
+            self.assertEqual("** invalid coordinates **",
+                             output.getvalue().strip())
+
+
+class TestHBNBCommand_batch(unittest.TestCase):
+    """Unittests for testing batch mode of the HBNB console."""
+
+    def setUp(self):
+        empty_storage()
+
+    def tearDown(self):
+        restore_storage()
+
+    @unittest.skipUnless(isinstance(storage, FileStorage),
+                         "counts the writes of FileStorage")
+    def test_batch_saves_once(self):
+        lines = ["create User", "create State", "count User"]
+        with patch("sys.stdout", new=StringIO()) as output:
+            with patch.object(FileStorage, "flush") as flush:
+                self.assertEqual(0, HBNBCommand().batch(lines))
+                flush.assert_called_once_with()
+        printed = output.getvalue().splitlines()
+        self.assertEqual(3, len(printed))
+        self.assertEqual("1", printed[2])
+        self.assertIsNotNone(storage.get("User", printed[0]))
+
+    def test_batch_writes_file(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().batch(["create Place", "",  "# a comment"])
+        reopen_storage()
+        self.assertIsNotNone(storage.get("Place", output.getvalue().strip()))
+
+    def test_batch_errors(self):
+        lines = ["create User", "create MyModel", "show User 1234"]
+        with patch("sys.stdout", new=StringIO()) as output:
+            with patch("sys.stderr", new=StringIO()) as errors:
+                self.assertEqual(2, HBNBCommand().batch(lines, "cmds"))
+        self.assertEqual(1, len(output.getvalue().splitlines()))
+        self.assertEqual(
+            "cmds:2: create MyModel: ** class doesn't exist **\n"
+            "cmds:3: show User 1234: ** no instance found **\n",
+            errors.getvalue())
+
+    def test_batch_exception(self):
+        with patch("sys.stdout", new=StringIO()):
+            with patch("sys.stderr", new=StringIO()) as errors:
+                with patch.object(HBNBCommand, "do_count",
+                                  side_effect=KeyError("x")):
+                    self.assertEqual(1, HBNBCommand().batch(["count"]))
+        self.assertEqual("<batch>:1: count: ** KeyError: 'x' **",
+                         errors.getvalue().strip())
+
+    def test_batch_quit(self):
+        lines = ["create User", "quit", "create User"]
+        with patch("sys.stdout", new=StringIO()):
+            HBNBCommand().batch(lines)
+        self.assertEqual(1, storage.count("User"))
+
+    def test_batch_missing_file(self):
+        run = subprocess.run([sys.executable, "console.py", "--batch",
+                              "tmp_missing.cmds"], capture_output=True,
+                             text=True)
+        self.assertEqual(1, run.returncode)
+        self.assertEqual("** can't read tmp_missing.cmds **",
+                         run.stderr.strip())
+
+    @unittest.skipUnless(isinstance(storage, FileStorage),
+                         "counts the writes of FileStorage")
+    def test_deferred_nested(self):
+        with patch.object(FileStorage, "flush") as flush:
+            with storage.deferred():
+                with storage.deferred():
+                    storage.save()
+                flush.assert_not_called()
+            flush.assert_called_once_with()
+        with patch.object(FileStorage, "flush") as flush:
+            with storage.deferred():
+                pass
+            flush.assert_not_called()
+
+
+class TestHBNBCommand_transaction(unittest.TestCase):
+    """Unittests for testing transactions in the HBNB console."""
+
+    def setUp(self):
+        empty_storage()
+
+    def tearDown(self):
+        try:
+            storage.rollback()
+        except RuntimeError:
+            pass
+        restore_storage()
+
+    def test_commit(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("begin"))
+            self.assertFalse(HBNBCommand().onecmd("create User"))
+            if isinstance(storage, FileStorage):
+                self.assertFalse(os.path.exists("file.json"))
+            self.assertFalse(HBNBCommand().onecmd("commit"))
+            user_id = output.getvalue().strip()
+        reopen_storage()
+        self.assertIsNotNone(storage.get("User", user_id))
+
+    def test_rollback(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("create Place")
+            place_id = output.getvalue().strip()
+        with patch("sys.stdout", new=StringIO()):
+            self.assertFalse(HBNBCommand().onecmd("begin"))
+            HBNBCommand().onecmd("create Review")
+            HBNBCommand().onecmd("update Place {} name Loft".format(place_id))
+            HBNBCommand().onecmd("destroy Place {}".format(place_id))
+            self.assertFalse(HBNBCommand().onecmd("rollback"))
+        self.assertEqual(0, storage.count("Review"))
+        self.assertEqual("", storage.get("Place", place_id).name)
+
+    def test_begin_twice(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("begin"))
+            self.assertFalse(HBNBCommand().onecmd("begin"))
+            self.assertEqual("** transaction already open **",
+                             output.getvalue().strip())
+
+    def test_no_transaction(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("commit"))
+            self.assertFalse(HBNBCommand().onecmd("rollback"))
+            self.assertEqual("** no transaction open **\n"
+                             "** no transaction open **",
+                             output.getvalue().strip())
+
+
+class TestHBNBCommand_transfer(unittest.TestCase):
+    """Unittests for testing import and export in the HBNB console."""
+
+    def setUp(self):
+        empty_storage()
+
+    def tearDown(self):
+        try:
+            os.remove("tmp_places.csv")
+        except IOError:
+            pass
+        restore_storage()
+
+    def test_export_and_import(self):
+        place = Place()
+        place.name = "Loft"
+        place.number_rooms = 3
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(
+                HBNBCommand().onecmd("export Place tmp_places.csv"))
+            self.assertEqual("1", output.getvalue().strip())
+        storage.delete(place)
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(
+                HBNBCommand().onecmd("import Place tmp_places.csv"))
+            self.assertEqual("1", output.getvalue().strip())
+        imported = storage.get("Place", place.id)
+        self.assertEqual(("Loft", 3),
+                         (imported.name, imported.number_rooms))
+
+    def test_import_save_error(self):
+        with open("tmp_places.csv", "w") as f:
+            f.write("name\nLoft\n")
+        error = OSError(28, "No space left on device", "file.json.tmp")
+        with patch.object(type(storage), "save", side_effect=error):
+            with patch("sys.stdout", new=StringIO()) as output:
+                with self.assertRaises(OSError):
+                    HBNBCommand().onecmd("import Place tmp_places.csv")
+        self.assertNotIn("can't read", output.getvalue())
+
+    def test_errors(self):
+        cases = [("export", "** class name missing **"),
+                 ("import MyModel a.csv", "** class doesn't exist **"),
+                 ("export Place", "** file path missing **"),
+                 ("export Place tmp_places.txt",
+                  "** Unknown record format: tmp_places.txt **"),
+                 ("import Place tmp_missing.csv",
+                  "** can't read tmp_missing.csv **")]
+        for command, correct in cases:
+            with patch("sys.stdout", new=StringIO()) as output:
+                self.assertFalse(HBNBCommand().onecmd(command))
+                self.assertEqual(correct, output.getvalue().strip())
+
+
 if __name__ == "__main__":
     unittest.main()
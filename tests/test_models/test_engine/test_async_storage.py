@@ -0,0 +1,171 @@
+#!/usr/bin/python3
+
+""" Define unittests models/engine/async_storage.py
+
+Unittest classes:
+    TestAsyncStorage_methods
+"""
+
+import os
+import json
+import time
+import asyncio
+import models
+import unittest
+from unittest.mock import patch
+from models.base_model import BaseModel
+from models.engine.file_storage import FileStorage
+from models.user import User
+from models.state import State
+
+
+class TestAsyncStorage_methods(unittest.TestCase):
+    """Unittests for testing the async methods of the storage."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_asave(self):
+        bm = BaseModel()
+        asyncio.run(models.storage.asave())
+        with open("file.json", "r") as f:
+            self.assertIn("BaseModel." + bm.id, json.load(f))
+
+    def test_asave_in_transaction(self):
+        with models.storage.transaction():
+            bm = BaseModel()
+            asyncio.run(asyncio.wait_for(models.storage.asave(), 5))
+            self.assertFalse(os.path.exists("file.json"))
+        with open("file.json", "r") as f:
+            self.assertIn("BaseModel." + bm.id, json.load(f))
+
+    def test_asave_in_write_behind_mode(self):
+        models.storage.set_write_behind(True, interval=60)
+        try:
+            bm = BaseModel()
+            bm.save()
+            asyncio.run(models.storage.asave())
+            with open("file.json", "r") as f:
+                self.assertIn("BaseModel." + bm.id, json.load(f))
+        finally:
+            models.storage.set_write_behind(False)
+
+    def test_asave_coalesces(self):
+        flush = FileStorage.flush
+        calls = []
+
+        def slow_flush(storage):
+            calls.append(1)
+            time.sleep(0.05)
+            flush(storage)
+
+        async def main():
+            for i in range(10):
+                BaseModel()
+                await asyncio.gather(*(models.storage.asave()
+                                       for j in range(10)))
+
+        with patch.object(FileStorage, "flush", slow_flush):
+            asyncio.run(main())
+        self.assertEqual(10, len(calls))
+        with open("file.json", "r") as f:
+            self.assertEqual(10, len(json.load(f)))
+
+    def test_asave_coalesces_while_writing(self):
+        flush = FileStorage.flush
+        calls = []
+
+        def slow_flush(storage):
+            calls.append(len(FileStorage._FileStorage__objects))
+            time.sleep(0.1)
+            flush(storage)
+
+        async def main():
+            BaseModel()
+            first = asyncio.ensure_future(models.storage.asave())
+            await asyncio.sleep(0.02)
+            for i in range(5):
+                BaseModel()
+            await asyncio.gather(first, *(models.storage.asave()
+                                          for i in range(5)))
+
+        with patch.object(FileStorage, "flush", slow_flush):
+            asyncio.run(main())
+        self.assertEqual([1, 6], calls)
+        with open("file.json", "r") as f:
+            self.assertEqual(6, len(json.load(f)))
+
+    def test_asave_error(self):
+        async def main():
+            return await asyncio.gather(models.storage.asave(),
+                                        models.storage.asave(),
+                                        return_exceptions=True)
+
+        with patch.object(FileStorage, "flush", side_effect=OSError):
+            errors = asyncio.run(main())
+        self.assertEqual(2, len(errors))
+        self.assertIsInstance(errors[0], OSError)
+        self.assertIs(errors[0], errors[1])
+
+    def test_asave_does_not_block_the_loop(self):
+        flush = FileStorage.flush
+        ticks = []
+
+        def slow_flush(storage):
+            time.sleep(0.2)
+            flush(storage)
+
+        async def tick():
+            for i in range(5):
+                ticks.append(i)
+                await asyncio.sleep(0.01)
+
+        async def main():
+            BaseModel()
+            await asyncio.gather(models.storage.asave(), tick())
+
+        with patch.object(FileStorage, "flush", slow_flush):
+            asyncio.run(main())
+        self.assertEqual(5, len(ticks))
+
+    def test_aget(self):
+        us = User()
+        self.assertIs(us, asyncio.run(models.storage.aget(User, us.id)))
+        self.assertIsNone(asyncio.run(models.storage.aget(User, "1234")))
+
+    def test_aall(self):
+        us = User()
+        st = State()
+
+        async def collect(cls=None):
+            return [obj async for obj in models.storage.aall(cls, batch=1)]
+
+        self.assertCountEqual([us, st], asyncio.run(collect()))
+        self.assertEqual([st], asyncio.run(collect(State)))
+
+    def test_areload(self):
+        us = User()
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        asyncio.run(models.storage.areload(lazy=True))
+        self.assertEqual(us.id, models.storage.get(User, us.id).id)
+
+
+if __name__ == "__main__":
+    unittest.main()
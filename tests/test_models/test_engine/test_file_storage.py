@@ -5,14 +5,28 @@
 Unittest classes:
     TestFileStorage_instantiation
     TestFileStorage_methods
+    TestFileStorage_journal
+    TestFileStorage_dirty
+    TestFileStorage_lazy
+    TestFileStorage_binary
+    TestFileStorage_atomic
+    TestFileStorage_processes
+    TestFileStorage_threads
+    TestFileStorage_write_behind
+    TestFileStorage_transaction
 """
 
 import os
+import sys
 import json
+import subprocess
+import threading
+import time
 import models
 import unittest
+from unittest.mock import patch
 from datetime import datetime
-from models.base_model import BaseModel
+from models.base_model import BaseModel, classes
 from models.engine.file_storage import FileStorage
 from models.user import User
 from models.state import State
@@ -40,6 +54,11 @@ class TestFileStorage_instantiation(unittest.TestCase):
     def test_storage_initializes(self):
         self.assertEqual(type(models.storage), FileStorage)
 
+    def test_FileStorage_instantiation_does_not_reload(self):
+        with patch.object(FileStorage, "reload") as reload:
+            FileStorage()
+            reload.assert_not_called()
+
 class TestFileStorage_methods(unittest.TestCase):
     """Unittests for testing methods of the FileStorage class."""
 
@@ -67,7 +86,95 @@ class TestFileStorage_methods(unittest.TestCase):
 
     def test_all_with_arg(self):
         with self.assertRaises(TypeError):
-            models.storage.all(None)
+            models.storage.all(None, None)
+
+    def test_all_with_cls(self):
+        bm = BaseModel()
+        us = User()
+        self.assertEqual({"User." + us.id: us}, models.storage.all(User))
+        self.assertEqual({"User." + us.id: us}, models.storage.all("User"))
+        self.assertEqual({}, models.storage.all("MyModel"))
+
+    def test_all_with_cls_after_delete(self):
+        us = User()
+        models.storage.delete(us)
+        self.assertEqual({}, models.storage.all(User))
+
+    def test_all_with_cls_after_objects_replaced(self):
+        us = User()
+        FileStorage._FileStorage__objects = {}
+        self.assertEqual({}, models.storage.all(User))
+
+    def test_count(self):
+        BaseModel()
+        User()
+        User()
+        self.assertEqual(3, models.storage.count())
+        self.assertEqual(2, models.storage.count(User))
+        self.assertEqual(1, models.storage.count("BaseModel"))
+        self.assertEqual(0, models.storage.count("MyModel"))
+
+    def test_find_indexed_attribute(self):
+        pl1 = Place()
+        pl2 = Place()
+        rv1 = Review()
+        rv1.place_id = pl1.id
+        rv2 = Review()
+        rv2.place_id = pl1.id
+        rv3 = Review()
+        rv3.place_id = pl2.id
+        found = models.storage.find(Review, place_id=pl1.id)
+        self.assertCountEqual([rv1, rv2], found)
+        self.assertEqual([rv3], models.storage.find("Review",
+                                                    place_id=pl2.id))
+
+    def test_find_after_update(self):
+        cy = City()
+        cy.state_id = "1234"
+        cy.state_id = "5678"
+        self.assertEqual([], models.storage.find(City, state_id="1234"))
+        self.assertEqual([cy], models.storage.find(City, state_id="5678"))
+
+    def test_find_after_delete(self):
+        cy = City()
+        cy.state_id = "1234"
+        models.storage.delete(cy)
+        self.assertEqual([], models.storage.find(City, state_id="1234"))
+
+    def test_find_mixed_attributes(self):
+        rv1 = Review()
+        rv1.place_id = "1234"
+        rv1.user_id = "abcd"
+        rv2 = Review()
+        rv2.place_id = "1234"
+        rv2.text = "Nice"
+        self.assertEqual([rv2], models.storage.find(Review, place_id="1234",
+                                                    text="Nice"))
+        self.assertEqual([rv1], models.storage.find(Review, user_id="abcd"))
+
+    def test_find_unhashable_value(self):
+        pl1 = Place()
+        pl1.city_id = "1234"
+        pl1.city_id = ["1234"]
+        pl2 = Place()
+        pl2.city_id = "1234"
+        self.assertEqual([pl2], models.storage.find(Place, city_id="1234"))
+        self.assertEqual([pl1], models.storage.find(Place,
+                                                    city_id=["1234"]))
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        found = models.storage.find(Place, city_id=["1234"])
+        self.assertEqual([pl1.id], [obj.id for obj in found])
+
+    def test_find_after_reload(self):
+        cy = City()
+        cy.state_id = "1234"
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        found = models.storage.find(City, state_id="1234")
+        self.assertEqual([cy.id], [obj.id for obj in found])
 
     def test_new(self):
         bm = BaseModel()
@@ -99,6 +206,56 @@ class TestFileStorage_methods(unittest.TestCase):
         self.assertIn("Review." + rv.id, models.storage.all().keys())
         self.assertIn(rv, models.storage.all().values())
 
+    def test_new_many(self):
+        objs = [User() for i in range(5)] + [State() for i in range(3)]
+        FileStorage._FileStorage__objects = {}
+        models.storage.new_many(objs)
+        self.assertEqual(8, models.storage.count())
+        self.assertEqual(5, models.storage.count(User))
+        for obj in objs:
+            key = "{}.{}".format(type(obj).__name__, obj.id)
+            self.assertIs(obj, models.storage.all()[key])
+
+    def test_kwargs_instance_registered_once(self):
+        us = User()
+        FileStorage._FileStorage__objects = {}
+        with patch.object(FileStorage, "new_many") as new_many:
+            copy = User(**us.to_dict())
+            new_many.assert_called_once_with((copy,))
+
+    def test_filter_places(self):
+        pl1 = Place()
+        pl1.price_by_night = 80
+        pl1.max_guest = 4
+        pl2 = Place()
+        pl2.price_by_night = 120
+        pl2.max_guest = 2
+        pl3 = Place()
+        pl3.price_by_night = 90
+        pl3.max_guest = 6
+        found = models.storage.filter_places(price_max=100, min_guests=3)
+        self.assertCountEqual([pl1, pl3], found)
+        pl3.price_by_night = 150
+        models.storage.delete(pl1)
+        self.assertEqual([], models.storage.filter_places(price_max=100,
+                                                          min_guests=3))
+
+    def test_spatial_queries(self):
+        pl1 = Place()
+        pl1.latitude = 37.77
+        pl1.longitude = -122.41
+        pl2 = Place()
+        pl2.latitude = 37.80
+        pl2.longitude = -122.27
+        self.assertEqual([pl1, pl2], models.storage.nearest(37.7, -122.4, 2))
+        self.assertEqual([pl1], models.storage.within_radius(37.7, -122.4,
+                                                             10))
+        self.assertEqual([pl2], models.storage.within_bbox(37.79, -122.3,
+                                                           37.81, -122.2))
+        pl1.latitude = 37.80
+        pl1.longitude = -122.26
+        self.assertEqual([], models.storage.within_radius(37.7, -122.4, 10))
+
     def test_new_with_args(self):
         with self.assertRaises(TypeError):
             models.storage.new(BaseModel(), 1)
@@ -164,6 +321,23 @@ class TestFileStorage_methods(unittest.TestCase):
         self.assertIn("Amenity." + am.id, objs)
         self.assertIn("Review." + rv.id, objs)
 
+    def test_reload_registered_class(self):
+        class Listing(BaseModel):
+            rating = 0
+
+        try:
+            self.assertIs(Listing, classes["Listing"])
+            ls = Listing()
+            ls.rating = 5
+            models.storage.save()
+            FileStorage._FileStorage__objects = {}
+            models.storage.reload()
+            reloaded = models.storage.get("Listing", ls.id)
+            self.assertIs(Listing, type(reloaded))
+            self.assertEqual(5, reloaded.rating)
+        finally:
+            del classes["Listing"]
+
     def test_reload_no_file(self):
         with self.assertRaises(FileNotFoundError):
             models.storage.reload()
@@ -173,5 +347,786 @@ class TestFileStorage_methods(unittest.TestCase):
             models.storage.reload(None)
 
 
+class TestFileStorage_journal(unittest.TestCase):
+    """Unittests for testing journal mode of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        models.storage.set_journal(True, 10)
+        models.storage.compact()
+
+    def tearDown(self):
+        models.storage.set_journal(False)
+        for name in ("file.json", "file.json.journal"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_save_appends_only_changes(self):
+        bm = BaseModel()
+        models.storage.new(bm)
+        models.storage.save()
+        us = User()
+        models.storage.new(us)
+        models.storage.save()
+        with open("file.json.journal", "r") as f:
+            lines = f.readlines()
+        self.assertEqual(2, len(lines))
+        self.assertIn("BaseModel." + bm.id, lines[0])
+        self.assertIn("User." + us.id, lines[1])
+        with open("file.json", "r") as f:
+            self.assertEqual({}, json.load(f))
+
+    def test_reload_replays_journal(self):
+        bm = BaseModel()
+        us = User()
+        models.storage.new(bm)
+        models.storage.new(us)
+        models.storage.save()
+        bm.name = "Holberton"
+        bm.save()
+        models.storage.delete(us)
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        objs = FileStorage._FileStorage__objects
+        self.assertIn("BaseModel." + bm.id, objs)
+        self.assertEqual("Holberton", objs["BaseModel." + bm.id].name)
+        self.assertNotIn("User." + us.id, objs)
+
+    def test_reload_ignores_torn_last_line(self):
+        bm = BaseModel()
+        models.storage.new(bm)
+        models.storage.save()
+        with open("file.json.journal", "a") as f:
+            f.write('{"key": "User.1", "val')
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        objs = FileStorage._FileStorage__objects
+        self.assertIn("BaseModel." + bm.id, objs)
+        self.assertNotIn("User.1", objs)
+
+    def test_compaction_rewrites_snapshot(self):
+        objs = [BaseModel() for i in range(12)]
+        for obj in objs:
+            models.storage.new(obj)
+            models.storage.save()
+        with open("file.json.journal", "r") as f:
+            self.assertLess(len(f.readlines()), 10)
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        for obj in objs:
+            self.assertIn("BaseModel." + obj.id,
+                          FileStorage._FileStorage__objects)
+
+
+class TestFileStorage_dirty(unittest.TestCase):
+    """Unittests for testing dirty tracking of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_new_instance_is_dirty(self):
+        us = User()
+        self.assertIn("User." + us.id, FileStorage._FileStorage__changes)
+
+    def test_setattr_marks_dirty(self):
+        us = User()
+        models.storage.save()
+        self.assertEqual({}, FileStorage._FileStorage__changes)
+        us.first_name = "Betty"
+        self.assertIs(us, FileStorage._FileStorage__changes["User." + us.id])
+
+    def test_save_encodes_only_dirty(self):
+        us = User()
+        st = State()
+        models.storage.save()
+        us.first_name = "Betty"
+        with patch.object(State, "to_dict") as st_to_dict:
+            models.storage.save()
+            st_to_dict.assert_not_called()
+        with open("file.json", "r") as f:
+            objs = json.load(f)
+        self.assertEqual("Betty", objs["User." + us.id]["first_name"])
+        self.assertEqual(st.id, objs["State." + st.id]["id"])
+
+    def test_list_attributes_are_reencoded(self):
+        pl = Place()
+        pl.amenity_ids = []
+        models.storage.save()
+        pl.amenity_ids.append("1234")
+        models.storage.save()
+        with open("file.json", "r") as f:
+            objs = json.load(f)
+        self.assertEqual(["1234"], objs["Place." + pl.id]["amenity_ids"])
+
+
+class TestFileStorage_lazy(unittest.TestCase):
+    """Unittests for testing lazy reload of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.us = User()
+        self.st = State()
+        self.st.name = "California"
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload(lazy=True)
+
+    def tearDown(self):
+        FileStorage._FileStorage__raw = {}
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_reload_builds_no_instance(self):
+        self.assertEqual({}, FileStorage._FileStorage__objects)
+        self.assertEqual(2, models.storage.count())
+        self.assertEqual(1, models.storage.count(User))
+
+    def test_get_builds_one_instance(self):
+        st = models.storage.get(State, self.st.id)
+        self.assertEqual("California", st.name)
+        self.assertIs(st, models.storage.get("State", self.st.id))
+        self.assertEqual(["State." + self.st.id],
+                         list(FileStorage._FileStorage__objects))
+        self.assertEqual({}, FileStorage._FileStorage__changes)
+
+    def test_get_missing(self):
+        self.assertIsNone(models.storage.get(State, "1234"))
+
+    def test_all_with_cls_builds_class(self):
+        self.assertEqual(["User." + self.us.id],
+                         list(models.storage.all(User)))
+        self.assertNotIn("State." + self.st.id,
+                         FileStorage._FileStorage__objects)
+
+    def test_all_builds_everything(self):
+        self.assertEqual(2, len(models.storage.all()))
+
+    def test_save_keeps_unbuilt_records(self):
+        bm = BaseModel()
+        models.storage.save()
+        with open("file.json", "r") as f:
+            objs = json.load(f)
+        self.assertEqual({"BaseModel." + bm.id, "User." + self.us.id,
+                          "State." + self.st.id}, set(objs))
+        self.assertEqual("California", objs["State." + self.st.id]["name"])
+
+
+class TestFileStorage_binary(unittest.TestCase):
+    """Unittests for testing the binary snapshot of the FileStorage class."""
+
+    def setUp(self):
+        FileStorage._FileStorage__objects = {}
+        models.storage.set_path("tmp_file.hbnb")
+
+    def tearDown(self):
+        models.storage.set_path("file.json")
+        FileStorage._FileStorage__raw = {}
+        try:
+            os.remove("tmp_file.hbnb")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_save_reload(self):
+        pl = Place()
+        pl.name = "Loft"
+        pl.price_by_night = 120
+        pl.amenity_ids = ["1234"]
+        us = User()
+        models.storage.save()
+        with open("tmp_file.hbnb", "rb") as f:
+            self.assertEqual(b"HBNB", f.read(4))
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        reloaded = models.storage.get(Place, pl.id)
+        self.assertEqual(pl.to_dict(), reloaded.to_dict())
+        self.assertEqual(us.created_at,
+                         models.storage.get(User, us.id).created_at)
+
+    def test_lazy_reload(self):
+        st = State()
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload(lazy=True)
+        self.assertEqual(1, models.storage.count(State))
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual(st.to_dict(),
+                         models.storage.get(State, st.id).to_dict())
+
+    def test_format_overrides_extension(self):
+        models.storage.set_path("tmp_file.hbnb", "json")
+        bm = BaseModel()
+        models.storage.save()
+        with open("tmp_file.hbnb", "r") as f:
+            self.assertIn("BaseModel." + bm.id, json.load(f))
+
+
+class TestFileStorage_atomic(unittest.TestCase):
+    """Unittests for testing crash safety of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        for name in ("file.json", "file.json.tmp", "file.json.damaged"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_save_leaves_no_temporary_file(self):
+        BaseModel()
+        models.storage.save()
+        self.assertTrue(os.path.exists("file.json"))
+        self.assertFalse(os.path.exists("file.json.tmp"))
+
+    def test_interrupted_save_keeps_previous_file(self):
+        bm = BaseModel()
+        models.storage.save()
+        BaseModel()
+        with patch("os.replace", side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                models.storage.save()
+        self.assertTrue(os.path.exists("file.json.tmp"))
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertFalse(os.path.exists("file.json.tmp"))
+        self.assertEqual(["BaseModel." + bm.id], list(models.storage.all()))
+
+    def test_reload_truncated_file(self):
+        bm = BaseModel()
+        models.storage.save()
+        User()
+        models.storage.save()
+        with open("file.json", "r") as f:
+            text = f.read()
+        text = text[:text.index('"User.') + 10]
+        with open("file.json", "w") as f:
+            f.write(text)
+        FileStorage._FileStorage__objects = {}
+        with self.assertWarns(RuntimeWarning):
+            models.storage.reload()
+        self.assertEqual(["BaseModel." + bm.id], list(models.storage.all()))
+        with open("file.json.damaged", "r") as f:
+            self.assertEqual(text, f.read())
+        with open("file.json", "r") as f:
+            self.assertEqual(["BaseModel." + bm.id], list(json.load(f)))
+
+    def test_reload_skips_a_bad_record(self):
+        first, bad, last = BaseModel(), User(), State()
+        models.storage.save()
+        with open("file.json", "r") as f:
+            records = json.load(f)
+        records["User." + bad.id]["updated_at"] = "bogus"
+        with open("file.json", "w") as f:
+            json.dump(records, f)
+        FileStorage._FileStorage__objects = {}
+        with self.assertWarns(RuntimeWarning):
+            models.storage.reload()
+        self.assertFalse(os.path.exists("file.json.damaged"))
+        self.assertEqual(["BaseModel." + first.id, "State." + last.id],
+                         list(models.storage.all()))
+
+
+class TestFileStorage_processes(unittest.TestCase):
+    """Unittests for testing FileStorage shared between processes."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+
+    def tearDown(self):
+        models.storage.set_journal(False)
+        for name in ("file.json", "file.json.journal"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def other_process(self, code):
+        """ runs code in another process using the same file """
+        script = ("import sys; sys.path.insert(0, {!r}); import models; "
+                  "from models.user import User; {}").format(os.getcwd(), code)
+        subprocess.run([sys.executable, "-c", script], check=True)
+
+    def test_save_merges_other_process(self):
+        us = User()
+        models.storage.save()
+        self.other_process("User().save()")
+        bm = BaseModel()
+        models.storage.save()
+        with open("file.json", "r") as f:
+            objs = json.load(f)
+        self.assertEqual(3, len(objs))
+        self.assertIn("User." + us.id, objs)
+        self.assertIn("BaseModel." + bm.id, objs)
+        self.assertEqual(2, models.storage.count(User))
+
+    def test_merge_keeps_local_changes(self):
+        us = User()
+        us.first_name = "Betty"
+        models.storage.save()
+        self.other_process(
+            "us = models.storage.get(User, {!r}); us.first_name = 'Bob'; "
+            "us.last_name = 'Dylan'; us.save()".format(us.id))
+        models.storage.refresh()
+        self.assertEqual("Bob", models.storage.get(User, us.id).first_name)
+        models.storage.get(User, us.id).first_name = "Holberton"
+        self.other_process(
+            "us = models.storage.get(User, {!r}); us.last_name = 'Dylan 2';"
+            " us.save()".format(us.id))
+        models.storage.save()
+        with open("file.json", "r") as f:
+            record = json.load(f)["User." + us.id]
+        self.assertEqual("Holberton", record["first_name"])
+
+    def test_merge_keeps_references_attached(self):
+        st = State()
+        models.storage.save()
+        self.other_process(
+            "from models.state import State; "
+            "st = models.storage.get(State, {!r}); st.name = 'CA'; "
+            "st.save()".format(st.id))
+        models.storage.save()
+        self.assertEqual("CA", st.name)
+        self.assertIs(st, models.storage.get(State, st.id))
+        st.name = "NV"
+        models.storage.save()
+        with open("file.json", "r") as f:
+            self.assertEqual("NV", json.load(f)["State." + st.id]["name"])
+
+    def test_merge_deletes(self):
+        us = User()
+        models.storage.save()
+        self.other_process(
+            "models.storage.delete(models.storage.get(User, {!r})); "
+            "models.storage.save()".format(us.id))
+        models.storage.refresh()
+        self.assertIsNone(models.storage.get(User, us.id))
+
+    def test_refresh_reads_new_journal_entries(self):
+        models.storage.set_journal(True)
+        us = User()
+        models.storage.save()
+        self.other_process(
+            "models.storage.set_journal(True); "
+            "us = models.storage.get(User, {!r}); us.first_name = 'Bob'; "
+            "us.save()".format(us.id))
+        stamp = FileStorage._FileStorage__stamp
+        models.storage.refresh()
+        self.assertEqual(stamp, FileStorage._FileStorage__stamp)
+        self.assertEqual("Bob", models.storage.get(User, us.id).first_name)
+
+    def test_concurrent_writers(self):
+        code = "\n".join([
+            "import sys; sys.path.insert(0, {!r})".format(os.getcwd()),
+            "import models",
+            "from models.user import User",
+            "for i in range(20):",
+            "    User().save()"])
+        writers = [subprocess.Popen([sys.executable, "-c", code])
+                   for i in range(4)]
+        for writer in writers:
+            self.assertEqual(0, writer.wait())
+        with open("file.json", "r") as f:
+            self.assertEqual(80, len(json.load(f)))
+
+
+class TestFileStorage_threads(unittest.TestCase):
+    """Unittests for testing FileStorage shared between threads."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_concurrent_new_and_save(self):
+        errors = []
+
+        def create():
+            try:
+                for i in range(200):
+                    pl = Place()
+                    pl.latitude = i / 10
+                    if i % 50 == 0:
+                        models.storage.save()
+            except Exception as error:
+                errors.append(error)
+
+        def read():
+            try:
+                for i in range(200):
+                    for obj in models.storage.all().values():
+                        obj.to_dict()
+                    models.storage.count(Place)
+                    models.storage.nearest(1.0, 0.0)
+            except Exception as error:
+                errors.append(error)
+        threads = [threading.Thread(target=create) for i in range(4)]
+        threads.append(threading.Thread(target=read))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([], errors)
+        models.storage.save()
+        with open("file.json", "r") as f:
+            self.assertEqual(800, len(json.load(f)))
+        self.assertEqual(800, models.storage.count(Place))
+
+    def test_save_does_not_block_new(self):
+        BaseModel()
+        writing = threading.Event()
+        created = threading.Event()
+        write = FileStorage._FileStorage__serializer.write
+
+        def slow_write(file, fragments):
+            writing.set()
+            created.wait(5)
+            write(file, fragments)
+        with patch.object(FileStorage._FileStorage__serializer, "write",
+                          slow_write):
+            saver = threading.Thread(target=models.storage.save)
+            saver.start()
+            writing.wait(5)
+            bm = BaseModel()
+            created.set()
+            saver.join()
+        self.assertIn("BaseModel." + bm.id,
+                      FileStorage._FileStorage__changes)
+        models.storage.save()
+        with open("file.json", "r") as f:
+            self.assertIn("BaseModel." + bm.id, json.load(f))
+
+    def test_failed_save_keeps_changes(self):
+        bm = BaseModel()
+        with patch("os.replace", side_effect=OSError):
+            with self.assertRaises(OSError):
+                models.storage.save()
+        self.assertIn("BaseModel." + bm.id,
+                      FileStorage._FileStorage__changes)
+
+
+class TestFileStorage_write_behind(unittest.TestCase):
+    """Unittests for testing write-behind mode of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+
+    def tearDown(self):
+        models.storage.set_write_behind(False)
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_save_is_deferred(self):
+        models.storage.set_write_behind(True, interval=60)
+        bm = BaseModel()
+        bm.save()
+        self.assertFalse(os.path.exists("file.json"))
+        models.storage.flush()
+        with open("file.json", "r") as f:
+            self.assertIn("BaseModel." + bm.id, json.load(f))
+
+    def test_flush_on_interval(self):
+        models.storage.set_write_behind(True, interval=0.05)
+        bm = BaseModel()
+        bm.save()
+        for i in range(100):
+            if os.path.exists("file.json"):
+                break
+            time.sleep(0.05)
+        with open("file.json", "r") as f:
+            self.assertIn("BaseModel." + bm.id, json.load(f))
+
+    def test_flush_on_threshold(self):
+        models.storage.set_write_behind(True, interval=60, threshold=5)
+        for i in range(5):
+            BaseModel().save()
+        for i in range(100):
+            if os.path.exists("file.json"):
+                break
+            time.sleep(0.05)
+        with open("file.json", "r") as f:
+            self.assertEqual(5, len(json.load(f)))
+
+    def test_turning_off_flushes(self):
+        models.storage.set_write_behind(True, interval=60)
+        bm = BaseModel()
+        bm.save()
+        models.storage.set_write_behind(False)
+        self.assertIsNone(FileStorage._FileStorage__flusher)
+        with open("file.json", "r") as f:
+            self.assertIn("BaseModel." + bm.id, json.load(f))
+
+    def test_flush_on_exit(self):
+        script = ("import sys; sys.path.insert(0, {!r}); import models; "
+                  "from models.user import User; "
+                  "models.storage.set_write_behind(True, interval=60); "
+                  "User().save()").format(os.getcwd())
+        subprocess.run([sys.executable, "-c", script], check=True)
+        with open("file.json", "r") as f:
+            self.assertEqual(1, len(json.load(f)))
+
+
+class TestFileStorage_transaction(unittest.TestCase):
+    """Unittests for testing transactions of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.pl = Place()
+        self.pl.amenity_ids = ["1"]
+        self.us = User()
+        models.storage.save()
+
+    def tearDown(self):
+        try:
+            models.storage.rollback()
+        except RuntimeError:
+            pass
+        models.storage.set_journal(False)
+        FileStorage._FileStorage__raw = {}
+        for name in ("file.json", "file.json.journal"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_commit_writes_once(self):
+        with patch.object(FileStorage, "flush") as flush:
+            with models.storage.transaction():
+                Review().save()
+                self.pl.name = "Loft"
+                self.pl.save()
+                flush.assert_not_called()
+            flush.assert_called_once_with()
+
+    def test_rollback(self):
+        models.storage.begin()
+        rv = Review()
+        rv.save()
+        self.pl.name = "Loft"
+        self.pl.amenity_ids.append("2")
+        models.storage.delete(self.us)
+        models.storage.save()
+        models.storage.rollback()
+        self.assertFalse(os.path.exists("file.json.journal"))
+        self.assertIsNone(models.storage.get(Review, rv.id))
+        self.assertIs(self.us, models.storage.get(User, self.us.id))
+        self.assertNotIn("name", self.pl.__dict__)
+        self.assertEqual(["1"], self.pl.amenity_ids)
+        self.assertEqual([self.pl], models.storage.find(Place, name=""))
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual(2, models.storage.count())
+
+    def test_transaction_rolls_back_on_error(self):
+        with self.assertRaises(KeyError):
+            with models.storage.transaction():
+                self.us.first_name = "Betty"
+                raise KeyError("first_name")
+        self.assertEqual("", self.us.first_name)
+        models.storage.save()
+
+    def test_begin_twice(self):
+        models.storage.begin()
+        with self.assertRaises(RuntimeError):
+            models.storage.begin()
+        models.storage.commit()
+        with self.assertRaises(RuntimeError):
+            models.storage.commit()
+        with self.assertRaises(RuntimeError):
+            models.storage.rollback()
+
+    def test_rollback_lazy(self):
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload(lazy=True)
+        models.storage.begin()
+        us = models.storage.get(User, self.us.id)
+        us.first_name = "Betty"
+        pl = models.storage.get(Place, self.pl.id)
+        models.storage.delete(pl)
+        models.storage.rollback()
+        self.assertEqual("", models.storage.get(User, self.us.id).first_name)
+        self.assertIsNotNone(models.storage.get(Place, self.pl.id))
+        self.assertEqual(2, models.storage.count())
+
+    def test_rollback_lazy_list_changed_in_place(self):
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload(lazy=True)
+        models.storage.begin()
+        models.storage.get(Place, self.pl.id).amenity_ids.append("b")
+        models.storage.rollback()
+        self.assertEqual(["1"],
+                         models.storage.get(Place, self.pl.id).amenity_ids)
+
+    def test_begin_keeps_changed_keys_only(self):
+        models.storage.begin()
+        undo = FileStorage._FileStorage__undo
+        self.assertEqual(["Place." + self.pl.id], list(undo))
+        self.us.first_name = "Betty"
+        self.us.first_name = "Ann"
+        self.assertEqual(2, len(undo))
+        self.assertNotIn("first_name", undo["User." + self.us.id][1])
+        models.storage.rollback()
+        self.assertNotIn("first_name", self.us.__dict__)
+
+    def test_other_threads(self):
+        errors = []
+        st = State()
+
+        def run():
+            try:
+                self.us.first_name = "Betty"
+                State().name = "CA"
+                models.storage.delete(st)
+                for method in (models.storage.commit,
+                               models.storage.rollback):
+                    try:
+                        method()
+                    except RuntimeError:
+                        errors.append(method.__name__)
+                models.storage.save()
+                models.storage.begin()
+                models.storage.commit()
+            except Exception as error:
+                errors.append(error)
+
+        models.storage.save()
+        models.storage.begin()
+        self.pl.name = "Loft"
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join(0.5)
+        self.assertTrue(thread.is_alive())
+        self.assertEqual(["commit", "rollback"], errors)
+        models.storage.rollback()
+        thread.join()
+        self.assertEqual(["commit", "rollback"], errors)
+        self.assertNotIn("name", self.pl.__dict__)
+        self.assertEqual("Betty", self.us.first_name)
+        self.assertIsNone(models.storage.get(State, st.id))
+        self.assertEqual(1, models.storage.count(State))
+        with open("file.json", "r") as f:
+            objs = json.load(f)
+        self.assertEqual("Betty", objs["User." + self.us.id]["first_name"])
+        self.assertNotIn("State." + st.id, objs)
+
+    def test_commit_is_one_journal_line(self):
+        models.storage.set_journal(True)
+        models.storage.compact()
+        with models.storage.transaction():
+            Review().save()
+            State().save()
+        with open("file.json.journal", "r") as f:
+            lines = f.readlines()
+        self.assertEqual(1, len(lines))
+        with open("file.json.journal", "w") as f:
+            f.write(lines[0][:-10])
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual(2, models.storage.count())
+        with models.storage.transaction():
+            Review().save()
+            State().save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual(4, models.storage.count())
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/python3
+
+""" Define unittests models/engine/geo_index.py
+
+Unittest classes:
+    TestGeoGrid
+"""
+
+import random
+import unittest
+from models.engine.geo_index import GeoGrid, distance_km
+from models.place import Place
+
+
+class TestGeoGrid(unittest.TestCase):
+    """ unittests for testing the GeoGrid class """
+
+    def setUp(self):
+        random.seed(1)
+        self.grid = GeoGrid()
+        self.places = []
+        for i in range(500):
+            pl = Place.__new__(Place)
+            pl._load({"id": str(i), "latitude": random.uniform(37.6, 37.9),
+                      "longitude": random.uniform(-122.6, -122.3)})
+            self.places.append(pl)
+            self.grid.add("Place." + str(i), pl)
+
+    def distance(self, pl, lat, lon):
+        return distance_km(lat, lon, pl.latitude, pl.longitude)
+
+    def test_distance_km(self):
+        self.assertAlmostEqual(111.19, distance_km(0, 0, 1, 0), places=1)
+        self.assertEqual(0, distance_km(37.7, -122.4, 37.7, -122.4))
+
+    def test_within_bbox(self):
+        box = (37.70, -122.50, 37.75, -122.40)
+        expected = [pl for pl in self.places
+                    if box[0] <= pl.latitude <= box[2] and
+                    box[1] <= pl.longitude <= box[3]]
+        self.assertCountEqual(expected, self.grid.within_bbox(*box))
+
+    def test_within_radius(self):
+        found = self.grid.within_radius(37.75, -122.45, 5)
+        expected = [pl for pl in self.places
+                    if self.distance(pl, 37.75, -122.45) <= 5]
+        self.assertCountEqual(expected, found)
+        distances = [self.distance(pl, 37.75, -122.45) for pl in found]
+        self.assertEqual(sorted(distances), distances)
+
+    def test_nearest(self):
+        for lat, lon in ((37.75, -122.45), (37.6, -122.6), (40.0, -100.0)):
+            expected = sorted(self.places,
+                              key=lambda pl: self.distance(pl, lat, lon))
+            self.assertEqual(expected[:5], self.grid.nearest(lat, lon, 5))
+
+    def test_nearest_far_from_a_cluster(self):
+        expected = sorted(self.places,
+                          key=lambda pl: self.distance(pl, 41.0, -122.5))
+        self.assertEqual(expected[:3], self.grid.nearest(41.0, -122.5, 3))
+
+    def test_nearest_more_than_held(self):
+        self.assertEqual(500, len(self.grid.nearest(37.75, -122.45, 1000)))
+
+    def test_move_and_remove(self):
+        pl = self.places[0]
+        pl.__dict__["latitude"] = 10.0
+        pl.__dict__["longitude"] = 10.0
+        self.grid.update("Place.0", pl, "latitude")
+        self.assertEqual([pl], self.grid.nearest(10.0, 10.0))
+        self.grid.remove("Place.0")
+        self.assertEqual(499, len(self.grid))
+        self.assertNotIn(pl, self.grid.within_radius(10.0, 10.0, 1))
+
+    def test_non_numeric_coordinates(self):
+        pl = Place.__new__(Place)
+        pl._load({"id": "x", "latitude": "north"})
+        self.grid.add("Place.x", pl)
+        self.assertEqual(500, len(self.grid))
+
+
+if __name__ == "__main__":
+    unittest.main()
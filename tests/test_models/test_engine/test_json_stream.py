@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+
+""" Define unittests models/engine/json_stream.py
+
+Unittest classes:
+    TestJsonStream_iter_items
+"""
+
+import json
+import unittest
+from io import StringIO
+from models.engine.json_stream import iter_items
+
+
+class TestJsonStream_iter_items(unittest.TestCase):
+    """ unittests for testing iter_items """
+
+    def test_empty_object(self):
+        self.assertEqual([], list(iter_items(StringIO("{}"))))
+
+    def test_empty_file(self):
+        self.assertEqual([], list(iter_items(StringIO(""))))
+
+    def test_matches_json_load(self):
+        data = {
+            "BaseModel.{}".format(i): {"id": str(i), "score": i * 1.5,
+                                       "tags": ["a", "b"], "ok": True,
+                                       "none": None, "text": "x" * i}
+            for i in range(200)}
+        text = json.dumps(data)
+        for chunk_size in (1, 7, 64, 1 << 16):
+            items = list(iter_items(StringIO(text), chunk_size))
+            self.assertEqual(data, dict(items))
+
+    def test_number_cut_by_chunk(self):
+        text = '{"a": 123456789, "b": 1.25}'
+        for chunk_size in range(1, len(text) + 1):
+            items = dict(iter_items(StringIO(text), chunk_size))
+            self.assertEqual({"a": 123456789, "b": 1.25}, items)
+
+    def test_whitespace(self):
+        text = ' \n{ "a" :\t{"id": "1"} ,\n "b": {} }\n'
+        self.assertEqual([("a", {"id": "1"}), ("b", {})],
+                         list(iter_items(StringIO(text), 3)))
+
+    def test_truncated_file(self):
+        text = json.dumps({"a": {"id": "1"}, "b": {"id": "2"}})[:-8]
+        items = iter_items(StringIO(text), 4)
+        self.assertEqual(("a", {"id": "1"}), next(items))
+        with self.assertRaises(ValueError):
+            next(items)
+
+    def test_not_an_object(self):
+        with self.assertRaises(ValueError):
+            list(iter_items(StringIO("[1, 2]")))
+
+
+if __name__ == "__main__":
+    unittest.main()
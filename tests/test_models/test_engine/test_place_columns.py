@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+
+""" Define unittests models/engine/place_columns.py
+
+Unittest classes:
+    TestPlaceColumns
+"""
+
+import unittest
+from models.engine.place_columns import PlaceColumns
+from models.place import Place
+
+
+class TestPlaceColumns(unittest.TestCase):
+    """ unittests for testing the PlaceColumns class """
+
+    def setUp(self):
+        self.columns = PlaceColumns()
+        self.places = {}
+        for i in range(10):
+            pl = Place.__new__(Place)
+            pl._load({"id": str(i), "price_by_night": i * 10,
+                      "max_guest": i % 4, "latitude": float(i),
+                      "longitude": -float(i)})
+            self.places[str(i)] = pl
+            self.columns.add("Place." + str(i), pl)
+
+    def ids(self, places):
+        return sorted(int(pl.id) for pl in places)
+
+    def test_no_criteria(self):
+        self.assertEqual(list(range(10)), self.ids(self.columns.filter()))
+
+    def test_price_range(self):
+        found = self.columns.filter(price_min=20, price_max=50)
+        self.assertEqual([2, 3, 4, 5], self.ids(found))
+
+    def test_min_guests_and_price(self):
+        found = self.columns.filter(price_max=60, min_guests=2)
+        self.assertEqual([2, 3, 6], self.ids(found))
+
+    def test_bbox(self):
+        found = self.columns.filter(bbox=(2.5, -6.5, 6.5, -2.5))
+        self.assertEqual([3, 4, 5, 6], self.ids(found))
+
+    def test_update(self):
+        pl = self.places["1"]
+        pl.__dict__["price_by_night"] = 1000
+        self.columns.update("Place.1", pl, "price_by_night")
+        self.assertEqual([1], self.ids(self.columns.filter(price_min=500)))
+
+    def test_remove_and_reuse_slot(self):
+        self.columns.remove("Place.3")
+        self.assertEqual(9, len(self.columns))
+        self.assertNotIn(3, self.ids(self.columns.filter()))
+        self.assertEqual([], self.columns.filter(price_min=30, price_max=30))
+        pl = Place.__new__(Place)
+        pl._load({"id": "42", "price_by_night": 30})
+        self.columns.add("Place.42", pl)
+        self.assertEqual(10, len(self.columns.objs))
+        self.assertEqual([42], self.ids(
+            self.columns.filter(price_min=30, price_max=30)))
+
+    def test_non_numeric_value(self):
+        pl = self.places["2"]
+        pl.__dict__["max_guest"] = "many"
+        self.columns.update("Place.2", pl, "max_guest")
+        self.assertNotIn(2, self.ids(self.columns.filter(min_guests=0)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,337 @@
+#!/usr/bin/python3
+
+""" Define unittests models/engine/record_storage.py
+
+Unittest classes:
+    TestRecordStorage_instantiation
+    TestRecordStorage_methods
+"""
+
+import os
+import json
+import models
+import threading
+import unittest
+from unittest.mock import patch
+from models.base_model import BaseModel
+from models.engine.record_storage import RecordStorage
+from models.user import User
+from models.state import State
+from models.place import Place
+
+
+class TestRecordStorage_instantiation(unittest.TestCase):
+    """Unittests for testing instantiation of the RecordStorage class."""
+
+    def test_RecordStorage_instantiation_no_args(self):
+        self.assertEqual(type(RecordStorage()), RecordStorage)
+
+    def test_RecordStorage_instantiation_with_arg(self):
+        with self.assertRaises(TypeError):
+            RecordStorage(None)
+
+    def test_RecordStorage_file_path_is_private_str(self):
+        self.assertEqual(str, type(RecordStorage._RecordStorage__file_path))
+
+
+class TestRecordStorage_methods(unittest.TestCase):
+    """Unittests for testing methods of the RecordStorage class."""
+
+    def setUp(self):
+        self.storage = RecordStorage()
+        self.storage.set_path("tmp_file.records")
+        self.storage.reload()
+        self.patcher = patch("models.storage", self.storage)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.storage.reload()
+        self.storage.set_path("file.records")
+        for name in ("tmp_file.records", "tmp_file.records.idx"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+
+    def reopen(self):
+        self.storage.reload()
+
+    def test_save_and_get(self):
+        us = User()
+        us.email = "a@b.c"
+        models.storage.save()
+        self.reopen()
+        self.assertEqual({}, RecordStorage._RecordStorage__objects)
+        reloaded = models.storage.get(User, us.id)
+        self.assertEqual(us.to_dict(), reloaded.to_dict())
+        self.assertEqual(["User." + us.id],
+                         list(RecordStorage._RecordStorage__objects))
+        self.assertIs(reloaded, models.storage.get("User", us.id))
+
+    def test_get_missing(self):
+        self.assertIsNone(models.storage.get(User, "1234"))
+
+    def test_count(self):
+        User()
+        st = State()
+        models.storage.save()
+        self.reopen()
+        State()
+        self.assertEqual(3, models.storage.count())
+        self.assertEqual(2, models.storage.count(State))
+        models.storage.delete(models.storage.get(State, st.id))
+        self.assertEqual(1, models.storage.count(State))
+        self.assertEqual(["State." + st.id], list(
+            RecordStorage._RecordStorage__changes)[1:])
+
+    def test_all_with_cls(self):
+        us = User()
+        State()
+        models.storage.save()
+        self.reopen()
+        self.assertEqual(["User." + us.id], list(models.storage.all(User)))
+        self.assertEqual(2, len(models.storage.all()))
+
+    def test_all_keeps_held_instances(self):
+        us = User()
+        models.storage.save()
+        self.reopen()
+        us = models.storage.get(User, us.id)
+        self.assertIs(us, models.storage.all()["User." + us.id])
+        us.first_name = "changed"
+        models.storage.save()
+        self.reopen()
+        self.assertEqual("changed",
+                         models.storage.get(User, us.id).first_name)
+
+    def test_update_in_place(self):
+        us = User()
+        us.first_name = "Betty Holberton"
+        models.storage.save()
+        size = os.path.getsize("tmp_file.records")
+        self.reopen()
+        us = models.storage.get(User, us.id)
+        us.first_name = "Betty"
+        models.storage.save()
+        self.assertEqual(size, os.path.getsize("tmp_file.records"))
+        self.reopen()
+        self.assertEqual("Betty", models.storage.get(User, us.id).first_name)
+
+    def test_update_appends(self):
+        us = User()
+        models.storage.save()
+        size = os.path.getsize("tmp_file.records")
+        us.first_name = "Betty Holberton"
+        models.storage.save()
+        self.assertLess(size, os.path.getsize("tmp_file.records"))
+        self.reopen()
+        self.assertEqual("Betty Holberton",
+                         models.storage.get(User, us.id).first_name)
+
+    def test_delete(self):
+        us = User()
+        models.storage.save()
+        models.storage.delete(us)
+        models.storage.save()
+        self.reopen()
+        self.assertIsNone(models.storage.get(User, us.id))
+        self.assertEqual(0, models.storage.count())
+
+    def test_transaction(self):
+        us = User()
+        us.save()
+        with self.assertRaises(KeyError):
+            with models.storage.transaction():
+                State().save()
+                us.first_name = "Betty"
+                us.save()
+                raise KeyError("first_name")
+        self.assertEqual(1, models.storage.count())
+        self.assertEqual("", models.storage.get(User, us.id).first_name)
+        with models.storage.transaction():
+            st = State()
+            st.save()
+        self.reopen()
+        self.assertIsNotNone(models.storage.get(State, st.id))
+
+    def test_transaction_other_threads(self):
+        us = User()
+        us.save()
+        errors = []
+
+        def run():
+            self.st = State()
+            try:
+                models.storage.save()
+            except Exception as error:
+                errors.append(error)
+
+        models.storage.begin()
+        us.first_name = "Betty"
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join(0.5)
+        self.assertTrue(thread.is_alive())
+        models.storage.rollback()
+        thread.join()
+        self.assertEqual([], errors)
+        self.assertEqual("", models.storage.get(User, us.id).first_name)
+        self.reopen()
+        self.assertIsNotNone(models.storage.get(State, self.st.id))
+
+    def test_deferred_save(self):
+        with models.storage.deferred():
+            us = User()
+            us.save()
+            self.assertFalse(os.path.exists("tmp_file.records.idx"))
+        self.reopen()
+        self.assertIsNotNone(models.storage.get(User, us.id))
+
+    def test_compaction(self):
+        us = User()
+        for i in range(10):
+            us.first_name = "Betty" * (i + 1)
+            models.storage.save()
+        self.assertLessEqual(RecordStorage._RecordStorage__garbage * 2,
+                             os.path.getsize("tmp_file.records"))
+        self.reopen()
+        self.assertEqual("Betty" * 10,
+                         models.storage.get(User, us.id).first_name)
+
+    def test_list_changed_in_place(self):
+        pl = Place()
+        pl.amenity_ids = []
+        models.storage.save()
+        self.reopen()
+        pl = models.storage.get(Place, pl.id)
+        pl.amenity_ids.append("1234")
+        models.storage.save()
+        self.reopen()
+        self.assertEqual(["1234"],
+                         models.storage.get(Place, pl.id).amenity_ids)
+
+    def test_torn_record(self):
+        us = User()
+        us.first_name = "Betty Holberton"
+        other = User()
+        models.storage.save()
+        offset, length = RecordStorage._RecordStorage__offsets[
+            "User." + us.id]
+        with open("tmp_file.records", "r+b") as f:
+            # an interrupted write over the record
+            f.seek(offset + length // 2)
+            f.write(b'"Betty"]')
+        self.reopen()
+        with self.assertWarns(RuntimeWarning):
+            self.assertIsNone(models.storage.get(User, us.id))
+        with self.assertWarns(RuntimeWarning):
+            self.assertEqual(["User." + other.id],
+                             list(models.storage.all()))
+
+    def test_reload_without_index(self):
+        User()
+        bm = BaseModel()
+        models.storage.save()
+        bm.name = "My First Model"
+        models.storage.save()
+        os.remove("tmp_file.records.idx")
+        self.reopen()
+        self.assertEqual(2, models.storage.count())
+        self.assertEqual("My First Model",
+                         models.storage.get(BaseModel, bm.id).name)
+
+    def test_reload_scans_past_index(self):
+        us = User()
+        models.storage.save()
+        with open("tmp_file.records.idx", "r") as f:
+            index = f.read()
+        st = State()
+        models.storage.save()
+        with open("tmp_file.records.idx", "w") as f:
+            f.write(index)
+        self.reopen()
+        self.assertIsNotNone(models.storage.get(State, st.id))
+        self.assertIsNotNone(models.storage.get(User, us.id))
+
+    def test_reload_torn_record(self):
+        User()
+        models.storage.save()
+        os.remove("tmp_file.records.idx")
+        with open("tmp_file.records", "ab") as f:
+            f.write(b"\x40\0\0\0[\"User.1\", {")
+        self.reopen()
+        self.assertEqual(1, models.storage.count())
+        State()
+        models.storage.save()
+        os.remove("tmp_file.records.idx")
+        self.reopen()
+        self.assertEqual(2, models.storage.count())
+
+    def test_spatial_queries(self):
+        pl = Place()
+        pl.latitude = 37.77
+        pl.longitude = -122.41
+        pl.price_by_night = 100
+        models.storage.save()
+        self.reopen()
+        self.assertEqual([pl.id], [p.id for p in models.storage.nearest(
+            37.7, -122.4)])
+        self.assertEqual([pl.id], [p.id for p in models.storage.within_bbox(
+            37, -123, 38, -122)])
+        self.assertEqual([], models.storage.within_radius(0, 0, 10))
+        self.assertEqual([pl.id], [p.id for p in models.storage.filter_places(
+            price_max=150)])
+
+    def test_index_file(self):
+        us = User()
+        models.storage.save()
+        with open("tmp_file.records.idx", "r") as f:
+            index = json.load(f)
+        self.assertEqual(os.path.getsize("tmp_file.records"), index["size"])
+        self.assertIn("User." + us.id, index["offsets"])
+
+    def test_index_appends_changes(self):
+        for i in range(10):
+            User()
+        us = User()
+        st = State()
+        models.storage.save()
+        State()
+        models.storage.delete(st)
+        models.storage.save()
+        us.first_name = "B"
+        models.storage.save()
+        with open("tmp_file.records.idx", "r") as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(3, len(lines))
+        self.assertEqual(12, len(lines[0]["offsets"]))
+        self.assertEqual(2, len(lines[1]["offsets"]))
+        self.assertIsNone(lines[1]["offsets"]["State." + st.id])
+        self.assertEqual(["User." + us.id], list(lines[2]["offsets"]))
+        self.assertEqual(os.path.getsize("tmp_file.records"),
+                         lines[2]["size"])
+        models.storage.compact()
+        with open("tmp_file.records.idx", "r") as f:
+            self.assertEqual(1, len(f.readlines()))
+
+    def test_reload_torn_index_line(self):
+        us = User()
+        models.storage.save()
+        st = State()
+        models.storage.save()
+        with open("tmp_file.records.idx", "rb+") as f:
+            f.seek(-5, os.SEEK_END)
+            f.truncate()
+        self.reopen()
+        self.assertIsNotNone(models.storage.get(State, st.id))
+        self.assertIsNotNone(models.storage.get(User, us.id))
+        State()
+        models.storage.save()
+        self.reopen()
+        self.assertEqual(3, models.storage.count())
+        self.assertIsNotNone(models.storage.get(State, st.id))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+#!/usr/bin/python3
+
+""" Define unittests models/engine/serializers.py
+
+Unittest classes:
+    TestSerializers_binary
+    TestSerializers_convert
+"""
+
+import io
+import json
+import os
+import unittest
+from models.engine.serializers import (BinarySerializer, JSONSerializer,
+                                       convert, serializer_for)
+from models.place import Place
+from models.user import User
+
+
+class TestSerializers_binary(unittest.TestCase):
+    """ unittests for testing the BinarySerializer class """
+
+    def round_trip(self, records):
+        serializer = BinarySerializer()
+        buf = io.BytesIO()
+        serializer.write(buf, (serializer.encode(key, record)
+                               for key, record in records.items()))
+        buf.seek(0)
+        return dict(serializer.iter_records(buf)), buf.getvalue()
+
+    def test_round_trip(self):
+        pl = Place()
+        pl.name = "Loft été"
+        pl.number_rooms = 3
+        pl.latitude = 37.77
+        pl.amenity_ids = ["a", "b"]
+        pl.extra = {"wifi": True, "floor": None, "big": 1 << 70}
+        us = User()
+        us.created_at = us.created_at.replace(microsecond=0)
+        records = {"Place." + pl.id: pl.to_dict(),
+                   "User." + us.id: us.to_dict(),
+                   "odd key": {"id": "not-a-uuid", "created_at": "today"}}
+        decoded, data = self.round_trip(records)
+        self.assertEqual(records, decoded)
+
+    def test_smaller_than_json(self):
+        records = {}
+        for i in range(50):
+            us = User()
+            us.email = "user{}@mail.com".format(i)
+            records["User." + us.id] = us.to_dict()
+        decoded, data = self.round_trip(records)
+        self.assertLess(len(data), len(json.dumps(records)) * 0.7)
+
+    def test_lookalike_strings_kept(self):
+        records = {"X.1": {"id": "1", "a": "2017-09-28 21:03:54",
+                           "b": "2017-09-28T21:03:54.000000",
+                           "c": "0A8F9A12-2B3C-4D5E-8F70-1234567890AB"}}
+        self.assertEqual(records, self.round_trip(records)[0])
+
+    def test_empty_file(self):
+        self.assertEqual([], list(BinarySerializer().iter_records(
+            io.BytesIO(b""))))
+
+    def test_truncated_file(self):
+        records = {"User.1": {"id": "1", "__class__": "User"},
+                   "User.2": {"id": "2", "__class__": "User"}}
+        data = self.round_trip(records)[1]
+        records = BinarySerializer().iter_records(io.BytesIO(data[:-3]))
+        self.assertEqual("User.1", next(records)[0])
+        with self.assertRaises(ValueError):
+            next(records)
+
+    def test_not_binary(self):
+        with self.assertRaises(ValueError):
+            list(BinarySerializer().iter_records(io.BytesIO(b"{}")))
+
+
+class TestSerializers_convert(unittest.TestCase):
+    """ unittests for testing serializer_for and convert """
+
+    def tearDown(self):
+        for name in ("tmp_src.json", "tmp_dst.hbnb", "tmp_back.json"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+
+    def test_serializer_for(self):
+        self.assertIsInstance(serializer_for("file.json"), JSONSerializer)
+        self.assertIsInstance(serializer_for("file.hbnb"), BinarySerializer)
+        self.assertIsInstance(serializer_for("file.bin"), BinarySerializer)
+        self.assertIsInstance(serializer_for("file"), JSONSerializer)
+        self.assertIsInstance(serializer_for("file.json", "binary"),
+                              BinarySerializer)
+        with self.assertRaises(ValueError):
+            serializer_for("file.json", "xml")
+
+    def test_convert_round_trip(self):
+        records = {"User." + str(i): {"id": str(i), "__class__": "User",
+                                      "email": "a@b.c"} for i in range(10)}
+        with open("tmp_src.json", "w") as f:
+            json.dump(records, f)
+        self.assertEqual(10, convert("tmp_src.json", "tmp_dst.hbnb"))
+        self.assertEqual(10, convert("tmp_dst.hbnb", "tmp_back.json"))
+        with open("tmp_back.json", "r") as f:
+            self.assertEqual(records, json.load(f))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,255 @@
+#!/usr/bin/python3
+
+""" Define unittests models/engine/sqlite_storage.py
+
+Unittest classes:
+    TestSQLiteStorage_instantiation
+    TestSQLiteStorage_methods
+"""
+
+import os
+import sqlite3
+import models
+import threading
+import unittest
+from unittest.mock import patch
+from models.base_model import BaseModel, classes
+from models.engine.sqlite_storage import SQLiteStorage
+from models.user import User
+from models.state import State
+from models.city import City
+from models.place import Place
+
+
+class TestSQLiteStorage_instantiation(unittest.TestCase):
+    """Unittests for testing instantiation of the SQLiteStorage class."""
+
+    def test_SQLiteStorage_instantiation_no_args(self):
+        self.assertEqual(type(SQLiteStorage()), SQLiteStorage)
+
+    def test_SQLiteStorage_instantiation_with_arg(self):
+        with self.assertRaises(TypeError):
+            SQLiteStorage(None)
+
+    def test_SQLiteStorage_file_path_is_private_str(self):
+        self.assertEqual(str, type(SQLiteStorage._SQLiteStorage__file_path))
+
+
+class TestSQLiteStorage_methods(unittest.TestCase):
+    """Unittests for testing methods of the SQLiteStorage class."""
+
+    def setUp(self):
+        self.storage = SQLiteStorage()
+        self.storage.set_path("tmp_file.db")
+        self.storage.reload()
+        self.patcher = patch("models.storage", self.storage)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.storage.close()
+        self.storage.set_path("file.db")
+        for name in ("tmp_file.db", "tmp_file.db-wal", "tmp_file.db-shm"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+
+    def test_tables_and_indexes(self):
+        db = sqlite3.connect("tmp_file.db")
+        tables = {row[0] for row in db.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'")}
+        indexes = {row[0] for row in db.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'")}
+        mode = db.execute("PRAGMA journal_mode").fetchone()[0]
+        db.close()
+        self.assertEqual({"BaseModel", "User", "State", "City", "Amenity",
+                          "Place", "Review"}, tables)
+        self.assertIn("City_state_id", indexes)
+        self.assertIn("Review_place_id", indexes)
+        self.assertEqual("wal", mode)
+
+    def test_class_registered_after_reload(self):
+        class Listing(BaseModel):
+            pass
+
+        try:
+            us = User()
+            self.assertEqual(1, models.storage.count())
+            self.assertEqual({}, models.storage.all(Listing))
+            ls = Listing()
+            models.storage.save()
+            self.assertEqual(2, len(models.storage.all()))
+            self.storage.reload()
+            self.assertEqual(type(ls), type(
+                models.storage.get("Listing", ls.id)))
+            self.assertIsNotNone(models.storage.get(User, us.id))
+        finally:
+            del classes["Listing"]
+
+    def test_unknown_class(self):
+        self.assertEqual({}, models.storage.all("MyModel"))
+        self.assertEqual([], models.storage.find("MyModel", id="1234"))
+        self.assertEqual(0, models.storage.count("MyModel"))
+
+    def test_save_and_get(self):
+        pl = Place()
+        pl.name = "Loft"
+        pl.number_rooms = "3"
+        pl.amenity_ids = ["1234"]
+        pl.pets = None
+        pl.wifi = True
+        models.storage.save()
+        self.storage.reload()
+        reloaded = models.storage.get(Place, pl.id)
+        self.assertIsNot(pl, reloaded)
+        self.assertEqual(pl.to_dict(), reloaded.to_dict())
+        self.assertIs(reloaded, models.storage.get("Place", pl.id))
+
+    def test_get_missing(self):
+        self.assertIsNone(models.storage.get(User, "1234"))
+        self.assertIsNone(models.storage.get("MyModel", "1234"))
+
+    def test_unsaved_changes_rolled_back(self):
+        us = User()
+        models.storage.save()
+        us.first_name = "Betty"
+        State()
+        self.assertEqual(2, models.storage.count())
+        self.storage.reload()
+        self.assertEqual(1, models.storage.count())
+        self.assertEqual("", models.storage.get(User, us.id).first_name)
+
+    def test_transaction(self):
+        us = User()
+        us.save()
+        with self.assertRaises(KeyError):
+            with models.storage.transaction():
+                State().save()
+                us.first_name = "Betty"
+                us.save()
+                raise KeyError("first_name")
+        self.assertEqual(1, models.storage.count())
+        self.assertEqual("", models.storage.get(User, us.id).first_name)
+        with models.storage.transaction():
+            st = State()
+            st.save()
+        self.storage.reload()
+        self.assertIsNotNone(models.storage.get(State, st.id))
+
+    def test_transaction_other_threads(self):
+        us = User()
+        us.save()
+        errors = []
+
+        def run():
+            self.st = State()
+            try:
+                models.storage.save()
+            except Exception as error:
+                errors.append(error)
+
+        models.storage.begin()
+        us.first_name = "Betty"
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join(0.5)
+        self.assertTrue(thread.is_alive())
+        models.storage.rollback()
+        thread.join()
+        self.assertEqual([], errors)
+        self.assertEqual("", models.storage.get(User, us.id).first_name)
+        self.storage.reload()
+        self.assertIsNotNone(models.storage.get(State, self.st.id))
+
+    def test_other_thread(self):
+        us = User()
+        us.save()
+        found = []
+
+        def run():
+            self.storage.reload()
+            found.append(models.storage.get(User, us.id))
+            self.st = State()
+            self.st.save()
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+        self.assertEqual(us.id, found[0].id)
+        self.assertIsNotNone(models.storage.get(State, self.st.id))
+        self.assertEqual(2, models.storage.count())
+
+    def test_deferred_save(self):
+        with models.storage.deferred():
+            User().save()
+            self.storage.reload()
+            self.assertEqual(0, models.storage.count())
+            us = User()
+            us.save()
+        self.storage.reload()
+        self.assertIsNotNone(models.storage.get(User, us.id))
+
+    def test_count_and_all(self):
+        us = User()
+        State()
+        State()
+        self.assertEqual(3, models.storage.count())
+        self.assertEqual(2, models.storage.count(State))
+        self.assertEqual(["User." + us.id], list(models.storage.all(User)))
+        self.assertEqual(3, len(models.storage.all()))
+
+    def test_delete(self):
+        us = User()
+        models.storage.save()
+        models.storage.delete(us)
+        models.storage.save()
+        self.storage.reload()
+        self.assertIsNone(models.storage.get(User, us.id))
+        self.assertEqual(0, models.storage.count())
+
+    def test_find(self):
+        st = State()
+        ct1 = City()
+        ct1.state_id = st.id
+        ct2 = City()
+        ct2.state_id = st.id
+        ct2.name = "Fremont"
+        City()
+        models.storage.save()
+        self.storage.reload()
+        self.assertEqual({ct1.id, ct2.id}, {
+            ct.id for ct in models.storage.find(City, state_id=st.id)})
+        self.assertEqual([ct2.id], [ct.id for ct in models.storage.find(
+            "City", state_id=st.id, name="Fremont")])
+
+    def test_list_changed_in_place(self):
+        pl = Place()
+        pl.amenity_ids = []
+        models.storage.save()
+        self.storage.reload()
+        pl = models.storage.get(Place, pl.id)
+        pl.amenity_ids.append("1234")
+        models.storage.save()
+        self.storage.reload()
+        self.assertEqual(["1234"],
+                         models.storage.get(Place, pl.id).amenity_ids)
+
+    def test_spatial_queries(self):
+        pl = Place()
+        pl.latitude = 37.77
+        pl.longitude = -122.41
+        pl.price_by_night = "100"
+        other = Place()
+        other.price_by_night = "abc"
+        self.assertEqual([pl.id], [p.id for p in models.storage.nearest(
+            37.7, -122.4)])
+        self.assertEqual([pl.id], [p.id for p in models.storage.within_bbox(
+            37, -123, 38, -122)])
+        self.assertEqual([], models.storage.within_radius(10, 10, 10))
+        self.assertEqual([pl.id], [p.id for p in models.storage.filter_places(
+            price_min=50, price_max=150)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+#!/usr/bin/python3
+
+""" Define unittests models/engine/transactional_storage.py
+
+Unittest classes:
+    TestTransactionalStorage_methods
+"""
+
+import os
+import threading
+import unittest
+from models.engine.file_storage import FileStorage
+from models.engine.record_storage import RecordStorage
+from models.engine.transactional_storage import TransactionalStorageMixin
+
+
+class ListStorage(TransactionalStorageMixin):
+    """ keeps the saved states of a list, for the tests """
+
+    def __init__(self):
+        self.items = []
+        self.saved = []
+        self.kept = None
+
+    def new_many(self, objs):
+        self.items.extend(objs)
+
+    def _begin(self):
+        self.kept = list(self.items)
+
+    def _rollback(self, others):
+        self.items = self.kept
+
+    def _save_now(self):
+        self.saved.append(list(self.items))
+
+
+class TestTransactionalStorage_methods(unittest.TestCase):
+    """Unittests for testing the methods of TransactionalStorageMixin."""
+
+    def setUp(self):
+        self.storage = ListStorage()
+
+    def tearDown(self):
+        try:
+            self.storage.rollback()
+        except RuntimeError:
+            pass
+
+    def test_deferred(self):
+        with self.storage.deferred():
+            self.storage.new(1)
+            self.storage.save()
+            with self.storage.deferred():
+                self.storage.save()
+            self.assertEqual([], self.storage.saved)
+        self.assertEqual([[1]], self.storage.saved)
+
+    def test_deferred_without_save(self):
+        with self.storage.deferred():
+            self.storage.new(1)
+        self.assertEqual([], self.storage.saved)
+
+    def test_transaction(self):
+        with self.storage.transaction():
+            self.storage.new(1)
+            self.storage.save()
+            self.assertEqual([], self.storage.saved)
+        self.assertEqual([[1]], self.storage.saved)
+        with self.assertRaises(KeyError):
+            with self.storage.transaction():
+                self.storage.new(2)
+                raise KeyError(2)
+        self.assertEqual([1], self.storage.items)
+        self.assertIsNone(self.storage._transaction_owner())
+
+    def test_begin_twice(self):
+        self.storage.begin()
+        with self.assertRaises(RuntimeError):
+            self.storage.begin()
+        self.storage.commit()
+        with self.assertRaises(RuntimeError):
+            self.storage.commit()
+        with self.assertRaises(RuntimeError):
+            self.storage.rollback()
+
+    def test_other_threads_wait(self):
+        done = []
+
+        def run():
+            self.storage.save()
+            with self.storage.transaction():
+                done.append(list(self.storage.items))
+
+        self.storage.begin()
+        self.storage.new(1)
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join(0.5)
+        self.assertTrue(thread.is_alive())
+        with self.assertRaises(RuntimeError):
+            self.storage.begin()
+        self.storage.commit()
+        thread.join()
+        self.assertEqual([[1]], done)
+        self.assertEqual([[1], [1], [1]], self.storage.saved)
+
+    def test_state_per_engine(self):
+        self.storage.begin()
+        self.assertIsNone(RecordStorage()._transaction_owner())
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        try:
+            FileStorage().save()
+            self.assertTrue(os.path.exists("file.json"))
+        finally:
+            try:
+                os.remove("file.json")
+            except IOError:
+                pass
+            try:
+                os.rename("tmp", "file.json")
+            except IOError:
+                pass
+
+
+if __name__ == "__main__":
+    unittest.main()
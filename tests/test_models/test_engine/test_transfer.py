@@ -0,0 +1,245 @@
+#!/usr/bin/python3
+
+""" Define unittests models/engine/transfer.py
+
+Unittest classes:
+    TestTransfer_coerce
+    TestTransfer_export
+    TestTransfer_import
+"""
+
+import os
+import json
+import models
+import unittest
+from unittest.mock import patch
+from models.engine.file_lock import FileLock
+from models.engine.file_storage import FileStorage
+from models.engine.transfer import coerce, export_records, import_records
+from models.user import User
+from models.place import Place
+
+
+class TestTransfer_coerce(unittest.TestCase):
+    """Unittests for testing the type coercion of imported values."""
+
+    def test_numbers(self):
+        self.assertEqual(3, coerce(Place, "number_rooms", "3"))
+        self.assertEqual(37.5, coerce(Place, "latitude", "37.5"))
+        self.assertIs(float, type(coerce(Place, "latitude", 37)))
+        with self.assertRaises(ValueError):
+            coerce(Place, "number_rooms", "three")
+
+    def test_lists(self):
+        self.assertEqual(["a"], coerce(Place, "amenity_ids", '["a"]'))
+        with self.assertRaises(ValueError):
+            coerce(Place, "amenity_ids", '{"a": 1}')
+
+    def test_strings_and_unknown(self):
+        self.assertEqual("12", coerce(Place, "name", "12"))
+        self.assertEqual("12", coerce(Place, "unknown", "12"))
+
+    def test_timestamps(self):
+        self.assertEqual("2017-06-14T22:31:03.285259",
+                         coerce(User, "created_at",
+                                "2017-06-14T22:31:03.285259"))
+        with self.assertRaises(ValueError):
+            coerce(User, "updated_at", "yesterday")
+
+
+class TestTransfer_export(unittest.TestCase):
+    """Unittests for testing export_records."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.place = Place()
+        self.place.name = "Loft"
+        self.place.amenity_ids = ["a", "b"]
+        self.place.rating = 4
+        self.user = User()
+        models.storage.save()
+
+    def tearDown(self):
+        for name in ("file.json", "file.json.journal", "tmp_records.jsonl",
+                     "tmp_records.csv"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_export_jsonl(self):
+        self.assertEqual(2, export_records("tmp_records.jsonl"))
+        with open("tmp_records.jsonl", "r") as f:
+            records = [json.loads(line) for line in f]
+        self.assertIn(self.place.to_dict(), records)
+        self.assertIn(self.user.to_dict(), records)
+
+    def test_export_csv(self):
+        self.assertEqual(1, export_records("tmp_records.csv", Place))
+        with open("tmp_records.csv", "r") as f:
+            lines = f.read().splitlines()
+        self.assertTrue(lines[0].startswith("id,created_at,updated_at,"))
+        self.assertTrue(lines[0].endswith(",amenity_ids,extra"))
+        self.assertIn('"[""a"", ""b""]","{""rating"": 4}"', lines[1])
+
+    def test_export_from_snapshot(self):
+        FileStorage._FileStorage__objects = {}
+        self.assertEqual(1, export_records("tmp_records.jsonl", "User",
+                                           src="file.json"))
+        with open("tmp_records.jsonl", "r") as f:
+            self.assertEqual(self.user.to_dict(), json.loads(f.read()))
+
+    def test_export_from_snapshot_with_journal(self):
+        models.storage.set_journal(True)
+        try:
+            self.user.first_name = "Betty"
+            models.storage.delete(self.place)
+            models.storage.save()
+        finally:
+            models.storage.set_journal(False)
+        self.assertTrue(os.path.exists("file.json.journal"))
+        self.assertEqual(0, export_records("tmp_records.jsonl", "Place",
+                                           src="file.json"))
+        self.assertEqual(1, export_records("tmp_records.jsonl",
+                                           src="file.json"))
+        with open("tmp_records.jsonl", "r") as f:
+            self.assertEqual("Betty", json.loads(f.read())["first_name"])
+
+    def test_export_from_snapshot_holds_lock(self):
+        with patch("models.engine.transfer.FileLock") as lock:
+            export_records("tmp_records.jsonl", src="file.json")
+        lock.assert_called_once_with("file.json.lock")
+        lock.return_value.__enter__.assert_called_once_with()
+
+    def test_export_errors(self):
+        with self.assertRaises(ValueError):
+            export_records("tmp_records.txt", Place)
+        with self.assertRaises(ValueError):
+            export_records("tmp_records.csv")
+        with self.assertRaises(ValueError):
+            export_records("tmp_records.csv", "MyModel")
+
+
+class TestTransfer_import(unittest.TestCase):
+    """Unittests for testing import_records."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+
+    def tearDown(self):
+        for name in ("file.json", "file.json.journal", "tmp_records.jsonl",
+                     "tmp_records.csv", "tmp_file.json", "tmp_file.json.lock"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def write(self, name, text):
+        with open(name, "w") as f:
+            f.write(text)
+
+    def test_import_csv(self):
+        self.write("tmp_records.csv",
+                   "name,number_rooms,latitude,amenity_ids,extra\n"
+                   'Loft,2,37.5,"[""a""]","{""rating"": 4}"\n'
+                   "Cabin,,,,\n")
+        self.assertEqual(2, import_records("tmp_records.csv", Place))
+        places = {p.name: p for p in models.storage.all(Place).values()}
+        self.assertEqual(2, places["Loft"].number_rooms)
+        self.assertEqual(37.5, places["Loft"].latitude)
+        self.assertEqual(["a"], places["Loft"].amenity_ids)
+        self.assertEqual(4, places["Loft"].rating)
+        self.assertNotIn("number_rooms", places["Cabin"].__dict__)
+        with open("file.json", "r") as f:
+            self.assertEqual(2, len(json.load(f)))
+
+    def test_import_jsonl_classes(self):
+        self.write("tmp_records.jsonl",
+                   '{"__class__": "User", "id": "1", "email": "a@b.c"}\n'
+                   '\n'
+                   '{"__class__": "Place", "price_by_night": "80"}\n')
+        self.assertEqual(2, import_records("tmp_records.jsonl", batch=1))
+        self.assertEqual("a@b.c", models.storage.get(User, "1").email)
+        place, = models.storage.all(Place).values()
+        self.assertEqual(80, place.price_by_night)
+
+    def test_import_error_creates_nothing(self):
+        self.write("tmp_records.jsonl",
+                   '{"__class__": "User"}\n'
+                   '{"__class__": "User"}\n'
+                   '{"__class__": "MyModel"}\n')
+        with self.assertRaises(ValueError) as error:
+            import_records("tmp_records.jsonl", batch=1)
+        self.assertEqual("line 3: Unknown class: MyModel",
+                         str(error.exception))
+        self.assertEqual(0, models.storage.count())
+
+    def test_import_error_restores_replaced(self):
+        us = User()
+        us.email = "a@b.c"
+        self.write("tmp_records.jsonl",
+                   '{"__class__": "User", "id": "%s"}\n'
+                   '{"__class__": "User", "id": "%s", "email": "x"}\n'
+                   '{"__class__": "MyModel"}\n' % (us.id, us.id))
+        with self.assertRaises(ValueError):
+            import_records("tmp_records.jsonl", batch=1)
+        self.assertIs(us, models.storage.get(User, us.id))
+        self.assertEqual([us], models.storage.find(User, email="a@b.c"))
+        self.assertEqual(1, models.storage.count())
+
+    def test_import_to_snapshot_with_journal(self):
+        us = User()
+        models.storage.save()
+        models.storage.set_journal(True)
+        try:
+            us.first_name = "Betty"
+            models.storage.save()
+        finally:
+            models.storage.set_journal(False)
+        self.write("tmp_records.jsonl", '{"id": "2"}\n')
+        with patch("models.engine.transfer.FileLock",
+                   wraps=FileLock) as lock:
+            self.assertEqual(1, import_records("tmp_records.jsonl", User,
+                                               dst="file.json"))
+        lock.assert_called_once_with("file.json.lock")
+        self.assertFalse(os.path.exists("file.json.journal"))
+        with open("file.json", "r") as f:
+            records = json.load(f)
+        self.assertEqual(["User." + us.id, "User.2"], list(records))
+        self.assertEqual("Betty", records["User." + us.id]["first_name"])
+
+    def test_import_to_snapshot(self):
+        self.write("tmp_records.jsonl", '{"id": "1", "first_name": "Betty"}\n')
+        self.assertEqual(1, import_records("tmp_records.jsonl", User,
+                                           dst="tmp_file.json"))
+        self.write("tmp_records.jsonl", '{"id": "2"}\n')
+        self.assertEqual(1, import_records("tmp_records.jsonl", User,
+                                           dst="tmp_file.json"))
+        with open("tmp_file.json", "r") as f:
+            records = json.load(f)
+        self.assertEqual(["User.1", "User.2"], list(records))
+        self.assertEqual("Betty", records["User.1"]["first_name"])
+        self.assertEqual(0, models.storage.count())
+
+
+if __name__ == "__main__":
+    unittest.main()
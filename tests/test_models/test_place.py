@@ -9,6 +9,7 @@ Unittest classes:
 """
 
 import os
+import sys
 import models
 import unittest
 from datetime import datetime
@@ -140,6 +141,17 @@ class TestPlace_instantiation(unittest.TestCase):
         self.assertEqual(pl.created_at, dt)
         self.assertEqual(pl.updated_at, dt)
 
+    def test_instantiation_with_kwargs_layout(self):
+        dt_iso = datetime.today().isoformat()
+        pl = Place(name="Loft", extra=1, number_rooms=2, updated_at=dt_iso,
+                   city_id="".join(["12", "34"]), id="345",
+                   created_at=dt_iso, __class__="Place")
+        self.assertEqual(["id", "created_at", "updated_at", "city_id",
+                          "name", "number_rooms", "extra"],
+                         list(pl.__dict__))
+        self.assertIs(pl.created_at, pl.updated_at)
+        self.assertIs(pl.city_id, sys.intern("1234"))
+
     def test_instantiation_with_None_kwargs(self):
         with self.assertRaises(TypeError):
             Place(id=None, created_at=None, updated_at=None)
@@ -86,6 +86,13 @@ class TestUser_instantiation(unittest.TestCase):
         self.assertEqual(us.created_at, dt)
         self.assertEqual(us.updated_at, dt)
 
+    def test_instantiation_with_kwargs_no_microseconds(self):
+        dt = datetime.today().replace(microsecond=0)
+        dt_iso = dt.isoformat()
+        us = User(id="345", created_at=dt_iso, updated_at=dt_iso)
+        self.assertEqual(us.created_at, dt)
+        self.assertEqual(us.updated_at, dt)
+
     def test_instantiation_with_None_kwargs(self):
         with self.assertRaises(TypeError):
             User(id=None, created_at=None, updated_at=None)